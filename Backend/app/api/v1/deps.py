@@ -1,14 +1,18 @@
 # app/api/v1/deps.py
 
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import Depends, HTTPException, status, Header, Request
 from fastapi.security import APIKeyHeader
 from jose import JWTError, jwt
 from app.core.config import settings
 from app.schemas.user import User
 from app.db.session import users_collection, api_keys_collection
 from app.core.security import hash_api_key
-from typing import Optional
+from app.core.metrics import AUTH_SECONDS
+from app.core.tracing import span, current_trace
+from app.core.rate_limit import rate_limiter, RateLimitExceeded, Admission
+from typing import Optional, Sequence, Tuple
 from bson import ObjectId
+import time
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
@@ -19,6 +23,7 @@ credentials_exception = HTTPException(
 )
 
 async def get_authenticated_user(
+    request: Request,
     authorization: Optional[str] = Header(None),
     api_key: Optional[str] = Depends(api_key_header)
 ) -> dict:
@@ -26,6 +31,24 @@ async def get_authenticated_user(
     Validates credentials from either a JWT token (from Authorization header) or an API key.
     Returns the user document from the database.
     """
+    started = time.perf_counter()
+    with span("auth") as attrs:
+        user, method, api_key_id = await _authenticate(authorization, api_key)
+        attrs["method"] = method
+    # Lets rate limits tell API-key traffic apart from the same user's own sessions
+    request.state.api_key_id = api_key_id
+    AUTH_SECONDS.labels(method).observe(time.perf_counter() - started)
+
+    if user is None:
+        raise credentials_exception
+    trace = current_trace()
+    if trace is not None:
+        # Debug trace endpoints only show users their own requests
+        trace.attrs["user_id"] = str(user["_id"])
+    return user
+
+async def _authenticate(authorization: Optional[str], api_key: Optional[str]) -> Tuple[Optional[dict], str, Optional[str]]:
+    """Returns (user document, auth method, API key id) or (None, "rejected", None)."""
     # 1. Try to authenticate with JWT token
     if authorization and authorization.startswith("Bearer "):
         token = authorization.split("Bearer ")[1]
@@ -34,23 +57,49 @@ async def get_authenticated_user(
             email: str = payload.get("sub")
             if email is None:
                 raise credentials_exception
-            user = await users_collection.find_one({"email": email})
+            with span("mongo.find_one", collection="users"):
+                user = await users_collection.find_one({"email": email})
             if user:
-                return user
+                return user, "jwt", None
         except JWTError:
             pass
 
     # 2. If token auth fails or is not provided, try to authenticate with API key
     if api_key:
         hashed_key = hash_api_key(api_key)
-        key_doc = await api_keys_collection.find_one({"hashed_key": hashed_key})
+        with span("mongo.find_one", collection="api_keys"):
+            key_doc = await api_keys_collection.find_one({"hashed_key": hashed_key})
         if key_doc:
-            user = await users_collection.find_one({"_id": ObjectId(key_doc["user_id"])})
+            with span("mongo.find_one", collection="users"):
+                user = await users_collection.find_one({"_id": ObjectId(key_doc["user_id"])})
             if user:
-                return user
+                return user, "api_key", str(key_doc["_id"])
+
+    # 3. If neither method succeeds, the caller raises the credentials exception
+    return None, "rejected", None
 
-    # 3. If neither method succeeds, raise the exception
-    raise credentials_exception
+async def enforce_rate_limit(
+    request: Request, user_id: str, role: Optional[str], bot_id: Optional[str] = None,
+    cost: float = 1.0, stream: bool = False, bot_ids: Sequence[str] = ()
+) -> Admission:
+    """
+    Charges the request to the user (limits by role), the API key it came with and the bot
+    it targets. Raises 429 with Retry-After when any of them is over its limit. Streams hold
+    a concurrency slot until the returned Admission is released.
+    Requests fanning out to several bots (compare) pass bot_ids: each bot is charged one
+    request and holds one stream slot, as if it were asked separately.
+    """
+    principals = [("user", user_id, "recruiter" if role == "recruiter" else "candidate")]
+    api_key_id = getattr(request.state, "api_key_id", None)
+    if api_key_id:
+        principals.append(("api_key", api_key_id, "api_key"))
+    if bot_id:
+        principals.append(("bot", bot_id, "bot"))
+    principals.extend(("bot", candidate_id, "bot", 1.0) for candidate_id in bot_ids)
+    try:
+        return await rate_limiter.admit(principals, cost=cost, stream=stream)
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=e.detail, headers=e.headers)
 
 async def get_current_user(
     authenticated_user: dict = Depends(get_authenticated_user)
@@ -8,17 +8,14 @@ from app.schemas.user import User
 # --- FIX 1: UNCOMMENT THIS IMPORT ---
 from app.core.agora_token import generate_agora_token 
 
-# We can keep VoiceAgent imported, but ensure you have 'edge-tts' installed locally!
-#from app.core.voice_agent import VoiceAgent 
-from app.db.session import bots_collection
+# VoiceAgent is created through the registry, which imports it (and edge-tts/agorartc) lazily
+from app.core.voice_registry import voice_registry, VoiceCapacityError, VoiceUnavailableError
+from app.db.session import bots_collection, ACTIVE_BOT_FILTER
 from bson import ObjectId
 import random
 
 router = APIRouter()
 
-# Global dictionary to keep track of active agents in memory
-active_agents = {}
-
 class TokenRequest(BaseModel):
     channel_name: str 
 
@@ -63,38 +60,79 @@ async def start_voice_agent(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Initializes and joins the AI Agent to the Agora channel.
+    Initializes and joins the AI Agent to the Agora channel (bot owner or recruiters only).
     """
     bot_id = request.channel_name
-    
-    # 1. Check if agent is already active
-    if bot_id in active_agents and active_agents[bot_id].is_joined:
-         return {"message": "Agent already in call"}
 
-    # 2. Fetch Bot details
+    # 1. Fetch Bot details
     try:
-        bot = await bots_collection.find_one({"_id": ObjectId(bot_id)})
+        bot = await bots_collection.find_one({"_id": ObjectId(bot_id), **ACTIVE_BOT_FILTER})
     except Exception:
          raise HTTPException(status_code=400, detail="Invalid Bot ID format")
          
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
 
-    try:
-        # --- MOCKED AI AGENT STARTUP ---
-        # We comment out the actual VoiceAgent logic to verify connections first.
-        
-        # agent = VoiceAgent(
-        #     bot_id=bot_id,
-        #     user_id=str(bot["user_id"]),
-        #     bot_name=bot["name"]
-        # )
-        # await agent.join_call()
-        # active_agents[bot_id] = agent
-        
-        print(f" [MOCK] AI Agent summoned for channel: {bot_id}")
-        return {"message": "AI Agent joined successfully (Mocked)"}
+    # --- PERMISSION LOGIC ---
+    # Same rule as chat: a call runs the bot's LLM and TTS on shared voice capacity
+    is_owner = str(bot.get("user_id")) == str(current_user.id)
+    is_recruiter = current_user.role == "recruiter"
 
+    if not is_owner and not is_recruiter:
+        raise HTTPException(status_code=403, detail="You do not have permission for this bot")
+    # -----------------------------
+
+    # 2. Join (or reuse the agent already in this channel), subject to voice capacity
+    try:
+        agent, created = await voice_registry.start_call(
+            bot_id=bot_id,
+            user_id=str(bot["user_id"]),
+            bot_name=bot["name"],
+            started_by=str(current_user.id)
+        )
+    except VoiceCapacityError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except VoiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Error starting agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to start AI Agent: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to start AI Agent: {e}")
+
+    if not created:
+        return {"message": "Agent already in call"}
+    return {"message": "AI Agent joined successfully"}
+
+@router.post("/end-call")
+async def end_voice_agent(
+    request: StartCallRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Removes the AI Agent from the channel and returns the call's resource usage.
+    Only the bot's owner or the user who started the call may end it.
+    """
+    bot_id = request.channel_name
+    if not ObjectId.is_valid(bot_id):
+        raise HTTPException(status_code=400, detail="Invalid Bot ID format")
+    # Deleted bots included: their call may still be running
+    bot = await bots_collection.find_one({"_id": ObjectId(bot_id)}, {"user_id": 1})
+    agent = voice_registry.get(bot_id)
+    if bot is None or agent is None:
+        raise HTTPException(status_code=404, detail="No active call on this channel")
+    user_id = str(current_user.id)
+    if str(bot.get("user_id")) != user_id and agent.started_by != user_id:
+        raise HTTPException(status_code=403, detail="You do not have permission to end this call")
+
+    report = await voice_registry.end_call(bot_id, "ended")
+    if report is None:
+        raise HTTPException(status_code=404, detail="No active call on this channel")
+    return report
+
+@router.get("/calls")
+async def list_voice_calls(current_user: User = Depends(get_current_user)):
+    """
+    Voice capacity and per-call resource usage (active and recently ended calls).
+    Recruiters see every call; candidates only the calls on their own bots.
+    """
+    user_id = None if current_user.role == "recruiter" else str(current_user.id)
+    return {**voice_registry.stats(), **voice_registry.usage(user_id)}
@@ -1,10 +1,11 @@
 # app/api/v1/endpoints/api_keys.py
 
 import secrets
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from app.api.v1.deps import get_current_user
 from app.schemas.user import User
 from app.db.session import api_keys_collection
+from app.db.pagination import PageParams, fetch_page, NEXT_CURSOR_HEADER
 from bson import ObjectId
 from typing import List
 # --- REMOVE hashlib, IMPORT the hash function from its new location ---
@@ -37,13 +38,19 @@ async def create_api_key(
 
 @router.get("/", response_model=List[APIKey])
 async def get_user_api_keys(
+    response: Response,
+    page: PageParams = Depends(),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Retrieve a list of API key prefixes for the current user.
+    Retrieve a page of API key prefixes for the current user.
+    The cursor for the next page is returned in the X-Next-Cursor header.
     """
-    keys_cursor = api_keys_collection.find({"user_id": str(current_user.id)})
-    keys = await keys_cursor.to_list(100)
+    keys, next_cursor = await fetch_page(
+        api_keys_collection, {"user_id": str(current_user.id)}, page, projection={"prefix": 1}
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     return [{"id": str(key["_id"]), "prefix": key["prefix"]} for key in keys]
 
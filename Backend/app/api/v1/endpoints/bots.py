@@ -1,33 +1,83 @@
 # app/api/v1/endpoints/bots.py
 
 import os
+import math
 import shutil
-import re
+from pathlib import Path
+from datetime import datetime, timezone
 from typing import List
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from fastapi import (
-    APIRouter, UploadFile, File, Depends, HTTPException, status
+    APIRouter, UploadFile, File, Depends, HTTPException, Request, Response, BackgroundTasks, status
 )
 from starlette.responses import StreamingResponse
-from langchain_core.messages import HumanMessage, AIMessage
 
-from app.api.v1.deps import get_current_user, get_authenticated_user
+from app.api.v1.deps import get_current_user, get_authenticated_user, enforce_rate_limit
 from app.schemas.user import User
-from app.schemas.bot import Bot, BotCreate, BotUpdate
-from app.db.session import bots_collection
-from app.core.rag_pipeline import RAGPipeline, GlobalRecruiterIndex
+from app.schemas.bot import Bot, BotCreate, BotUpdate, BOT_PROJECTION
+from app.db.session import bots_collection, ACTIVE_BOT_FILTER
+from app.db.pagination import PageParams, fetch_page, NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.core.rag_pipeline import (
+    RAGPipeline, GlobalRecruiterIndex, evict_bot_vector_store, extract_text_from_upload, build_profile_text,
+    SUPPORTED_EXTENSIONS, strip_think_tags
+)
+from app.core.metrics import record_error
+from app.core.tracing import span
+from app.core.executors import run_io, run_cpu
+from app.core.uploads import SpooledUpload, UploadTooLarge, spool_upload
+from app.core.transcripts import transcript_writer
+from app.core.talent_analytics import talent_analytics
 
 router = APIRouter()
 
-def strip_think_tags(text: str) -> str:
-    """Removes <think> tags from the LLM response for a cleaner output."""
-    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+def build_chat_history(chat_history_raw: list) -> list:
+    """Converts the frontend's chat history into LangChain messages."""
+    # Imported here so loading the bots router doesn't pull in langchain at startup
+    from langchain_core.messages import HumanMessage, AIMessage
+
+    if not isinstance(chat_history_raw, list) or not all(isinstance(msg, dict) for msg in chat_history_raw):
+        raise HTTPException(status_code=400, detail="chat_history must be a list of messages")
+
+    chat_history = []
+    for msg in chat_history_raw:
+        # Frontend sends 'role', backend logic previously expected 'type'
+        # We check both to be safe
+        role = msg.get("role") or msg.get("type")
+        content = msg.get("content", "")
+        
+        if role == "user":
+            chat_history.append(HumanMessage(content=content))
+        else:
+            chat_history.append(AIMessage(content=content))
+    return chat_history
+
+async def touch_bot(bot_id: str):
+    """Records when a bot was last chatted with; startup warmup prefetches the most recent ones."""
+    await bots_collection.update_one(
+        {"_id": ObjectId(bot_id)}, {"$set": {"last_chat_at": datetime.now(timezone.utc)}}
+    )
+
+async def record_stream(stream, bot_id: str, question: str, request: Request, user_id: str, stats: dict):
+    """Passes a response stream through and queues its transcript once it ends or the client leaves."""
+    answer, completed = [], False
+    try:
+        async for chunk in stream:
+            answer.append(chunk)
+            yield chunk
+        completed = True
+    finally:
+        transcript_writer.record(
+            bot_id, question, strip_think_tags("".join(answer)), "chat_stream", user_id=user_id,
+            api_key_id=getattr(request.state, "api_key_id", None), stats=stats, completed=completed
+        )
 
 @router.get("/public/{bot_id}")
 async def get_public_bot_info(bot_id: str):
     try:
-        bot = await bots_collection.find_one({"_id": ObjectId(bot_id)})
+        bot = await bots_collection.find_one({"_id": ObjectId(bot_id), **ACTIVE_BOT_FILTER})
         if not bot:
             raise HTTPException(status_code=404, detail="Bot not found")
         return {"id": str(bot["_id"]), "name": bot["name"]}
@@ -41,68 +91,112 @@ async def create_bot(bot_in: BotCreate, current_user: User = Depends(get_current
     created_bot = await bots_collection.find_one({"_id": result.inserted_id})
     return created_bot
 
+def metadata_update(metadata: dict, fallback_name: str) -> dict:
+    """Bot document fields from extracted ResumeMetadata (heuristic or LLM)."""
+    try:
+        experience_years = float(metadata.get("experience_years") or 0.0)
+    except (TypeError, ValueError):
+        experience_years = 0.0
+    if not math.isfinite(experience_years):
+        experience_years = 0.0
+    return {
+        "summary": metadata.get("summary"),
+        "skills": list(metadata.get("skills") or []),
+        "experience_years": experience_years,
+        "name": metadata.get("candidate_name") or fallback_name
+    }
+
+async def refine_bot_metadata(bot_id: str, upload_id: str, pipeline: RAGPipeline, text_content: str):
+    """
+    Background refinement of heuristic metadata with the LLM. Skipped if the bot was edited
+    by hand or re-uploaded in the meantime (the filter no longer matches).
+    """
+    metadata = await pipeline.extract_metadata_llm(text_content)
+    if metadata is None:
+        return
+    update_data = metadata_update(metadata, pipeline.bot_name)
+    try:
+        before = await bots_collection.find_one_and_update(
+            {"_id": ObjectId(bot_id), "metadata_upload_id": upload_id, "metadata_source": "heuristic", **ACTIVE_BOT_FILTER},
+            {"$set": {**update_data, "metadata_source": "llm"}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is not None:
+            await talent_analytics.record_change(before, {**before, **update_data})
+            await run_cpu(GlobalRecruiterIndex().add_candidate_profile, bot_id=bot_id, profile_text=build_profile_text(update_data))
+    except Exception as e:
+        print(f"Error refining metadata for bot {bot_id}: {e}")
+        record_error("refine_metadata")
+
+def _extract_upload_text(upload: SpooledUpload) -> str:
+    with upload.open() as source:
+        return extract_text_from_upload(source, upload.suffix)
+
 @router.post("/{bot_id}/upload", status_code=status.HTTP_200_OK)
-async def upload_resume(bot_id: str, file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
-    bot = await bots_collection.find_one({"_id": ObjectId(bot_id), "user_id": str(current_user.id)})
+async def upload_resume(bot_id: str, background_tasks: BackgroundTasks, file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+    bot = await bots_collection.find_one({"_id": ObjectId(bot_id), "user_id": str(current_user.id), **ACTIVE_BOT_FILTER})
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
-    
-    pipeline = RAGPipeline(bot_id=bot_id, user_id=str(current_user.id), bot_name=bot["name"])
-    
-    file_location = f"/tmp/{file.filename}"
-    with open(file_location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
 
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix or 'none'}")
+
+    # Small files stay in memory; larger ones go to a uniquely named spool file (see app/core/uploads.py)
     try:
-        # 1. Process file for RAG (Document Chunks)
-        pipeline.process_file(file_location)
+        upload = await spool_upload(file, suffix)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
-        # 2. Extract Structured Metadata
-        print(f"Extracting metadata for bot {bot['name']}...")
-        metadata = await pipeline.extract_metadata(file_location)
-        
-        update_data = {
-            "summary": metadata.get("summary"),
-            "skills": metadata.get("skills"),
-            "experience_years": metadata.get("experience_years"),
-            "name": metadata.get("candidate_name", bot["name"]) 
-        }
+    try:
+        pipeline = await run_cpu(RAGPipeline, bot_id=bot_id, user_id=str(current_user.id), bot_name=bot["name"])
+
+        # 1. Extract the text once; chunking and metadata both use it
+        text_content = await run_cpu(_extract_upload_text, upload)
+
+        # 2. Process file for RAG (Document Chunks)
+        await run_cpu(pipeline.process_file, None, text_content)
+
+        # 3. Extract Structured Metadata (local heuristics now, LLM refinement in the background)
+        metadata = await run_cpu(pipeline.extract_metadata_fast, text_content)
+        update_data = metadata_update(metadata, bot["name"])
+        upload_id = str(ObjectId())
         
-        # 3. Update individual bot metadata in MongoDB
-        await bots_collection.update_one(
+        # 4. Update individual bot metadata in MongoDB
+        before = await bots_collection.find_one_and_update(
             {"_id": ObjectId(bot_id)}, 
-            {"$set": update_data}
+            {"$set": {**update_data, "metadata_source": "heuristic", "metadata_upload_id": upload_id}},
+            return_document=ReturnDocument.BEFORE
         )
+        # The previous state comes from the same atomic update, so the analytics delta is exact
+        background_tasks.add_task(talent_analytics.record_change, before, {**(before or {}), **update_data})
 
-        # 4. ADD TO GLOBAL SEMANTIC SEARCH INDEX
-        # We create a rich text representation of the candidate for the vector search to index.
-        profile_text = (
-            f"Candidate Name: {update_data['name']}\n"
-            f"Professional Summary: {update_data['summary']}\n"
-            f"Top Skills: {', '.join(update_data['skills'] if update_data['skills'] else [])}\n"
-            f"Experience: {update_data['experience_years']} years."
-        )
-        
+        # 5. ADD TO GLOBAL SEMANTIC SEARCH INDEX
         global_index = GlobalRecruiterIndex()
-        global_index.add_candidate_profile(bot_id=bot_id, profile_text=profile_text)
+        await run_cpu(global_index.add_candidate_profile, bot_id=bot_id, profile_text=build_profile_text(update_data))
+
+        if settings.METADATA_LLM_REFINEMENT:
+            background_tasks.add_task(refine_bot_metadata, bot_id, upload_id, pipeline, text_content)
 
         return {
             "message": f"Successfully uploaded and indexed resume for bot '{bot['name']}'",
-            "extracted_data": update_data 
+            "extracted_data": update_data,
+            "metadata_source": "heuristic",
+            "llm_refinement": "pending" if settings.METADATA_LLM_REFINEMENT else "disabled",
         }
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     finally:
-        if os.path.exists(file_location):
-            os.remove(file_location)
+        await upload.cleanup()
 
 @router.post("/{bot_id}/chat")
-async def chat_with_bot(bot_id: str, request_data: dict, authenticated_user: dict = Depends(get_authenticated_user)):
+async def chat_with_bot(bot_id: str, request_data: dict, request: Request, response: Response, background_tasks: BackgroundTasks, authenticated_user: dict = Depends(get_authenticated_user)):
     user_message = request_data.get("message")
     chat_history_raw = request_data.get("chat_history", [])
 
-    bot = await bots_collection.find_one({"_id": ObjectId(bot_id)})
+    with span("mongo.find_one", collection="bots"):
+        bot = await bots_collection.find_one({"_id": ObjectId(bot_id), **ACTIVE_BOT_FILTER})
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     
@@ -114,34 +208,43 @@ async def chat_with_bot(bot_id: str, request_data: dict, authenticated_user: dic
         raise HTTPException(status_code=403, detail="You do not have permission for this bot")
     # -----------------------------
 
-    pipeline = RAGPipeline(bot_id=bot_id, user_id=str(bot["user_id"]), bot_name=bot["name"])
-    
     # --- FIX: HANDLE ROLE VS TYPE MISMATCH ---
-    chat_history = []
-    for msg in chat_history_raw:
-        # Frontend sends 'role', backend logic previously expected 'type'
-        # We check both to be safe
-        role = msg.get("role") or msg.get("type")
-        content = msg.get("content", "")
-        
-        if role == "user":
-            chat_history.append(HumanMessage(content=content))
-        else:
-            chat_history.append(AIMessage(content=content))
+    # Validated before admission, so a malformed request never takes a stream slot
+    chat_history = build_chat_history(chat_history_raw)
     # -----------------------------------------
-    
-    full_response = ""
-    async for chunk in pipeline.get_response_stream(user_message, chat_history):
-        full_response += chunk
 
-    return {"reply": strip_think_tags(full_response)}
+    admission = await enforce_rate_limit(
+        request, str(authenticated_user.get("_id")), authenticated_user.get("role"), bot_id=bot_id, stream=True
+    )
+
+    admission.apply(response)
+    try:
+        # Construction loads the bot's FAISS index (and the embedding model on first use)
+        pipeline = await run_cpu(RAGPipeline, bot_id=bot_id, user_id=str(bot["user_id"]), bot_name=bot["name"])
+        
+        background_tasks.add_task(touch_bot, bot_id)
+        full_response = ""
+        stats = {}
+        async for chunk in pipeline.get_response_stream(user_message, chat_history, stats=stats):
+            full_response += chunk
+    finally:
+        await admission.release()
+
+    reply = strip_think_tags(full_response)
+    # Queued in memory only; written to Mongo in batches off the request path
+    transcript_writer.record(
+        bot_id, user_message, reply, "chat", user_id=str(authenticated_user.get("_id")),
+        api_key_id=getattr(request.state, "api_key_id", None), stats=stats
+    )
+    return {"reply": reply}
 
 @router.post("/{bot_id}/chat/stream")
-async def chat_with_bot_stream(bot_id: str, request_data: dict, authenticated_user: dict = Depends(get_authenticated_user)):
+async def chat_with_bot_stream(bot_id: str, request_data: dict, request: Request, background_tasks: BackgroundTasks, authenticated_user: dict = Depends(get_authenticated_user)):
     user_message = request_data.get("message")
     chat_history_raw = request_data.get("chat_history", [])
 
-    bot = await bots_collection.find_one({"_id": ObjectId(bot_id)})
+    with span("mongo.find_one", collection="bots"):
+        bot = await bots_collection.find_one({"_id": ObjectId(bot_id), **ACTIVE_BOT_FILTER})
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
     
@@ -153,49 +256,92 @@ async def chat_with_bot_stream(bot_id: str, request_data: dict, authenticated_us
         raise HTTPException(status_code=403, detail="You do not have permission for this bot")
     # -----------------------------
 
-    pipeline = RAGPipeline(bot_id=bot_id, user_id=str(bot["user_id"]), bot_name=bot["name"])
-
     # --- FIX: HANDLE ROLE VS TYPE MISMATCH ---
-    chat_history = []
-    for msg in chat_history_raw:
-        role = msg.get("role") or msg.get("type")
-        content = msg.get("content", "")
-        
-        if role == "user":
-            chat_history.append(HumanMessage(content=content))
-        else:
-            chat_history.append(AIMessage(content=content))
+    # Validated before admission: the slot taken below is only released by the stream or on error
+    chat_history = build_chat_history(chat_history_raw)
     # -----------------------------------------
 
+    admission = await enforce_rate_limit(
+        request, str(authenticated_user.get("_id")), authenticated_user.get("role"), bot_id=bot_id, stream=True
+    )
+
+    try:
+        # Construction loads the bot's FAISS index (and the embedding model on first use)
+        pipeline = await run_cpu(RAGPipeline, bot_id=bot_id, user_id=str(bot["user_id"]), bot_name=bot["name"])
+        background_tasks.add_task(touch_bot, bot_id)
+        # The stream slot is held until the last token is sent (or the client disconnects)
+        stats = {}
+        stream = record_stream(
+            pipeline.get_response_stream(user_message, chat_history, stats=stats),
+            bot_id, user_message, request, str(authenticated_user.get("_id")), stats
+        )
+    except BaseException:
+        await admission.release()
+        raise
+
     return StreamingResponse(
-        pipeline.get_response_stream(user_message, chat_history),
-        media_type="text/event-stream"
+        admission.guard(stream),
+        media_type="text/event-stream",
+        headers=admission.headers
     )
 
 @router.get("/", response_model=List[Bot])
-async def get_user_bots(current_user: User = Depends(get_current_user)):
-    bots = await bots_collection.find({"user_id": str(current_user.id)}).to_list(100)
+async def get_user_bots(
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: User = Depends(get_current_user)
+):
+    bots, next_cursor = await fetch_page(
+        bots_collection, {"user_id": str(current_user.id), **ACTIVE_BOT_FILTER}, page, projection=BOT_PROJECTION
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return bots
     
+async def purge_deleted_bot(bot_id: str, user_id: str):
+    """
+    Background cleanup for a bot flagged as deleted: removes its RAG index files,
+    tombstones its global search profile and finally drops the Mongo document.
+    """
+    user_data_dir = os.path.join("data", user_id, bot_id)
+    evict_bot_vector_store(Path(user_data_dir) / "faiss_index")
+    try:
+        if os.path.exists(user_data_dir):
+            await run_io(shutil.rmtree, user_data_dir, ignore_errors=True)
+        await run_cpu(GlobalRecruiterIndex().remove_candidate_profile, bot_id)
+        await bots_collection.delete_one({"_id": ObjectId(bot_id), "deleted": True})
+    except Exception as e:
+        # The bot stays flagged as deleted (and hidden); cleanup can be retried later
+        print(f"Error purging deleted bot {bot_id}: {e}")
+        record_error("purge_deleted_bot")
+
 @router.delete("/{bot_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_bot(bot_id: str, current_user: User = Depends(get_current_user)):
-    bot = await bots_collection.find_one({"_id": ObjectId(bot_id), "user_id": str(current_user.id)})
+async def delete_bot(bot_id: str, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user)):
+    bot = await bots_collection.find_one({"_id": ObjectId(bot_id), "user_id": str(current_user.id), **ACTIVE_BOT_FILTER})
     if not bot:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bot not found")
 
-    await bots_collection.delete_one({"_id": ObjectId(bot_id)})
-    user_data_dir = os.path.join("data", str(current_user.id), bot_id)
-    if os.path.exists(user_data_dir):
-        shutil.rmtree(user_data_dir)
+    # Hide the bot right away; files, the global index entry and the document are purged in the background
+    before = await bots_collection.find_one_and_update(
+        {"_id": ObjectId(bot_id), **ACTIVE_BOT_FILTER}, {"$set": {"deleted": True}}, return_document=ReturnDocument.BEFORE
+    )
+    background_tasks.add_task(talent_analytics.record_change, before, None)
+    background_tasks.add_task(purge_deleted_bot, bot_id, str(current_user.id))
     return
 
 @router.patch("/{bot_id}", response_model=Bot)
-async def update_bot(bot_id: str, bot_in: BotUpdate, current_user: User = Depends(get_current_user)):
-    bot = await bots_collection.find_one({"_id": ObjectId(bot_id), "user_id": str(current_user.id)})
+async def update_bot(bot_id: str, bot_in: BotUpdate, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user)):
+    bot = await bots_collection.find_one({"_id": ObjectId(bot_id), "user_id": str(current_user.id), **ACTIVE_BOT_FILTER})
     if not bot:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bot not found")
         
     update_data = bot_in.model_dump(exclude_unset=True)
-    await bots_collection.update_one({"_id": ObjectId(bot_id)}, {"$set": update_data})
+    if update_data:
+        # Hand edits win over a pending LLM refinement of the uploaded resume
+        update_data["metadata_source"] = "manual"
+    before = await bots_collection.find_one_and_update(
+        {"_id": ObjectId(bot_id)}, {"$set": update_data}, return_document=ReturnDocument.BEFORE
+    )
     updated_bot = await bots_collection.find_one({"_id": ObjectId(bot_id)})
+    background_tasks.add_task(talent_analytics.record_change, before, {**(before or {}), **update_data})
     return updated_bot
\ No newline at end of file
@@ -0,0 +1,37 @@
+# app/api/v1/endpoints/debug.py
+
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.v1.deps import get_current_user
+from app.schemas.user import User
+from app.core.config import settings
+from app.core.tracing import recent_traces, get_trace
+
+router = APIRouter()
+
+def require_debug_enabled():
+    # Hidden entirely unless explicitly enabled; traces expose ids and timings
+    if not settings.TRACING_DEBUG_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@router.get("/traces", dependencies=[Depends(require_debug_enabled)])
+async def list_traces(
+    limit: int = 50,
+    min_duration_ms: float = 0.0,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The caller's most recent request traces from this worker's ring buffer, newest first.
+    """
+    return recent_traces(
+        limit=min(limit, settings.TRACE_BUFFER_SIZE), min_duration_ms=min_duration_ms, user_id=str(current_user.id)
+    )
+
+@router.get("/traces/{trace_id}", dependencies=[Depends(require_debug_enabled)])
+async def read_trace(trace_id: str, current_user: User = Depends(get_current_user)):
+    """
+    One of the caller's traces with all of its spans (and the sampling profile, if it was captured).
+    """
+    trace = get_trace(trace_id, user_id=str(current_user.id))
+    if not trace:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
@@ -1,30 +1,89 @@
 # app/api/v1/endpoints/recruiter.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from app.db.session import bots_collection
-from app.schemas.bot import Bot
-from app.api.v1.deps import get_current_user
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.responses import StreamingResponse
+from app.db.session import bots_collection, ACTIVE_BOT_FILTER
+from app.schemas.bot import Bot, BOT_PROJECTION
+from app.api.v1.deps import get_current_user, enforce_rate_limit
 from app.schemas.user import User
-from typing import List
+from typing import List, Optional
+import time
 from bson import ObjectId
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # Import the Global Index for Semantic Search
-from app.core.rag_pipeline import GlobalRecruiterIndex
+from app.core.rag_pipeline import GlobalRecruiterIndex, RAGPipeline, strip_think_tags
+from app.core.config import settings
+from app.core.transcripts import transcript_writer
+from app.core.talent_matcher import split_requirements
+from app.core.talent_analytics import talent_analytics
+from app.core.metrics import record_error
+from app.core.tracing import span
+from app.core.executors import run_cpu
 
 router = APIRouter()
 
+def format_candidate(res: dict, **extra) -> dict:
+    """Public search-result shape for one bot document."""
+    # --- FIX: Use .get() to avoid 'skills' KeyError ---
+    skills_list = res.get("skills", [])
+    # Ensure skills is actually a list (handle None or strings)
+    if not isinstance(skills_list, list):
+        skills_list = []
+    return {
+        "id": str(res["_id"]),
+        "name": res.get("name", "Unknown Candidate"),
+        "match_score": 0,
+        **extra,
+        "skills": skills_list,
+        "summary": res.get("summary", "No summary available."),
+        "experience_years": res.get("experience_years", 0)
+    }
+
+async def fetch_candidates(bot_ids: List[str]) -> dict:
+    """Active bot documents for the given ids, keyed by id string, in one $in query."""
+    if not bot_ids:
+        return {}
+    bot_object_ids = [ObjectId(bid) for bid in bot_ids]
+    with span("mongo.find", collection="bots", ids=len(bot_object_ids)):
+        candidates = await bots_collection.find(
+            {"_id": {"$in": bot_object_ids}, **ACTIVE_BOT_FILTER}, BOT_PROJECTION
+        ).to_list(len(bot_object_ids))
+    return {str(c["_id"]): c for c in candidates}
+
 class SearchRequest(BaseModel):
     query: str
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=100)
+    k: int = Field(10, ge=1, le=50)
+
+class CompareRequest(BaseModel):
+    question: str
+    bot_ids: List[str] = Field(..., min_length=1, max_length=10)
+
+class JobMatchRequest(BaseModel):
+    job_description: str
+    # Explicit requirements skip the automatic split of the JD (all weighted equally)
+    requirements: Optional[List[str]] = None
+    top_k: int = Field(20, ge=1, le=200)
+    min_score: Optional[float] = None
+
 @router.post("/search")
 async def search_candidates(
     search_request: SearchRequest,  # Fixed: Match the class name defined above
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user) # Fixed: Type as User model
 ):
     if current_user.role != "recruiter":
         raise HTTPException(status_code=403, detail="Only recruiters can search candidates")
 
+    admission = await enforce_rate_limit(request, str(current_user.id), current_user.role)
+    admission.apply(response)
+
     if not search_request.query.strip():
         return []
 
@@ -32,50 +91,286 @@ async def search_candidates(
         # 1. Initialize Index and Run Vector Search
         # Note: This returns a list of ID strings (e.g. ['60d5...', '60d6...'])
         global_index = GlobalRecruiterIndex()
-        matching_bot_ids = global_index.semantic_search(search_request.query, k=10)
+        with span("global_index.search", k=10):
+            matching_bot_ids = await run_cpu(global_index.semantic_search, search_request.query, k=10)
 
         if not matching_bot_ids:
             return []
 
-        # 2. Fetch Full Documents from MongoDB
-        # We need to convert string IDs to ObjectIds for the DB query
-        bot_object_ids = [ObjectId(bid) for bid in matching_bot_ids]
-        
-        candidates_cursor = bots_collection.find({"_id": {"$in": bot_object_ids}})
-        candidates = await candidates_cursor.to_list(100)
+        # 2. Fetch Full Documents from MongoDB (map preserves search order / relevance)
+        candidates_map = await fetch_candidates(matching_bot_ids)
 
         # 3. Format the results safely
-        formatted_results = []
-        
-        # Helper map to preserve search order (relevance)
-        candidates_map = {str(c["_id"]): c for c in candidates}
+        formatted_results = [
+            format_candidate(candidates_map[bid]) for bid in matching_bot_ids if bid in candidates_map
+        ]
+            
+        return formatted_results
+
+    except Exception as e:
+        print(f"Search Error: {str(e)}") # Print to console for debugging
+        record_error("recruiter_search")
+        raise HTTPException(status_code=500, detail=f"Error performing semantic search: {str(e)}")
+
+@router.post("/search/batch")
+async def search_candidates_batch(
+    batch_request: BatchSearchRequest,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Runs many searches in one call: one embedding pass over all queries, one multi-query
+    FAISS search and one MongoDB lookup for the union of matches. Results come back per
+    query, in request order, in the same shape as /search. timing_ms reports the stages and
+    an estimate of what the same queries would have cost as separate /search calls.
+    """
+    if current_user.role != "recruiter":
+        raise HTTPException(status_code=403, detail="Only recruiters can search candidates")
+
+    # Each query costs what a separate /search call would
+    admission = await enforce_rate_limit(request, str(current_user.id), current_user.role, cost=len(batch_request.queries))
+    admission.apply(response)
+
+    queries = [q.strip() for q in batch_request.queries]
+    # Blank queries get an empty result like /search, without being embedded
+    positions = [i for i, q in enumerate(queries) if q]
+    if not positions:
+        return {"results": [{"query": q, "results": []} for q in batch_request.queries], "timing_ms": {}}
+
+    try:
+        started = time.perf_counter()
+        global_index = GlobalRecruiterIndex()
+        with span("global_index.search_batch", queries=len(positions), k=batch_request.k):
+            batch = await run_cpu(
+                global_index.semantic_search_batch, [queries[i] for i in positions], batch_request.k
+            )
+
+        unique_ids = list(dict.fromkeys(bid for ids in batch["results"] for bid in ids))
+        mongo_started = time.perf_counter()
+        candidates_map = await fetch_candidates(unique_ids)
+        mongo_ms = (time.perf_counter() - mongo_started) * 1000
+
+        per_query = [[] for _ in queries]
+        for position, ids in zip(positions, batch["results"]):
+            per_query[position] = [format_candidate(candidates_map[bid]) for bid in ids if bid in candidates_map]
+
+        timing = dict(batch["timing_ms"])
+        timing["mongo"] = round(mongo_ms, 2)
+        timing["total"] = round((time.perf_counter() - started) * 1000, 2)
+        if "single_embedding" in timing:
+            # Each separate /search pays one embedding, one FAISS search and one Mongo round trip
+            sequential = len(positions) * (timing["single_embedding"] + timing["single_search"] + timing["mongo"])
+            timing["estimated_sequential"] = round(sequential, 2)
+            timing["estimated_saved"] = round(max(0.0, sequential - timing["total"]), 2)
+
+        return {
+            "results": [
+                {"query": original, "results": results}
+                for original, results in zip(batch_request.queries, per_query)
+            ],
+            "unique_candidates": len(unique_ids),
+            "timing_ms": timing,
+        }
+
+    except Exception as e:
+        print(f"Batch Search Error: {str(e)}")
+        record_error("recruiter_search_batch")
+        raise HTTPException(status_code=500, detail=f"Error performing batch search: {str(e)}")
+
+@router.post("/match")
+async def match_job_description(
+    match_request: JobMatchRequest,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Ranks the whole talent pool against a job description. The JD is split into requirement
+    chunks, each candidate gets a similarity per requirement, and the weighted average is the
+    match score. Every result carries its per-requirement breakdown.
+    """
+    if current_user.role != "recruiter":
+        raise HTTPException(status_code=403, detail="Only recruiters can search candidates")
+
+    admission = await enforce_rate_limit(request, str(current_user.id), current_user.role)
+    admission.apply(response)
 
-        for bid in matching_bot_ids:
+    if match_request.requirements:
+        requirements = [(r.strip(), 1.0) for r in match_request.requirements if r.strip()]
+    else:
+        requirements = split_requirements(match_request.job_description)
+    if not requirements or not requirements[0][0]:
+        raise HTTPException(status_code=400, detail="Job description is empty")
+
+    try:
+        global_index = GlobalRecruiterIndex()
+        with span("global_index.match", requirements=len(requirements)):
+            match = await run_cpu(
+                global_index.match_requirements,
+                [text for text, _ in requirements],
+                [weight for _, weight in requirements],
+                match_request.top_k,
+                match_request.min_score,
+            )
+
+        candidates_map = await fetch_candidates(match["bot_ids"])
+
+        results = []
+        for bid, score, breakdown in zip(match["bot_ids"], match["scores"], match["requirement_scores"]):
             res = candidates_map.get(bid)
             if not res:
                 continue
+            results.append(format_candidate(
+                res,
+                match_score=round(score, 4),
+                requirement_scores=[
+                    {"requirement": text, "weight": weight, "score": round(req_score, 4)}
+                    for (text, weight), req_score in zip(requirements, breakdown)
+                ],
+            ))
 
-            # --- FIX: Use .get() to avoid 'skills' KeyError ---
-            skills_list = res.get("skills", [])
-            
-            # Ensure skills is actually a list (handle None or strings)
-            if not isinstance(skills_list, list):
-                skills_list = [] 
-
-            formatted_results.append({
-                "id": str(res["_id"]),
-                "name": res.get("name", "Unknown Candidate"),
-                # 'score' might not be available from Mongo, 
-                # usually vector engines return it separately. 
-                # For now we can omit it or set a default.
-                "match_score": 0, 
-                "skills": skills_list,  # Safe access
-                "summary": res.get("summary", "No summary available."),
-                "experience_years": res.get("experience_years", 0)
-            })
-            
-        return formatted_results
+        return {
+            "requirements": [{"requirement": text, "weight": weight} for text, weight in requirements],
+            "candidates_scored": match["candidates_scored"],
+            "timing_ms": match["timing_ms"],
+            "results": results,
+        }
 
     except Exception as e:
-        print(f"Search Error: {str(e)}") # Print to console for debugging
-        raise HTTPException(status_code=500, detail=f"Error performing semantic search: {str(e)}")
\ No newline at end of file
+        print(f"Match Error: {str(e)}")
+        record_error("recruiter_match")
+        raise HTTPException(status_code=500, detail=f"Error matching job description: {str(e)}")
+
+@router.get("/analytics")
+async def talent_pool_analytics(
+    request: Request,
+    response: Response,
+    top_skills: int = Query(20, ge=1, le=200),
+    top_pairs: int = Query(20, ge=1, le=200),
+    skill: Optional[str] = Query(None, description="Only skill pairs that include this skill"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Talent-pool aggregates for dashboards: skill frequency, experience histogram and skill
+    co-occurrence. Served from memory; the counters are kept current as bots change.
+    """
+    if current_user.role != "recruiter":
+        raise HTTPException(status_code=403, detail="Only recruiters can view talent analytics")
+
+    admission = await enforce_rate_limit(request, str(current_user.id), current_user.role)
+    admission.apply(response)
+
+    try:
+        return await talent_analytics.snapshot(top_skills=top_skills, top_pairs=top_pairs, skill=skill)
+    except Exception as e:
+        print(f"Analytics Error: {str(e)}")
+        record_error("talent_analytics")
+        raise HTTPException(status_code=500, detail=f"Error loading talent analytics: {str(e)}")
+
+# --- Multi-candidate comparison ---
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def answer_candidate(bot: dict, question: str, events: asyncio.Queue, semaphore: asyncio.Semaphore,
+                           user_id: str):
+    """
+    Streams one candidate's answer into the shared event queue. The timeout covers this
+    candidate's own work (index load + generation), not the wait for a concurrency slot.
+    """
+    bot_id = str(bot["_id"])
+    answer, stats = [], {}
+    async with semaphore:
+        started = time.perf_counter()
+        await events.put(sse_event("start", {"bot_id": bot_id, "name": bot.get("name")}))
+
+        async def generate():
+            # Construction loads the bot's FAISS index (and the embedding model on first use)
+            pipeline = await run_cpu(RAGPipeline, bot_id=bot_id, user_id=str(bot["user_id"]), bot_name=bot["name"])
+            async for chunk in pipeline.get_response_stream(question, [], stats=stats):
+                answer.append(chunk)
+                await events.put(sse_event("token", {"bot_id": bot_id, "text": chunk}))
+
+        status = "done"
+        try:
+            await asyncio.wait_for(generate(), settings.COMPARE_CANDIDATE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            status = "timeout"
+        except Exception as e:
+            print(f"Compare Error for bot {bot_id}: {str(e)}")
+            record_error("recruiter_compare")
+            status = "error"
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    reply = strip_think_tags("".join(answer))
+    transcript_writer.record(
+        bot_id, question, reply, "compare", user_id=user_id, stats=stats, completed=status == "done"
+    )
+    await events.put(sse_event(status, {
+        "bot_id": bot_id, "answer": reply, "elapsed_ms": elapsed_ms, "ttft_ms": stats.get("ttft_ms")
+    }))
+    return {"bot_id": bot_id, "status": status, "elapsed_ms": elapsed_ms}
+
+async def merged_comparison(bots: List[dict], missing: List[str], question: str, user_id: str):
+    """One SSE feed for all candidates; events of different bots interleave as they arrive."""
+    started = time.perf_counter()
+    events = asyncio.Queue()
+    semaphore = asyncio.Semaphore(settings.COMPARE_MAX_CONCURRENCY)
+    for bot_id in missing:
+        yield sse_event("error", {"bot_id": bot_id, "detail": "Bot not found"})
+
+    async def run_all():
+        results = await asyncio.gather(*(answer_candidate(bot, question, events, semaphore, user_id) for bot in bots))
+        await events.put(None)
+        return results
+
+    runner = asyncio.create_task(run_all())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        summary = await runner
+        yield sse_event("end", {
+            "candidates": summary + [{"bot_id": bot_id, "status": "not_found"} for bot_id in missing],
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+    finally:
+        # Client gone (or the feed failed): stop generating for every candidate
+        runner.cancel()
+
+@router.post("/compare")
+async def compare_candidates(
+    compare_request: CompareRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Asks several candidates' bots the same question at once. Answers stream back as one
+    server-sent event feed (start / token / done | timeout | error per bot_id, then end),
+    with at most COMPARE_MAX_CONCURRENCY bots generating at a time and each one limited to
+    COMPARE_CANDIDATE_TIMEOUT_SECONDS.
+    """
+    if current_user.role != "recruiter":
+        raise HTTPException(status_code=403, detail="Only recruiters can compare candidates")
+
+    question = compare_request.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Question is empty")
+    bot_ids = list(dict.fromkeys(compare_request.bot_ids))
+    if not all(ObjectId.is_valid(bid) for bid in bot_ids):
+        raise HTTPException(status_code=400, detail="Invalid bot id")
+
+    candidates_map = await fetch_candidates(bot_ids)
+    bots = [candidates_map[bid] for bid in bot_ids if bid in candidates_map]
+    missing = [bid for bid in bot_ids if bid not in candidates_map]
+
+    # Each candidate costs what a separate /chat call would: the recruiter pays for every one,
+    # and every bot found is charged (and holds a stream slot) under its own limits
+    admission = await enforce_rate_limit(
+        request, str(current_user.id), current_user.role, cost=len(bot_ids), stream=True,
+        bot_ids=[str(bot["_id"]) for bot in bots]
+    )
+    return StreamingResponse(
+        admission.guard(merged_comparison(bots, missing, question, str(current_user.id))),
+        media_type="text/event-stream",
+        headers={**admission.headers, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -31,6 +31,144 @@ class Settings(BaseSettings):
     AGORA_APP_ID: Optional[str] = None
     AGORA_APP_CERTIFICATE: Optional[str] = None
 
+    # Embedding Settings
+    # "local" loads the model in every worker, "server" uses the shared embedding server process
+    EMBEDDING_BACKEND: str = "local"
+    EMBEDDING_SERVER_SOCKET: str = "/tmp/twinlyai-embeddings.sock"
+    # Embed in-process when the server is unreachable instead of failing the request
+    EMBEDDING_SERVER_FALLBACK: bool = True
+    EMBEDDING_SERVER_MAX_BATCH: int = 64
+    EMBEDDING_SERVER_BATCH_WAIT_MS: float = 5.0
+    # In-process runtime: "torch" (sentence-transformers) or "onnx" (int8-quantized, no torch needed)
+    EMBEDDING_RUNTIME: str = "torch"
+    ONNX_MODEL_DIR: str = "models/bge-small-en-v1.5-onnx"
+    ONNX_MODEL_FILE: str = "model_quantized.onnx"
+
+    # Upload metadata comes from local heuristics; when enabled, an LLM pass refines it in the background
+    METADATA_LLM_REFINEMENT: bool = True
+
+    # How per-bot and global FAISS indexes store vectors: "float32" (exact), "float16" (half the
+    # size, near-identical ranking) or "sq8" (a quarter of the size, 8-bit scalar quantization).
+    # Existing indexes: scripts/migrate_vector_storage.py
+    VECTOR_STORAGE: str = "float32"
+
+    # Upload Settings
+    # Larger uploads get a 413, before the body is read when Content-Length says so
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    # Uploads up to this size are parsed in memory and never written to disk
+    UPLOAD_MEMORY_MAX_BYTES: int = 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    # Where larger uploads are spooled (uniquely named files); defaults to the system temp dir
+    UPLOAD_SPOOL_DIR: Optional[str] = None
+
+    # Number of per-bot FAISS indexes kept in memory (LRU)
+    BOT_INDEX_CACHE_SIZE: int = 32
+
+    # Warmup Settings (run in the background at startup; /ready reports 503 until done)
+    WARMUP_ENABLED: bool = True
+    # Prefetch the indexes of the N most recently chatted-with bots (0 disables)
+    WARMUP_RECENT_BOTS: int = 5
+    WARMUP_GLOBAL_INDEX: bool = True
+
+    # Executor Settings (blocking work is kept off the event loop)
+    # "io": file copies/deletes; "cpu": parsing, embedding, FAISS loads and searches
+    EXECUTOR_IO_WORKERS: int = 8
+    EXECUTOR_CPU_WORKERS: int = 4
+
+    # Event Loop Monitor Settings
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_MS: int = 50
+    # Log the blocking caller's stack when the loop stalls longer than this
+    LOOP_LAG_THRESHOLD_MS: int = 250
+
+    # Voice Call Settings
+    # Calls per worker; /agora/start-call returns 503 beyond this
+    VOICE_MAX_CALLS: int = 20
+    # Turns (LLM + TTS) running at once across all calls; later turns wait for a slot
+    VOICE_MAX_CONCURRENT_TURNS: int = 8
+    VOICE_IDLE_TIMEOUT_SECONDS: int = 300
+    VOICE_SWEEP_INTERVAL_SECONDS: int = 30
+    # Usage reports of finished calls kept for /agora/calls
+    VOICE_CALL_HISTORY: int = 100
+
+    # TTS Cache Settings (synthesized sentences, keyed by voice + normalized text)
+    TTS_CACHE_ENABLED: bool = True
+    TTS_CACHE_DIR: str = "data/tts_cache"
+    TTS_CACHE_MEMORY_MB: int = 32
+    TTS_CACHE_DISK_MB: int = 512
+
+    # Speech-to-Text / VAD Settings
+    # "groq" (hosted Whisper) or "file" (local stand-in reading STT_TRANSCRIPT_FILE, for testing)
+    STT_BACKEND: str = "groq"
+    STT_MODEL: str = "whisper-large-v3-turbo"
+    STT_TRANSCRIPT_FILE: Optional[str] = None
+    VAD_SAMPLE_RATE: int = 16000
+    VAD_FRAME_MS: int = 20
+    # Silence that ends an utterance; lower answers sooner but cuts off slow speakers
+    VAD_SILENCE_MS: int = 500
+    VAD_MIN_SPEECH_MS: int = 250
+    # How often a partial transcript is requested while the recruiter is still talking
+    VAD_PARTIAL_INTERVAL_MS: int = 700
+    # Reuse early retrieval when the partial transcript is a prefix covering this share of the final one
+    VAD_PARTIAL_REUSE_COVERAGE: float = 0.6
+
+    # Rate Limit Settings (token bucket per minute + burst, and max concurrent chat streams)
+    # Applied per user (by role), per API key and per bot; the tightest bucket sets the headers
+    RATE_LIMIT_ENABLED: bool = True
+    # "memory" (per worker process) or "mongo" (shared across workers through MongoDB)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_CANDIDATE_PER_MINUTE: float = 30
+    RATE_LIMIT_CANDIDATE_BURST: int = 10
+    RATE_LIMIT_CANDIDATE_STREAMS: int = 2
+    RATE_LIMIT_RECRUITER_PER_MINUTE: float = 120
+    RATE_LIMIT_RECRUITER_BURST: int = 30
+    RATE_LIMIT_RECRUITER_STREAMS: int = 6
+    RATE_LIMIT_API_KEY_PER_MINUTE: float = 60
+    RATE_LIMIT_API_KEY_BURST: int = 20
+    RATE_LIMIT_API_KEY_STREAMS: int = 4
+    # Every caller of one bot combined (e.g. a widget key shared on a public page)
+    RATE_LIMIT_BOT_PER_MINUTE: float = 300
+    RATE_LIMIT_BOT_BURST: int = 60
+    RATE_LIMIT_BOT_STREAMS: int = 10
+    # Mongo backend: stream counts of a key expire after this long without a new stream
+    RATE_LIMIT_STREAM_LEASE_SECONDS: int = 600
+
+    # Tracing Settings
+    # Fraction of requests whose spans are recorded (ring buffer + optional JSONL file)
+    TRACE_SAMPLE_RATE: float = 1.0
+    TRACE_BUFFER_SIZE: int = 500
+    TRACE_EXPORT_PATH: Optional[str] = None
+    # Enables /api/v1/debug/traces and the X-Profile request header (sampling profiler)
+    TRACING_DEBUG_ENABLED: bool = False
+
+    # Chat Transcript Settings
+    # Turns are queued in memory and written in batches; a full queue drops turns instead of slowing chat
+    TRANSCRIPTS_ENABLED: bool = True
+    TRANSCRIPT_BATCH_SIZE: int = 100
+    # Longest a queued turn waits for its batch to fill up
+    TRANSCRIPT_FLUSH_INTERVAL_MS: int = 2000
+    TRANSCRIPT_MAX_QUEUED: int = 10000
+    # On shutdown, queued turns not written within this time are dropped
+    TRANSCRIPT_SHUTDOWN_TIMEOUT_SECONDS: float = 5.0
+
+    # Talent Analytics Settings (recruiter dashboard aggregates)
+    # How often a worker checks whether other workers changed the counters it serves from memory
+    ANALYTICS_REFRESH_SECONDS: int = 30
+    # Skill pairs are counted among a bot's first N skills only (N*(N-1)/2 counters per bot)
+    ANALYTICS_MAX_COOCCURRENCE_SKILLS: int = 30
+
+    # Candidate Comparison Settings (/recruiter/compare)
+    # Bots answering at the same time within one comparison; the rest wait for a slot
+    COMPARE_MAX_CONCURRENCY: int = 4
+    # A bot that hasn't finished its answer by then is reported as timed out
+    COMPARE_CANDIDATE_TIMEOUT_SECONDS: float = 30.0
+
+    # Global Recruiter Index Settings
+    # Compact the index once this fraction of its entries are tombstones (deleted/replaced profiles)
+    GLOBAL_INDEX_COMPACTION_RATIO: float = 0.2
+    # Older index generations kept on disk so readers that are mid-load can finish
+    GLOBAL_INDEX_KEEP_GENERATIONS: int = 3
+
     class Config:
         env_file = ".env"
 
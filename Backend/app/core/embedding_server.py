@@ -0,0 +1,116 @@
+# app/core/embedding_server.py
+#
+# Shared embedding server: loads the embedding model once and serves every API worker
+# on the node over a Unix socket. Start it next to uvicorn and set EMBEDDING_BACKEND=server:
+#
+#   python -m app.core.embedding_server
+
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+from app.core.config import settings
+from app.core.embeddings import get_local_embeddings, FRAME_HEADER
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    return await reader.readexactly(length)
+
+def _write_frame(writer: asyncio.StreamWriter, payload: bytes):
+    writer.write(FRAME_HEADER.pack(len(payload)) + payload)
+
+class EmbeddingServer:
+    """
+    Collects concurrent requests from all connections into micro-batches so the model
+    runs one forward pass for many callers. A batch is flushed when it holds
+    EMBEDDING_SERVER_MAX_BATCH texts or after EMBEDDING_SERVER_BATCH_WAIT_MS.
+    """
+    def __init__(self, socket_path: str, max_batch: int, batch_wait_ms: float):
+        self.socket_path = socket_path
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.queues = {"documents": asyncio.Queue(), "query": asyncio.Queue()}
+        self.embeddings = get_local_embeddings()
+
+    async def _batch_loop(self, op: str):
+        queue = self.queues[op]
+        # bge-small encodes queries and documents the same way (no query instruction),
+        # so both ops batch through one embed_documents forward pass
+        embed = self.embeddings.embed_documents
+        while True:
+            batch = [await queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.batch_wait
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = np.asarray(await asyncio.to_thread(embed, texts), dtype=np.float32)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = json.loads(await _read_frame(reader))
+                op = request.get("op")
+                texts = request.get("texts") or []
+                if op not in self.queues:
+                    _write_frame(writer, json.dumps({"error": f"unknown op {op!r}"}).encode("utf-8"))
+                    await writer.drain()
+                    continue
+
+                future = asyncio.get_running_loop().create_future()
+                await self.queues[op].put((texts, future))
+                try:
+                    vectors = await future
+                except Exception as e:
+                    _write_frame(writer, json.dumps({"error": str(e)}).encode("utf-8"))
+                    await writer.drain()
+                    continue
+
+                _write_frame(writer, json.dumps({"shape": list(vectors.shape)}).encode("utf-8"))
+                _write_frame(writer, vectors.tobytes())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        for op in self.queues:
+            asyncio.create_task(self._batch_loop(op))
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        print(f"Embedding server listening on {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+if __name__ == "__main__":
+    asyncio.run(EmbeddingServer(
+        settings.EMBEDDING_SERVER_SOCKET,
+        max_batch=settings.EMBEDDING_SERVER_MAX_BATCH,
+        batch_wait_ms=settings.EMBEDDING_SERVER_BATCH_WAIT_MS
+    ).serve())
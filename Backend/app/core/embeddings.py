@@ -0,0 +1,165 @@
+# app/core/embeddings.py
+
+import json
+import socket
+import struct
+import threading
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.core.config import settings
+from app.core.metrics import EMBEDDING_SECONDS
+
+EMBEDDING_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+
+# --- Wire protocol shared with app/core/embedding_server.py ---
+# Every frame is a 4-byte big-endian length followed by the payload.
+# Request:  one JSON frame {"op": "documents" | "query", "texts": [...]}
+# Response: one JSON frame {"shape": [n, dim]} or {"error": "..."}, then one frame of raw float32 bytes.
+FRAME_HEADER = struct.Struct("!I")
+
+def send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (length,) = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    return _recv_exact(sock, length)
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+# --- In-process backend ---
+_local_embeddings = None
+_local_lock = threading.Lock()
+
+def get_local_embeddings() -> Embeddings:
+    """
+    Returns the process-wide in-process embedding model, loading it on first use.
+    EMBEDDING_RUNTIME picks the implementation: "torch" (sentence-transformers) or "onnx".
+    """
+    global _local_embeddings
+    if _local_embeddings is None:
+        with _local_lock:
+            if _local_embeddings is None:
+                _local_embeddings = _create_local_embeddings()
+    return _local_embeddings
+
+def _create_local_embeddings() -> Embeddings:
+    # Imported lazily so an onnx-only image never needs torch / sentence-transformers
+    if settings.EMBEDDING_RUNTIME == "onnx":
+        from app.core.onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings(settings.ONNX_MODEL_DIR, model_file=settings.ONNX_MODEL_FILE)
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+# --- Embedding server client ---
+class EmbeddingServerClient(Embeddings):
+    """
+    Embeddings implementation that forwards to the shared embedding server over a Unix socket.
+    Keeps one connection per thread. If the server is unreachable and fallback is enabled,
+    embeds in-process instead so requests never fail just because the server is down.
+    """
+    def __init__(self, socket_path: str, fallback: bool = True, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.fallback = fallback
+        self.timeout = timeout
+        self._local = threading.local()
+        self._warned = False
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _request(self, op: str, texts: List[str]) -> np.ndarray:
+        # One retry on a fresh connection covers a server restart between calls
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_frame(sock, json.dumps({"op": op, "texts": texts}).encode("utf-8"))
+                header = json.loads(recv_frame(sock))
+                if "error" in header:
+                    raise RuntimeError(f"Embedding server error: {header['error']}")
+                vectors = np.frombuffer(recv_frame(sock), dtype=np.float32)
+                return vectors.reshape(header["shape"])
+            except (OSError, ConnectionError):
+                self._drop_connection()
+                if attempt == 1:
+                    raise
+
+    def _embed(self, op: str, texts: List[str]) -> Optional[np.ndarray]:
+        try:
+            return self._request(op, texts)
+        except (OSError, ConnectionError) as e:
+            if not self.fallback:
+                raise
+            if not self._warned:
+                print(f"Embedding server unavailable at {self.socket_path}, embedding in-process: {e}")
+                self._warned = True
+            return None
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors = self._embed("documents", texts)
+        if vectors is None:
+            return get_local_embeddings().embed_documents(texts)
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        vectors = self._embed("query", [text])
+        if vectors is None:
+            return get_local_embeddings().embed_query(text)
+        return vectors[0].tolist()
+
+class TimedEmbeddings(Embeddings):
+    """Records embedding latency for /metrics around any Embeddings implementation."""
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with EMBEDDING_SECONDS.labels("documents").time():
+            return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with EMBEDDING_SECONDS.labels("query").time():
+            return self.inner.embed_query(text)
+
+_embeddings = {}
+
+def get_embeddings() -> Embeddings:
+    """
+    Returns the embeddings implementation selected by EMBEDDING_BACKEND.
+    "local" loads the model in this process, "server" uses the shared embedding server.
+    """
+    backend = settings.EMBEDDING_BACKEND
+    if backend not in _embeddings:
+        if backend == "server":
+            inner = EmbeddingServerClient(
+                settings.EMBEDDING_SERVER_SOCKET,
+                fallback=settings.EMBEDDING_SERVER_FALLBACK
+            )
+        else:
+            inner = get_local_embeddings()
+        _embeddings[backend] = TimedEmbeddings(inner)
+    return _embeddings[backend]
@@ -0,0 +1,91 @@
+# app/core/executors.py
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.core.metrics import EXECUTOR_QUEUE_DEPTH, EXECUTOR_ACTIVE, EXECUTOR_WAIT_SECONDS, EXECUTOR_RUN_SECONDS
+
+class ManagedExecutor:
+    """
+    A named thread pool for blocking calls made from async handlers, with its own sizing
+    and queue metrics (depth, active, wait time, run time).
+    """
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+
+    def _run(self, submitted_at: float, ctx: contextvars.Context, fn, args, kwargs):
+        EXECUTOR_WAIT_SECONDS.labels(self.name).observe(time.perf_counter() - submitted_at)
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        EXECUTOR_QUEUE_DEPTH.labels(self.name).dec()
+        EXECUTOR_ACTIVE.labels(self.name).inc()
+        started = time.perf_counter()
+        try:
+            # Run in the caller's context so tracing spans and metric labels carry over
+            return ctx.run(fn, *args, **kwargs)
+        finally:
+            EXECUTOR_RUN_SECONDS.labels(self.name).observe(time.perf_counter() - started)
+            EXECUTOR_ACTIVE.labels(self.name).dec()
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            self.queued += 1
+        EXECUTOR_QUEUE_DEPTH.labels(self.name).inc()
+        future = self._pool.submit(
+            self._run, time.perf_counter(), contextvars.copy_context(), fn, args, kwargs
+        )
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def get_executor(name: str) -> ManagedExecutor:
+    sizes = {"io": settings.EXECUTOR_IO_WORKERS, "cpu": settings.EXECUTOR_CPU_WORKERS}
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ManagedExecutor(name, sizes[name])
+        return _executors[name]
+
+async def run_io(fn, *args, **kwargs):
+    """Runs blocking file/disk work on the io pool."""
+    return await get_executor("io").run(fn, *args, **kwargs)
+
+async def run_cpu(fn, *args, **kwargs):
+    """Runs parsing, embedding and FAISS work on the cpu pool."""
+    return await get_executor("cpu").run(fn, *args, **kwargs)
+
+def executor_stats() -> dict:
+    with _executors_lock:
+        return {name: executor.stats() for name, executor in _executors.items()}
+
+def shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
@@ -0,0 +1,152 @@
+# app/core/index_store.py
+
+import os
+import fcntl
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+from app.core.metrics import record_cache
+
+# --- Process-wide snapshot cache ---
+# folder path -> (generation, loaded object). Shared by every store instance in this worker
+# so readers only pay for a load when a new generation has been published.
+_snapshot_cache = {}
+_snapshot_cache_lock = threading.Lock()
+
+@contextmanager
+def file_lock(lock_path: Path):
+    """Exclusive flock on lock_path (created if needed), shared by every process on the volume."""
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def bot_index_lock(index_path: Path):
+    """
+    Writer lock of a per-bot FAISS folder (data/<user>/<bot>/faiss_index), held by uploads while
+    they save and by offline tools while they rewrite the files in place.
+    """
+    return file_lock(Path(index_path).parent / ".index.lock")
+
+class GenerationStore:
+    """
+    Single-writer / many-reader storage for an index folder that is shared by several
+    API workers or replicas on the same volume.
+
+    Layout:
+        <folder>/CURRENT          -> name of the live generation, swapped with an atomic rename
+        <folder>/gen-000042/      -> one immutable snapshot per generation
+        <folder>/.writer.lock     -> flock held by the single writer while it publishes
+
+    Files written directly into <folder> by older versions are treated as generation 0.
+    Readers never take the lock: they read CURRENT and reload only when it changes.
+    """
+    def __init__(self, folder_path: Path, legacy_file: str, keep_generations: int = 3):
+        self.folder_path = Path(folder_path)
+        self.legacy_file = legacy_file
+        self.keep_generations = max(2, keep_generations)
+
+    def _pointer_path(self) -> Path:
+        return self.folder_path / "CURRENT"
+
+    def generation_dir(self, generation: int) -> Path:
+        if generation == 0:
+            return self.folder_path
+        return self.folder_path / f"gen-{generation:06d}"
+
+    def current_generation(self) -> Optional[int]:
+        """Returns the live generation, or None if nothing has been published yet."""
+        try:
+            name = self._pointer_path().read_text(encoding="utf-8").strip()
+            return int(name.split("-")[1])
+        except FileNotFoundError:
+            if (self.folder_path / self.legacy_file).exists():
+                return 0
+            return None
+
+    @contextmanager
+    def writer_lock(self):
+        """Blocks until this process is the only writer for the folder."""
+        with file_lock(self.folder_path / ".writer.lock"):
+            yield
+
+    def publish(self, write_fn: Callable[[Path], None]) -> int:
+        """
+        Writes a new generation and makes it live. Must be called while holding writer_lock().
+        `write_fn` receives a private staging directory to write every file into.
+        """
+        current = self.current_generation() or 0
+        new_generation = current + 1
+
+        staging_dir = self.folder_path / f".staging-{uuid.uuid4().hex}"
+        staging_dir.mkdir(parents=True)
+        try:
+            write_fn(staging_dir)
+            os.rename(staging_dir, self.generation_dir(new_generation))
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        # Atomic pointer swap: readers see either the old or the new generation, never a partial one
+        pointer_tmp = self.folder_path / f".CURRENT.{uuid.uuid4().hex}"
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(self.generation_dir(new_generation).name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, self._pointer_path())
+
+        self._prune(new_generation)
+        return new_generation
+
+    def _prune(self, live_generation: int):
+        """Removes old generations, keeping a few so in-flight readers can finish loading."""
+        for path in self.folder_path.glob("gen-*"):
+            try:
+                generation = int(path.name.split("-")[1])
+            except (IndexError, ValueError):
+                continue
+            if generation <= live_generation - self.keep_generations:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def load_snapshot(self, load_fn: Callable[[Path], Any]) -> Tuple[Optional[int], Any]:
+        """
+        Returns (generation, object) for the live generation, hot-reloading through
+        `load_fn(generation_dir)` only when a newer generation has been published.
+        """
+        generation = self.current_generation()
+        if generation is None:
+            return None, None
+
+        key = str(self.folder_path.resolve())
+        with _snapshot_cache_lock:
+            cached = _snapshot_cache.get(key)
+        if cached and cached[0] == generation:
+            record_cache(self.folder_path.name, hit=True)
+            return cached
+
+        record_cache(self.folder_path.name, hit=False)
+        loaded = (generation, load_fn(self.generation_dir(generation)))
+        with _snapshot_cache_lock:
+            # Another thread may have loaded an even newer generation meanwhile
+            cached = _snapshot_cache.get(key)
+            if not cached or cached[0] < generation:
+                _snapshot_cache[key] = loaded
+        return loaded
+
+    def invalidate(self):
+        """Drops this folder's cached snapshot (e.g. after a rebuild outside this process)."""
+        with _snapshot_cache_lock:
+            _snapshot_cache.pop(str(self.folder_path.resolve()), None)
+
+def snapshot_cache_info() -> dict:
+    """Live generation held in memory for every cached index folder."""
+    with _snapshot_cache_lock:
+        return {folder: generation for folder, (generation, _) in _snapshot_cache.items()}
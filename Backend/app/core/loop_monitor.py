@@ -0,0 +1,73 @@
+# app/core/loop_monitor.py
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+from app.core.config import settings
+from app.core.metrics import LOOP_LAG_SECONDS, LOOP_STALLS
+
+class EventLoopMonitor:
+    """
+    Measures event-loop lag and catches the code that blocks it.
+
+    A coroutine on the loop wakes up every LOOP_MONITOR_INTERVAL_MS and records how late it
+    was. A watchdog thread checks the last heartbeat; if the loop hasn't ticked for more than
+    LOOP_LAG_THRESHOLD_MS it prints the loop thread's current stack, i.e. the blocking caller.
+    """
+    def __init__(self, interval_ms: int, threshold_ms: int):
+        self.interval = interval_ms / 1000.0
+        self.threshold = threshold_ms / 1000.0
+        self.last_tick = time.monotonic()
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._loop_thread_id = None
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.last_tick = now
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def _watch(self):
+        reported_tick = None
+        while not self._stop.wait(self.interval):
+            stalled_for = time.monotonic() - self.last_tick
+            # Report each stall once, while it is still happening, so the stack is the culprit's
+            if stalled_for > self.threshold and reported_tick != self.last_tick:
+                reported_tick = self.last_tick
+                self.stalls += 1
+                LOOP_STALLS.inc()
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+                print(f"Event loop blocked for {stalled_for * 1000:.0f} ms. Blocking call stack:\n{stack}")
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self.last_tick = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": self.stalls,
+            "threshold_ms": self.threshold * 1000,
+        }
+
+loop_monitor = EventLoopMonitor(settings.LOOP_MONITOR_INTERVAL_MS, settings.LOOP_LAG_THRESHOLD_MS)
@@ -0,0 +1,201 @@
+# app/core/metrics.py
+
+import os
+import time
+from contextvars import ContextVar
+
+from fastapi import Request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from pymongo import monitoring
+
+# Sub-millisecond to ~10s, for in-process stages (FAISS search, embedding, chunking)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 50ms to 2min, for network-bound stages (LLM calls, whole requests)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0, 120.0)
+
+# --- Request level ---
+REQUEST_SECONDS = Histogram(
+    "twinly_http_request_seconds", "HTTP request latency", ["endpoint", "method", "status"], buckets=SLOW_BUCKETS
+)
+AUTH_SECONDS = Histogram(
+    "twinly_auth_seconds", "Credential validation latency", ["method"], buckets=FAST_BUCKETS
+)
+MONGO_SECONDS = Histogram(
+    "twinly_mongo_command_seconds", "MongoDB command latency", ["collection", "command"], buckets=FAST_BUCKETS
+)
+
+# --- RAG hot paths ---
+EXTRACTION_SECONDS = Histogram(
+    "twinly_document_extraction_seconds", "Resume text extraction", ["file_type"], buckets=FAST_BUCKETS
+)
+CHUNKING_SECONDS = Histogram(
+    "twinly_chunking_seconds", "Resume chunking", buckets=FAST_BUCKETS
+)
+EMBEDDING_SECONDS = Histogram(
+    "twinly_embedding_seconds", "Embedding calls", ["operation"], buckets=FAST_BUCKETS
+)
+FAISS_SEARCH_SECONDS = Histogram(
+    "twinly_faiss_search_seconds", "FAISS vector search", ["index"], buckets=FAST_BUCKETS
+)
+METADATA_SECONDS = Histogram(
+    "twinly_metadata_extraction_seconds", "Resume metadata extraction", ["method"], buckets=FAST_BUCKETS
+)
+LLM_TTFT_SECONDS = Histogram(
+    "twinly_llm_time_to_first_token_seconds", "LLM time to first answer token", ["operation"], buckets=SLOW_BUCKETS
+)
+LLM_TOTAL_SECONDS = Histogram(
+    "twinly_llm_total_seconds", "LLM call duration", ["operation"], buckets=SLOW_BUCKETS
+)
+
+# --- Voice agent ---
+VOICE_FIRST_AUDIO_SECONDS = Histogram(
+    "twinly_voice_first_audio_seconds", "Recruiter utterance to first audio of the answer", buckets=SLOW_BUCKETS
+)
+STT_SECONDS = Histogram(
+    "twinly_stt_seconds", "Speech-to-text for a final utterance", ["backend"], buckets=SLOW_BUCKETS
+)
+TTS_SECONDS = Histogram(
+    "twinly_tts_seconds", "Text-to-speech synthesis per sentence", buckets=SLOW_BUCKETS
+)
+VOICE_TURN_QUEUE_SECONDS = Histogram(
+    "twinly_voice_turn_queue_seconds", "Wait for a free voice turn slot", buckets=FAST_BUCKETS
+)
+VOICE_ACTIVE_CALLS = Gauge(
+    "twinly_voice_active_calls", "Voice calls currently registered"
+)
+VOICE_CALLS_REJECTED = Counter(
+    "twinly_voice_calls_rejected_total", "Voice calls refused by admission control"
+)
+VOICE_CALLS_ENDED = Counter(
+    "twinly_voice_calls_ended_total", "Voice calls ended", ["reason"]
+)
+
+# --- Event loop and executors ---
+LOOP_LAG_SECONDS = Histogram(
+    "twinly_event_loop_lag_seconds", "Event loop scheduling lag", buckets=FAST_BUCKETS
+)
+LOOP_STALLS = Counter(
+    "twinly_event_loop_stalls_total", "Event loop stalls longer than LOOP_LAG_THRESHOLD_MS"
+)
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "twinly_executor_queue_depth", "Tasks waiting for a worker", ["pool"]
+)
+EXECUTOR_ACTIVE = Gauge(
+    "twinly_executor_active", "Tasks currently running", ["pool"]
+)
+EXECUTOR_WAIT_SECONDS = Histogram(
+    "twinly_executor_wait_seconds", "Time spent queued before a worker picked the task up", ["pool"], buckets=FAST_BUCKETS
+)
+EXECUTOR_RUN_SECONDS = Histogram(
+    "twinly_executor_run_seconds", "Task run time on the pool", ["pool"], buckets=FAST_BUCKETS
+)
+
+# --- Chat transcripts ---
+TRANSCRIPT_RECORDS = Counter(
+    "twinly_transcript_records_total", "Chat turns handled by the transcript writer", ["result"]
+)
+TRANSCRIPT_FLUSH_SECONDS = Histogram(
+    "twinly_transcript_flush_seconds", "insert_many of one transcript batch", buckets=FAST_BUCKETS
+)
+
+# --- Counters ---
+CACHE_EVENTS = Counter(
+    "twinly_cache_events_total", "Cache lookups", ["cache", "result", "endpoint"]
+)
+RATE_LIMITED = Counter(
+    "twinly_rate_limited_total", "Requests refused by rate limits", ["principal", "limit"]
+)
+ERRORS = Counter(
+    "twinly_errors_total", "Handled errors", ["stage", "endpoint"]
+)
+
+# --- Endpoint label ---
+# Set per request by track_endpoint so core code can label cache/error counters
+# without threading the route through every call.
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="background")
+
+def route_template(scope) -> str:
+    """
+    Full route template of a matched request (e.g. /api/v1/bots/{bot_id}/chat), rebuilt from
+    the path and its path params. route.path alone misses the router prefixes on newer FastAPI.
+    """
+    if scope.get("endpoint") is None:
+        return "unmatched"
+    params = {str(value): name for name, value in (scope.get("path_params") or {}).items()}
+    return "/".join(
+        "{" + params[segment] + "}" if segment in params else segment
+        for segment in scope.get("path", "").split("/")
+    )
+
+async def track_endpoint(request: Request):
+    current_endpoint.set(route_template(request.scope))
+
+def record_cache(cache: str, hit: bool):
+    CACHE_EVENTS.labels(cache, "hit" if hit else "miss", current_endpoint.get()).inc()
+
+def record_error(stage: str):
+    ERRORS.labels(stage, current_endpoint.get()).inc()
+
+# --- MongoDB command monitoring ---
+class MongoCommandTimer(monitoring.CommandListener):
+    """
+    Times every command the driver sends. Registered on the Motor client, so every
+    collection call is covered without wrapping call sites.
+    """
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[event.request_id] = collection if isinstance(collection, str) else "-"
+
+    def _finish(self, event):
+        collection = self._collections.pop(event.request_id, "-")
+        MONGO_SECONDS.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+        record_error("mongo")
+
+# --- HTTP middleware ---
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task hop) that records request latency
+    labelled by the matched route template, so bot ids don't blow up label cardinality.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.labels(route_template(scope), scope["method"], str(status["code"])).observe(
+                time.perf_counter() - started
+            )
+
+def render_metrics():
+    """Returns (body, content_type); aggregates all workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
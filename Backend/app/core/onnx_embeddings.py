@@ -0,0 +1,70 @@
+# app/core/onnx_embeddings.py
+
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class OnnxEmbeddings(Embeddings):
+    """
+    CPU-only bge-small embeddings served by onnxruntime from an int8-quantized export
+    (see scripts/export_onnx_embeddings.py). Needs only onnxruntime and tokenizers, no torch.
+
+    Mirrors the sentence-transformers pipeline for bge-small-en-v1.5:
+    CLS pooling followed by L2 normalization.
+    """
+    def __init__(self, model_dir: str, model_file: str = "model_quantized.onnx", batch_size: int = 32, max_length: int = 512, num_threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(model_dir / model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": input_ids,
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        last_hidden_state = self.session.run(None, feeds)[0]
+        cls = last_hidden_state[:, 0]
+        return cls / np.linalg.norm(cls, axis=1, keepdims=True)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embeds texts into a float32 (n, dim) array."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        # Batch texts of similar length together to keep padding (and wasted compute) low
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch_ids = order[start:start + self.batch_size]
+            for i, vector in zip(batch_ids, self._encode_batch([texts[i] for i in batch_ids])):
+                vectors[i] = vector
+        return np.vstack(vectors).astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
@@ -2,25 +2,35 @@
 
 import os
 import json
+import re
 from pathlib import Path
-import pdfplumber
-from docx import Document as DocxDocument
 import shutil
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
 
-from langchain_text_splitters.character import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
-from langchain_classic.chains.combine_documents import create_stuff_documents_chain
-from langchain_classic.chains import create_retrieval_chain
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.documents import Document
-from langchain_core.messages import HumanMessage, AIMessage
 from app.core.config import settings
+from app.core.index_store import GenerationStore, bot_index_lock
+from app.core.embeddings import get_embeddings
+from app.core.metrics import (
+    EXTRACTION_SECONDS, CHUNKING_SECONDS, FAISS_SEARCH_SECONDS, LLM_TTFT_SECONDS, LLM_TOTAL_SECONDS,
+    METADATA_SECONDS, record_cache, record_error
+)
+from app.core.tracing import span, record_span
+from app.core.executors import run_cpu
+from app.core.vector_storage import apply_vector_storage
 
-from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
+
+# NOTE: langchain, FAISS, pdfplumber and python-docx are imported inside the functions that
+# use them. Importing this module stays cheap, so the API can start (and serve auth/user
+# routes) before the ML stack is loaded. See scripts/profile_startup.py.
+
+def _faiss():
+    from langchain_community.vectorstores import FAISS
+    return FAISS
 
 # --- Pydantic model for metadata extraction ---
 class ResumeMetadata(BaseModel):
@@ -49,33 +59,121 @@ def json_to_text(json_data: dict) -> str:
             text += f"{key.replace('_', ' ').title()}: {value}\n"
     return text
 
+# --- LLM OUTPUT (Helper Function) ---
+def strip_think_tags(text: str) -> str:
+    """Removes <think> tags from the LLM response for a cleaner output."""
+    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+
 # --- FILE PROCESSING (Helper Function) ---
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".json")
+
 def extract_text_from_file(file_path: Path) -> str:
-    if file_path.suffix == ".pdf":
-        with pdfplumber.open(file_path) as pdf:
+    with EXTRACTION_SECONDS.labels(file_path.suffix.lstrip(".") or "none").time():
+        return _extract_text(file_path, file_path.suffix)
+
+def extract_text_from_upload(source, suffix: str) -> str:
+    """Same as extract_text_from_file for an open binary file object (e.g. an in-memory upload)."""
+    with EXTRACTION_SECONDS.labels(suffix.lstrip(".") or "none").time():
+        return _extract_text(source, suffix)
+
+def _extract_text(source, suffix: str) -> str:
+    """source is a path or a binary file object; suffix picks the parser."""
+    if suffix == ".pdf":
+        import pdfplumber
+        with pdfplumber.open(source) as pdf:
             return "".join(page.extract_text() for page in pdf.pages if page.extract_text())
-    elif file_path.suffix == ".docx":
-        doc = DocxDocument(file_path)
+    elif suffix == ".docx":
+        from docx import Document as DocxDocument
+        doc = DocxDocument(source)
         return "\n".join(para.text for para in doc.paragraphs)
-    elif file_path.suffix == ".txt":
-        return file_path.read_text(encoding="utf-8")
-    elif file_path.suffix == ".json":
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return json_to_text(data)
+    elif suffix == ".txt":
+        if isinstance(source, Path):
+            return source.read_text(encoding="utf-8")
+        return source.read().decode("utf-8")
+    elif suffix == ".json":
+        if isinstance(source, Path):
+            with open(source, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        else:
+            data = json.load(source)
+        return json_to_text(data)
     else:
-        raise ValueError(f"Unsupported file type: {file_path.suffix}")
+        raise ValueError(f"Unsupported file type: {suffix}")
+
+# --- Per-bot vector store cache ---
+# index path -> (index file mtime, vector store). LRU-bounded by BOT_INDEX_CACHE_SIZE so
+# repeat chats with the same bot skip the FAISS load; a re-upload changes the mtime and
+# invalidates the entry.
+_vector_store_cache = OrderedDict()
+_vector_store_cache_lock = threading.Lock()
+_vector_store_cache_stats = {"hits": 0, "misses": 0, "last_load_ms": 0.0}
+
+def load_bot_vector_store(index_path: Path, embeddings):
+    """Returns the bot's FAISS store from the cache, loading it from disk on a miss."""
+    index_file = index_path / "index.faiss"
+    if not index_file.exists():
+        return None
+    key = str(index_path)
+    mtime = index_file.stat().st_mtime
+
+    with _vector_store_cache_lock:
+        cached = _vector_store_cache.get(key)
+        if cached and cached[0] == mtime:
+            _vector_store_cache.move_to_end(key)
+            _vector_store_cache_stats["hits"] += 1
+            record_cache("bot_index", hit=True)
+            return cached[1]
+
+    record_cache("bot_index", hit=False)
+    started = time.perf_counter()
+    vector_store = _faiss().load_local(
+        str(index_path), 
+        embeddings, 
+        allow_dangerous_deserialization=True
+    )
+    cache_bot_vector_store(index_path, vector_store)
+    with _vector_store_cache_lock:
+        _vector_store_cache_stats["misses"] += 1
+        _vector_store_cache_stats["last_load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return vector_store
+
+def cache_bot_vector_store(index_path: Path, vector_store):
+    index_file = index_path / "index.faiss"
+    if not index_file.exists():
+        return
+    with _vector_store_cache_lock:
+        _vector_store_cache[str(index_path)] = (index_file.stat().st_mtime, vector_store)
+        _vector_store_cache.move_to_end(str(index_path))
+        while len(_vector_store_cache) > settings.BOT_INDEX_CACHE_SIZE:
+            _vector_store_cache.popitem(last=False)
+
+def evict_bot_vector_store(index_path: Path):
+    with _vector_store_cache_lock:
+        _vector_store_cache.pop(str(index_path), None)
+
+def bot_vector_store_cache_info() -> dict:
+    with _vector_store_cache_lock:
+        return {
+            "size": len(_vector_store_cache),
+            "capacity": settings.BOT_INDEX_CACHE_SIZE,
+            **_vector_store_cache_stats,
+        }
 
 class RAGPipeline:
     def __init__(self, bot_id: str, user_id: str, bot_name: str):
+        with span("pipeline.init", bot_id=bot_id):
+            self._init(bot_id, user_id, bot_name)
+
+    def _init(self, bot_id: str, user_id: str, bot_name: str):
         self.bot_id = bot_id
         self.user_id = user_id
         self.bot_name = bot_name
         self.data_path = Path("data") / user_id / bot_id
         self.index_path = self.data_path / "faiss_index"
         
-        self.embeddings = HuggingFaceEmbeddings(model_name="BAAI/bge-small-en-v1.5")
+        self.embeddings = get_embeddings()
         
+        from langchain_groq import ChatGroq
         self.llm = ChatGroq(
             model_name="meta-llama/llama-4-maverick-17b-128e-instruct", 
             temperature=0.7, 
@@ -88,19 +186,21 @@ class RAGPipeline:
     def _load_vector_store(self):
         if self.index_path.exists():
             try:
-                return FAISS.load_local(
-                    str(self.index_path), 
-                    self.embeddings, 
-                    allow_dangerous_deserialization=True
-                )
+                return load_bot_vector_store(self.index_path, self.embeddings)
             except Exception as e:
                 print(f"Error loading vector store: {e}")
+                record_error("load_vector_store")
                 return None
         return None
 
     def _create_retrieval_chain(self):
         if not self.vector_store:
             return None
+
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+        from langchain_core.runnables import RunnableLambda
+        from langchain_classic.chains.combine_documents import create_stuff_documents_chain
+        from langchain_classic.chains import create_retrieval_chain
         
         system_prompt = f"""
 You are "{self.bot_name}," a professional AI assistant. Your task is to answer questions about a person based on their resume provided in the context.
@@ -130,31 +230,67 @@ You are "{self.bot_name}," a professional AI assistant. Your task is to answer q
         )
         
         question_answer_chain = create_stuff_documents_chain(self.llm, prompt)
-        return create_retrieval_chain(self.vector_store.as_retriever(), question_answer_chain)
+        # A runnable retriever (rather than vector_store.as_retriever()) so the FAISS search is timed on its own.
+        # Callers that already retrieved (the voice agent, from a partial transcript) pass "prefetched_context".
+        retriever = RunnableLambda(lambda inputs: inputs.get("prefetched_context") or self.retrieve(inputs["input"]))
+        return create_retrieval_chain(retriever, question_answer_chain)
+
+    def retrieve(self, query: str, k: int = 4):
+        """Returns the k resume chunks closest to the query (same k as the default retriever)."""
+        with span("retrieval", bot_id=self.bot_id, k=k):
+            query_vector = self.embeddings.embed_query(query)
+            with FAISS_SEARCH_SECONDS.labels("bot").time():
+                return self.vector_store.similarity_search_by_vector(query_vector, k=k)
 
-    def process_file(self, file_path: str):
-        text_content = extract_text_from_file(Path(file_path))
-        documents = [Document(page_content=text_content)]
+    def process_file(self, file_path: Optional[str], text_content: str = None):
+        from langchain_core.documents import Document
+        from app.core.resume_chunker import chunk_resume
+
+        if text_content is None:
+            text_content = extract_text_from_file(Path(file_path))
         
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        splits = text_splitter.split_documents(documents)
+        # One chunk per role/project and per remaining section, without overlap (see resume_chunker)
+        with CHUNKING_SECONDS.time():
+            splits = [
+                Document(page_content=chunk.text, metadata=chunk.metadata)
+                for chunk in chunk_resume(text_content)
+            ]
+        if not splits:
+            raise ValueError("No text could be extracted from the resume")
 
         self.data_path.mkdir(parents=True, exist_ok=True)
-        self.vector_store = FAISS.from_documents(documents=splits, embedding=self.embeddings)
-        self.vector_store.save_local(str(self.index_path))
+        self.vector_store = _faiss().from_documents(documents=splits, embedding=self.embeddings)
+        apply_vector_storage(self.vector_store, settings.VECTOR_STORAGE)
+        # Serialized with scripts/migrate_vector_storage.py rewriting the same files
+        with bot_index_lock(self.index_path):
+            self.vector_store.save_local(str(self.index_path))
+        cache_bot_vector_store(self.index_path, self.vector_store)
         
         self.retrieval_chain = self._create_retrieval_chain()
         return True
         
-    async def extract_metadata(self, file_path: str) -> dict:
+    def extract_metadata_fast(self, text_content: str) -> dict:
+        """
+        Heuristic metadata (skills lexicon, date ranges, header name) in milliseconds, no LLM.
+        Blocking; run it on the cpu pool.
+        """
+        from app.core.resume_heuristics import extract_resume_metadata
+        with METADATA_SECONDS.labels("heuristic").time():
+            return extract_resume_metadata(text_content, fallback_name=self.bot_name)
+
+    @staticmethod
+    async def extract_metadata_llm(text_content: str) -> Optional[dict]:
         """
         Uses the Maverick model to extract structured metadata (skills, exp, summary) from the resume.
+        Returns None if the call or the JSON parsing fails.
         """
-        text_content = extract_text_from_file(Path(file_path))
-        
         # Truncate text to avoid token limits if resume is huge
         truncated_text = text_content[:12000] 
 
+        from langchain_core.output_parsers import JsonOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_groq import ChatGroq
+
         parser = JsonOutputParser(pydantic_object=ResumeMetadata)
 
         prompt = ChatPromptTemplate.from_messages([
@@ -171,96 +307,345 @@ You are "{self.bot_name}," a professional AI assistant. Your task is to answer q
         chain = prompt | extraction_llm | parser
 
         try:
-            metadata = await chain.ainvoke({
-                "resume_text": truncated_text,
-                "format_instructions": parser.get_format_instructions()
-            })
-            return metadata
+            with LLM_TOTAL_SECONDS.labels("metadata").time():
+                return await chain.ainvoke({
+                    "resume_text": truncated_text,
+                    "format_instructions": parser.get_format_instructions()
+                })
         except Exception as e:
             print(f"Error extracting metadata: {e}")
-            return {
-                "candidate_name": self.bot_name,
-                "summary": "Summary could not be extracted.",
-                "skills": [],
-                "experience_years": 0.0
-            }
-
-    async def get_response_stream(self, user_message: str, chat_history: list = []):
+            record_error("extract_metadata")
+            return None
+
+    async def extract_metadata(self, file_path: str) -> dict:
+        """
+        LLM metadata for a resume file, falling back to the heuristic extraction when the call fails.
+        """
+        text_content = await run_cpu(extract_text_from_file, Path(file_path))
+        metadata = await self.extract_metadata_llm(text_content)
+        if metadata is None:
+            metadata = await run_cpu(self.extract_metadata_fast, text_content)
+        return metadata
+
+    async def get_response_stream(self, user_message: str, chat_history: list = [], context: list = None,
+                                  stats: Optional[dict] = None):
+        """
+        Streams the answer tokens. When a stats dict is passed it is filled with the retrieved
+        chunk ids and the retrieval / first-token / LLM timings (ms) once the stream ends.
+        """
         if not self.retrieval_chain:
             yield "Error: The AI bot has not been properly initialized. Please upload a resume."
             return
 
+        started = time.perf_counter()
+        started_at = time.time()
+        # The chain emits the retrieved "context" before any "answer" chunk, so time-to-first-token
+        # is measured from the end of retrieval to isolate the LLM
+        context_at = None
+        first_token = True
+        retrieved = []
         async for chunk in self.retrieval_chain.astream({
             "input": user_message,
-            "chat_history": chat_history
+            "chat_history": chat_history,
+            "prefetched_context": context
         }):
+            if "context" in chunk and context_at is None:
+                context_at = time.perf_counter()
+                retrieved = chunk["context"]
             if "answer" in chunk:
+                if first_token:
+                    ttft = time.perf_counter() - (context_at or started)
+                    LLM_TTFT_SECONDS.labels("chat").observe(ttft)
+                    first_token = False
                 yield chunk["answer"]
+        llm_seconds = time.perf_counter() - (context_at or started)
+        LLM_TOTAL_SECONDS.labels("chat").observe(llm_seconds)
+        # Recorded after the fact: a span context can't stay open across the generator's yields
+        record_span(
+            "llm.stream", started_at, time.perf_counter() - started, bot_id=self.bot_id,
+            llm_ms=round(llm_seconds * 1000, 1), ttft_ms=None if first_token else round(ttft * 1000, 1)
+        )
+        if stats is not None:
+            stats.update({
+                "retrieval_ids": [getattr(doc, "id", None) for doc in retrieved],
+                "retrieval_sections": [doc.metadata.get("section") for doc in retrieved],
+                "retrieval_ms": round(((context_at or started) - started) * 1000, 1),
+                "ttft_ms": None if first_token else round(ttft * 1000, 1),
+                "llm_ms": round(llm_seconds * 1000, 1),
+                "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            })
 
 # --- GLOBAL RECRUITER INDEX (SEMANTIC SEARCH) ---
+def build_profile_text(bot: dict) -> str:
+    """The rich text representation of a candidate that the global index embeds."""
+    return (
+        f"Candidate Name: {bot.get('name')}\n"
+        f"Professional Summary: {bot.get('summary')}\n"
+        f"Top Skills: {', '.join(bot.get('skills') or [])}\n"
+        f"Experience: {bot.get('experience_years')} years."
+    )
+
 class GlobalRecruiterIndex:
     """
     Manages a global FAISS index that stores a summary profile for EVERY candidate
     to enable semantic search across the entire talent pool.
+
+    Removed or replaced profiles are not deleted from FAISS right away. Their docstore ids
+    are recorded as tombstones (skipped at search time) and the index is compacted once
+    GLOBAL_INDEX_COMPACTION_RATIO of its entries are tombstones.
+
+    The index is stored as immutable generations (see GenerationStore): writes are
+    serialized across workers with a lock file and published with an atomic rename,
+    while searches use a cached snapshot that hot-reloads when a new generation appears.
     """
     def __init__(self):
         self.folder_path = Path("data") / "global_index"
         self.index_name = "recruiters_index"
-        self.embeddings = HuggingFaceEmbeddings(model_name="BAAI/bge-small-en-v1.5")
+        self.embeddings = get_embeddings()
+        self.store = GenerationStore(
+            self.folder_path,
+            legacy_file=f"{self.index_name}.faiss",
+            keep_generations=settings.GLOBAL_INDEX_KEEP_GENERATIONS
+        )
+
+    def _load_generation(self, generation_dir: Path):
+        """Loads (vector_store, tombstones) from one generation folder."""
+        vector_store = _faiss().load_local(
+            str(generation_dir), 
+            self.embeddings, 
+            allow_dangerous_deserialization=True,
+            index_name=self.index_name
+        )
+        tombstones = set()
+        tombstones_path = generation_dir / f"{self.index_name}.tombstones.json"
+        if tombstones_path.exists():
+            try:
+                tombstones = set(json.loads(tombstones_path.read_text(encoding="utf-8")))
+            except Exception as e:
+                print(f"Error reading global index tombstones, ignoring them: {e}")
+        return vector_store, tombstones
+
+    def _load_for_write(self):
+        """Loads a private copy of the live generation. Call only while holding the writer lock."""
+        generation = self.store.current_generation()
+        if generation is None:
+            return None, set()
+        try:
+            return self._load_generation(self.store.generation_dir(generation))
+        except Exception as e:
+            print(f"Error loading global index, creating new one: {e}")
+            return None, set()
+
+    def _publish(self, vector_store, tombstones: set):
+        # Older generations are converted on their next write when VECTOR_STORAGE changes
+        apply_vector_storage(vector_store, settings.VECTOR_STORAGE)
+
+        def write(staging_dir: Path):
+            vector_store.save_local(str(staging_dir), index_name=self.index_name)
+            (staging_dir / f"{self.index_name}.tombstones.json").write_text(
+                json.dumps(sorted(tombstones)), encoding="utf-8"
+            )
+        return self.store.publish(write)
+
+    @staticmethod
+    def _docstore_ids_for(vector_store, bot_id: str) -> List[str]:
+        return [
+            doc_id for doc_id in vector_store.index_to_docstore_id.values()
+            if vector_store.docstore.search(doc_id).metadata.get("bot_id") == bot_id
+        ]
 
-    def _get_index_path(self):
-        return self.folder_path / f"{self.index_name}.faiss"
+    def _maybe_compact(self, vector_store, tombstones: set) -> set:
+        """
+        Physically removes tombstoned vectors once they make up enough of the index.
+        Returns the remaining tombstone set.
+        """
+        total = vector_store.index.ntotal
+        if not tombstones or total == 0:
+            return tombstones
+        if len(tombstones) / total < settings.GLOBAL_INDEX_COMPACTION_RATIO:
+            return tombstones
+        live_ids = set(vector_store.index_to_docstore_id.values())
+        stale = [doc_id for doc_id in tombstones if doc_id in live_ids]
+        if stale:
+            vector_store.delete(stale)
+            # Refit 8-bit ranges to the vectors that are left
+            apply_vector_storage(vector_store, settings.VECTOR_STORAGE, retrain=True)
+        print(f"Compacted global index: removed {len(stale)} of {total} entries")
+        return set()
 
     def add_candidate_profile(self, bot_id: str, profile_text: str):
         """
         Adds or updates a candidate's profile in the global search index.
+        Any previous profile for the same bot is tombstoned.
         """
-        self.folder_path.mkdir(parents=True, exist_ok=True)
-        
-        # Create document with metadata
-        doc = Document(page_content=profile_text, metadata={"bot_id": bot_id})
+        metadata = {"bot_id": bot_id}
+        # Embed before taking the lock so other writers only wait for the actual write
+        vector = self.embeddings.embed_documents([profile_text])[0]
         
-        if self._get_index_path().exists():
-            try:
-                # Load existing index
-                vector_store = FAISS.load_local(
-                    str(self.folder_path), 
-                    self.embeddings, 
-                    allow_dangerous_deserialization=True,
-                    index_name=self.index_name
-                )
-                vector_store.add_documents([doc])
-            except Exception as e:
-                print(f"Error loading global index, creating new one: {e}")
-                vector_store = FAISS.from_documents([doc], self.embeddings)
-        else:
-            # Create new index
-            vector_store = FAISS.from_documents([doc], self.embeddings)
-            
-        # Save back to disk
-        vector_store.save_local(str(self.folder_path), index_name=self.index_name)
+        with self.store.writer_lock():
+            vector_store, tombstones = self._load_for_write()
+
+            if vector_store is not None:
+                tombstones.update(self._docstore_ids_for(vector_store, bot_id))
+                vector_store.add_embeddings([(profile_text, vector)], metadatas=[metadata])
+                tombstones = self._maybe_compact(vector_store, tombstones)
+            else:
+                # Create new index
+                vector_store = _faiss().from_embeddings([(profile_text, vector)], self.embeddings, metadatas=[metadata])
+                
+            # Publish as a new generation
+            self._publish(vector_store, tombstones)
+        return True
+
+    def remove_candidate_profile(self, bot_id: str) -> bool:
+        """
+        Tombstones every profile stored for this bot. Returns False if nothing was found.
+        """
+        with self.store.writer_lock():
+            vector_store, tombstones = self._load_for_write()
+            if vector_store is None:
+                return False
+
+            doc_ids = set(self._docstore_ids_for(vector_store, bot_id)) - tombstones
+            if not doc_ids:
+                return False
+
+            tombstones.update(doc_ids)
+            tombstones = self._maybe_compact(vector_store, tombstones)
+            self._publish(vector_store, tombstones)
         return True
 
+    def publish_rebuilt(self, bot_ids: List[str], profile_texts: List[str], vectors,
+                        expected_generation: Optional[int], force: bool = False) -> Optional[int]:
+        """
+        Replaces the whole index with freshly embedded profiles (one per bot, no tombstones) as a
+        new generation. Unless force is set, nothing is published and None is returned when
+        another writer published after expected_generation, so the caller can catch up first.
+        """
+        vector_store = _faiss().from_embeddings(
+            list(zip(profile_texts, np.asarray(vectors, dtype=np.float32).tolist())),
+            self.embeddings,
+            metadatas=[{"bot_id": bot_id} for bot_id in bot_ids]
+        )
+        with self.store.writer_lock():
+            if not force and self.store.current_generation() != expected_generation:
+                return None
+            return self._publish(vector_store, set())
+
+    def warm(self) -> bool:
+        """Loads the live generation into the snapshot cache. Returns False if there is no index yet."""
+        _, snapshot = self.store.load_snapshot(self._load_generation)
+        return snapshot is not None
+
+    def match_requirements(self, requirements: List[str], weights: List[float], top_k: int = 20,
+                           min_score: Optional[float] = None) -> dict:
+        """
+        Scores every live candidate against each requirement with one matrix product over the
+        in-memory candidate matrix (see talent_matcher). Returns the top_k bot ids with their
+        combined and per-requirement scores, plus timings.
+        """
+        from app.core.talent_matcher import candidate_matrix_for
+
+        generation, snapshot = self.store.load_snapshot(self._load_generation)
+        if snapshot is None:
+            return {"bot_ids": [], "scores": [], "requirement_scores": [], "candidates_scored": 0, "timing_ms": {}}
+
+        started = time.perf_counter()
+        matrix = candidate_matrix_for(str(self.folder_path.resolve()), generation, snapshot)
+        matrix_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        requirement_vectors = self.embeddings.embed_documents(requirements)
+        embed_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with FAISS_SEARCH_SECONDS.labels("jd_match").time():
+            bot_ids, scores, requirement_scores = matrix.rank(requirement_vectors, weights, top_k, min_score)
+        score_ms = (time.perf_counter() - started) * 1000
+
+        return {
+            "bot_ids": bot_ids,
+            "scores": scores.tolist(),
+            "requirement_scores": requirement_scores.tolist(),
+            "candidates_scored": len(matrix),
+            "timing_ms": {
+                "candidate_matrix": round(matrix_ms, 2),
+                "embedding": round(embed_ms, 2),
+                "scoring": round(score_ms, 2),
+            },
+        }
+
+    @staticmethod
+    def _live_bot_ids(vector_store, tombstones: set, indices, k: int) -> List[str]:
+        """First k bot ids of one FAISS result row, skipping tombstoned entries."""
+        bot_ids = []
+        for i in indices:
+            if i == -1:
+                continue
+            doc_id = vector_store.index_to_docstore_id[i]
+            if doc_id in tombstones:
+                continue
+            bot_ids.append(vector_store.docstore.search(doc_id).metadata["bot_id"])
+            if len(bot_ids) == k:
+                break
+        return bot_ids
+
     def semantic_search(self, query: str, k: int = 10) -> List[str]:
         """
         Performs a semantic search and returns a list of matching bot_ids.
         """
-        if not self._get_index_path().exists():
-            return []
-            
         try:
-            vector_store = FAISS.load_local(
-                str(self.folder_path), 
-                self.embeddings, 
-                allow_dangerous_deserialization=True,
-                index_name=self.index_name
-            )
+            _, snapshot = self.store.load_snapshot(self._load_generation)
+            if snapshot is None:
+                return []
+            vector_store, tombstones = snapshot
             
-            # Search for the most similar profiles
-            results = vector_store.similarity_search(query, k=k)
+            # Over-fetch by the number of tombstones so k live results survive filtering
+            fetch_k = min(k + len(tombstones), vector_store.index.ntotal)
+            query_vector = np.array([self.embeddings.embed_query(query)], dtype=np.float32)
+            with FAISS_SEARCH_SECONDS.labels("global").time():
+                _, indices = vector_store.index.search(query_vector, fetch_k)
             
             # Return only the bot_ids
-            return [doc.metadata["bot_id"] for doc in results]
+            return self._live_bot_ids(vector_store, tombstones, indices[0], k)
         except Exception as e:
             print(f"Error searching global index: {e}")
-            return []
\ No newline at end of file
+            record_error("global_search")
+            return []
+
+    def semantic_search_batch(self, queries: List[str], k: int = 10, estimate_sequential: bool = True) -> dict:
+        """
+        Runs many searches at once: one embedding pass over all queries and one multi-query
+        FAISS search. Returns {"results": [bot_ids per query], "timing_ms": {...}}.
+
+        With estimate_sequential, one query is also embedded and searched on its own to
+        estimate what the same work costs as separate /search calls.
+        """
+        timing = {}
+        _, snapshot = self.store.load_snapshot(self._load_generation)
+        # An empty index (e.g. compacted after every profile was removed) can't be searched: FAISS asserts k > 0
+        if snapshot is None or snapshot[0].index.ntotal == 0:
+            return {"results": [[] for _ in queries], "timing_ms": timing}
+        vector_store, tombstones = snapshot
+        fetch_k = min(k + len(tombstones), vector_store.index.ntotal)
+
+        started = time.perf_counter()
+        query_vectors = np.asarray(self.embeddings.embed_documents(queries), dtype=np.float32)
+        timing["embedding"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with FAISS_SEARCH_SECONDS.labels("global_batch").time():
+            _, indices = vector_store.index.search(query_vectors, fetch_k)
+        timing["search"] = (time.perf_counter() - started) * 1000
+
+        results = [self._live_bot_ids(vector_store, tombstones, row, k) for row in indices]
+
+        if estimate_sequential:
+            started = time.perf_counter()
+            single = np.array([self.embeddings.embed_query(queries[0])], dtype=np.float32)
+            timing["single_embedding"] = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            vector_store.index.search(single, fetch_k)
+            timing["single_search"] = (time.perf_counter() - started) * 1000
+
+        return {"results": results, "timing_ms": {key: round(value, 2) for key, value in timing.items()}}
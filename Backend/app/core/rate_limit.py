@@ -0,0 +1,280 @@
+# app/core/rate_limit.py
+
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import RATE_LIMITED
+
+# Sent on every limited response (and exposed through CORS)
+RATE_LIMIT_HEADERS = ["RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After"]
+
+@dataclass(frozen=True)
+class Policy:
+    """Token bucket (per_minute refill, burst capacity) plus a cap on concurrent streams (0 = none)."""
+    per_minute: float
+    burst: int
+    streams: int
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+def policy_for(name: str) -> Policy:
+    """Policy from the RATE_LIMIT_<NAME>_* settings: "candidate", "recruiter", "api_key" or "bot"."""
+    prefix = f"RATE_LIMIT_{name.upper()}"
+    return Policy(
+        per_minute=getattr(settings, f"{prefix}_PER_MINUTE"),
+        burst=getattr(settings, f"{prefix}_BURST"),
+        streams=getattr(settings, f"{prefix}_STREAMS"),
+    )
+
+@dataclass
+class BucketState:
+    allowed: bool
+    remaining: int
+    retry_after: float   # seconds until the request would have been allowed
+    reset_after: float   # seconds until the bucket is full again
+
+def _bucket_state(allowed: bool, tokens: float, policy: Policy, cost: float) -> BucketState:
+    return BucketState(
+        allowed=allowed,
+        remaining=max(0, int(tokens)),
+        retry_after=0.0 if allowed else (cost - tokens) / policy.rate,
+        reset_after=(policy.burst - tokens) / policy.rate,
+    )
+
+# --- Backends ---
+class InMemoryRateLimitBackend:
+    """
+    Buckets and stream counts in this worker's memory, so limits apply per worker process.
+    Every method runs on the event loop without awaiting, which makes each one atomic.
+    """
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets = {}   # key -> (tokens, updated, full_at)
+        self._streams = {}   # key -> active streams
+
+    async def take(self, key: str, policy: Policy, cost: float = 1.0) -> BucketState:
+        now = time.monotonic()
+        tokens, updated, _ = self._buckets.get(key, (policy.burst, now, now))
+        tokens = min(policy.burst, tokens + (now - updated) * policy.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now, now + (policy.burst - tokens) / policy.rate)
+        if len(self._buckets) > self.max_keys:
+            self._prune(now)
+        return _bucket_state(allowed, tokens, policy, cost)
+
+    async def refund(self, key: str, policy: Policy, cost: float):
+        tokens, updated, _ = self._buckets.get(key, (policy.burst, time.monotonic(), 0.0))
+        tokens = min(policy.burst, tokens + cost)
+        self._buckets[key] = (tokens, updated, updated + (policy.burst - tokens) / policy.rate)
+
+    def _prune(self, now: float):
+        # A bucket that has refilled completely is the same as no bucket at all
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        active = self._streams.get(key, 0)
+        if active >= limit:
+            return False
+        self._streams[key] = active + 1
+        return True
+
+    async def release(self, key: str):
+        active = self._streams.get(key, 0) - 1
+        if active > 0:
+            self._streams[key] = active
+        else:
+            self._streams.pop(key, None)
+
+    def info(self) -> dict:
+        return {"buckets": len(self._buckets), "active_streams": sum(self._streams.values())}
+
+class MongoRateLimitBackend:
+    """
+    Shared across workers and hosts through one MongoDB collection. A bucket is a document
+    refilled and debited in a single atomic pipeline update; stream counts use a conditional
+    $inc that fails with a duplicate key once the limit is reached. A TTL index removes
+    documents once a bucket would be full again (or a stream key has been idle for
+    RATE_LIMIT_STREAM_LEASE_SECONDS, which also clears counts left by a crashed worker).
+    """
+    name = "mongo"
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._indexed = False
+
+    async def _ensure_index(self):
+        if not self._indexed:
+            await self.collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+
+    async def take(self, key: str, policy: Policy, cost: float = 1.0) -> BucketState:
+        from pymongo import ReturnDocument
+
+        await self._ensure_index()
+        now = time.time()
+        elapsed = {"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated", now]}]}]}
+        refilled = {"$min": [
+            policy.burst, {"$add": [{"$ifNull": ["$tokens", policy.burst]}, {"$multiply": [elapsed, policy.rate]}]}
+        ]}
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=policy.burst / policy.rate + 60)
+        doc = await self.collection.find_one_and_update(
+            {"_id": f"bucket:{key}"},
+            [
+                {"$set": {"tokens": refilled, "updated": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                    "expires_at": expires_at,
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return _bucket_state(doc["allowed"], doc["tokens"], policy, cost)
+
+    async def refund(self, key: str, policy: Policy, cost: float):
+        await self.collection.update_one(
+            {"_id": f"bucket:{key}"},
+            [{"$set": {"tokens": {"$min": [policy.burst, {"$add": ["$tokens", cost]}]}}}],
+        )
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        from pymongo.errors import DuplicateKeyError
+
+        await self._ensure_index()
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.RATE_LIMIT_STREAM_LEASE_SECONDS)
+        try:
+            await self.collection.update_one(
+                {"_id": f"streams:{key}", "active": {"$lt": limit}},
+                {"$inc": {"active": 1}, "$set": {"expires_at": expires_at}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The document exists but is at the limit, so the upsert tried to insert a second one
+            return False
+        return True
+
+    async def release(self, key: str):
+        await self.collection.update_one({"_id": f"streams:{key}", "active": {"$gt": 0}}, {"$inc": {"active": -1}})
+
+    def info(self) -> dict:
+        return {"collection": self.collection.name}
+
+# --- Limiter ---
+class RateLimitExceeded(Exception):
+    def __init__(self, kind: str, detail: str, headers: dict):
+        super().__init__(detail)
+        self.kind = kind
+        self.detail = detail
+        self.headers = headers
+
+class Admission:
+    """An admitted request: the headers to send and the stream slots it holds until released."""
+    def __init__(self, limiter: "RateLimiter", headers: dict, slots: List[str]):
+        self.limiter = limiter
+        self.headers = headers
+        self._slots = slots
+
+    def apply(self, response):
+        response.headers.update(self.headers)
+
+    async def release(self):
+        # Idempotent, so error paths can release without tracking whether a stream started
+        slots, self._slots = self._slots, []
+        for key in slots:
+            await self.limiter.backend.release(key)
+
+    async def guard(self, stream):
+        """Wraps a response stream so its slots are released when the stream ends or is cancelled."""
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await self.release()
+
+class RateLimiter:
+    """
+    Applies every principal's policy to a request. principals are (kind, id, policy name)
+    tuples, e.g. ("user", <user id>, "recruiter"), ("api_key", <key id>, "api_key"),
+    ("bot", <bot id>, "bot"), optionally with a fourth item charging that principal its own cost
+    instead of the request's. All buckets are debited; the request is refused if any of them
+    is empty, and then the buckets already debited get their tokens back, so a refused
+    request costs nothing. Stream requests also take a concurrency slot per principal.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def admit(self, principals: List[tuple], cost: float = 1.0,
+                    stream: bool = False) -> Admission:
+        if not settings.RATE_LIMIT_ENABLED:
+            return Admission(self, {}, [])
+
+        tightest: Optional[Tuple[BucketState, Policy]] = None
+        debited = []   # (key, policy, cost) to refund if a later check refuses the request
+        for kind, principal_id, policy_name, *own_cost in principals:
+            policy = policy_for(policy_name)
+            key = f"{kind}:{principal_id}"
+            # A request costing more than the burst would never fit; it needs a full bucket instead
+            charged = min(own_cost[0] if own_cost else cost, policy.burst)
+            state = await self.backend.take(key, policy, charged)
+            if not state.allowed:
+                await self._refund(debited)
+                RATE_LIMITED.labels(kind, "rate").inc()
+                headers = _headers(state, policy)
+                headers["Retry-After"] = str(max(1, math.ceil(state.retry_after)))
+                raise RateLimitExceeded(kind, f"Rate limit exceeded for this {kind.replace('_', ' ')}", headers)
+            debited.append((key, policy, charged))
+            if tightest is None or state.remaining < tightest[0].remaining:
+                tightest = (state, policy)
+        headers = _headers(*tightest) if tightest else {}
+
+        slots = []
+        if stream:
+            for kind, principal_id, policy_name, *_ in principals:
+                policy = policy_for(policy_name)
+                if not policy.streams:
+                    continue
+                key = f"{kind}:{principal_id}"
+                if not await self.backend.acquire(key, policy.streams):
+                    await Admission(self, {}, slots).release()
+                    await self._refund(debited)
+                    RATE_LIMITED.labels(kind, "concurrency").inc()
+                    raise RateLimitExceeded(
+                        kind, f"Too many concurrent streams for this {kind.replace('_', ' ')}",
+                        {**headers, "Retry-After": "1"},
+                    )
+                slots.append(key)
+        return Admission(self, headers, slots)
+
+    async def _refund(self, debited: list):
+        for key, policy, charged in debited:
+            await self.backend.refund(key, policy, charged)
+
+    def info(self) -> dict:
+        return {"enabled": settings.RATE_LIMIT_ENABLED, "backend": self.backend.name, **self.backend.info()}
+
+def _headers(state: BucketState, policy: Policy) -> dict:
+    return {
+        "RateLimit-Limit": str(policy.burst),
+        "RateLimit-Remaining": str(state.remaining),
+        "RateLimit-Reset": str(math.ceil(state.reset_after)),
+    }
+
+def _create_backend():
+    if settings.RATE_LIMIT_BACKEND == "mongo":
+        from app.db.session import database
+        return MongoRateLimitBackend(database["rate_limits"])
+    return InMemoryRateLimitBackend()
+
+rate_limiter = RateLimiter(_create_backend())
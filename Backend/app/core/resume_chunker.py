@@ -0,0 +1,130 @@
+# app/core/resume_chunker.py
+#
+# Structure-aware resume chunking for the per-bot indexes. Sections come from
+# resume_heuristics.split_sections; Experience and Projects are cut into one chunk per role
+# or project, the other sections stay whole (short ones share a chunk). Chunks never overlap:
+# an entry too long for one chunk continues in a new chunk that repeats only its title line.
+
+import re
+from dataclasses import dataclass
+from typing import List
+
+from app.core.resume_heuristics import DATE_RANGE, split_sections
+
+MAX_CHUNK_CHARS = 1200
+# Chunks shorter than this absorb the next short section; roles/projects only merge when tiny
+MIN_CHUNK_CHARS = 300
+MIN_ENTRY_CHARS = 120
+
+ENTRY_SECTIONS = {"experience", "projects"}
+SECTION_TITLES = {
+    "header": "Profile",
+    "summary": "Summary",
+    "experience": "Experience",
+    "education": "Education",
+    "skills": "Skills",
+    "projects": "Projects",
+    "certifications": "Certifications",
+    "achievements": "Achievements",
+    "publications": "Publications",
+}
+BULLET = re.compile(r"^\s*(?:[-*•▪◦●○■□➢➤►]|\d+[.)])\s+")
+
+@dataclass
+class ResumeChunk:
+    section: str     # "education+skills" when short sections share a chunk
+    title: str       # first line of the role/project ("" for whole sections)
+    text: str        # what gets embedded and shown to the LLM, prefixed with the section name
+
+    @property
+    def metadata(self) -> dict:
+        return {"section": self.section, "title": self.title}
+
+def split_entries(body: str) -> List[List[str]]:
+    """
+    Lines of an Experience/Projects section grouped into entries. An entry is its title lines
+    followed by bullets; a title line after bullets, or a second date range, starts the next
+    entry. Sections without bullets are split on blank lines instead.
+    """
+    lines = body.splitlines()
+    if not any(BULLET.match(line) for line in lines):
+        return [
+            [" ".join(l.split()) for l in p.splitlines() if l.strip()]
+            for p in re.split(r"\n\s*\n", body) if p.strip()
+        ]
+
+    entries, current = [], []
+    seen_bullet = seen_dates = False
+    for line in lines:
+        line = " ".join(line.split())
+        if not line:
+            continue
+        is_bullet = bool(BULLET.match(line))
+        has_dates = bool(DATE_RANGE.search(line))
+        if current and not is_bullet and _continues(current[-1], line, has_dates):
+            # A bullet wrapped onto the next line by the PDF extraction
+            current[-1] = f"{current[-1]} {line}"
+            continue
+        if current and not is_bullet and (seen_bullet or (has_dates and seen_dates)):
+            entries.append(current)
+            current, seen_bullet, seen_dates = [], False, False
+        current.append(line)
+        seen_bullet = seen_bullet or is_bullet
+        seen_dates = seen_dates or (has_dates and not is_bullet)
+    if current:
+        entries.append(current)
+    return entries
+
+def _continues(previous: str, line: str, has_dates: bool) -> bool:
+    if not BULLET.match(previous) or has_dates:
+        return False
+    return line[0].islower() or (not previous.endswith((".", "!", "?", ":")) and len(line) > 50)
+
+def _pack(lines: List[str], limit: int, repeat_title: bool) -> List[List[str]]:
+    """Packs lines into groups of at most limit chars; continuations may repeat the first line."""
+    groups, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) + 1 > limit:
+            groups.append(current)
+            current = [lines[0]] if repeat_title else []
+            size = sum(len(l) + 1 for l in current)
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        groups.append(current)
+    return groups
+
+def _mergeable(previous: "ResumeChunk", section: str, text: str, min_chars: int, max_chars: int) -> bool:
+    if len(previous.text) >= min_chars or len(previous.text) + len(text) + 1 > max_chars:
+        return False
+    if previous.section == section:
+        return True
+    # Short whole sections (Education, Skills, Certifications...) may share a chunk; roles and projects don't
+    return section not in ENTRY_SECTIONS and not ENTRY_SECTIONS & set(previous.section.split("+"))
+
+def chunk_resume(text: str, max_chars: int = MAX_CHUNK_CHARS, min_chars: int = MIN_CHUNK_CHARS,
+                 min_entry_chars: int = MIN_ENTRY_CHARS) -> List[ResumeChunk]:
+    """Non-overlapping, section-labelled chunks of a resume, in document order."""
+    chunks = []
+    for section, body in split_sections(text):
+        label = SECTION_TITLES.get(section, section.title())
+        if section in ENTRY_SECTIONS:
+            groups = [(entry[0], g) for entry in split_entries(body) for g in _pack(entry, max_chars, True)]
+        else:
+            groups = [("", g) for g in _pack([" ".join(l.split()) for l in body.splitlines() if l.strip()], max_chars, False)]
+
+        for title, lines in groups:
+            piece = "\n".join(lines)
+            # Small pieces (a one-line project, a short Skills section) share a chunk with a neighbour
+            threshold = min_entry_chars if section in ENTRY_SECTIONS else min_chars
+            if chunks and _mergeable(chunks[-1], section, piece, threshold, max_chars):
+                previous = chunks[-1]
+                if previous.section == section:
+                    previous.text += "\n" + piece
+                else:
+                    previous.section += "+" + section
+                    previous.text += f"\n{label}:\n" + piece
+                previous.title = previous.title or title
+            else:
+                chunks.append(ResumeChunk(section, title, f"{label}:\n" + piece))
+    return chunks
@@ -0,0 +1,362 @@
+# app/core/resume_heuristics.py
+#
+# Local, LLM-free resume parsing: section detection, a skills lexicon matched with
+# Aho-Corasick, date-range arithmetic for experience_years and a header heuristic for the
+# candidate name. Fills ResumeMetadata in milliseconds; the LLM extraction becomes an
+# optional refinement (see RAGPipeline.extract_metadata_llm).
+
+import re
+from collections import Counter, deque
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+# --- Skills lexicon: canonical name -> lowercase aliases ---
+# Bare ambiguous words ("go", "r", "c", "swift" as a verb) are left out on purpose.
+SKILLS_LEXICON = {
+    "Python": ["python", "python3"],
+    "Java": ["java"],
+    "JavaScript": ["javascript", "ecmascript", "es6"],
+    "TypeScript": ["typescript"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swiftui", "swift programming", "ios swift"],
+    "PHP": ["php"],
+    "Ruby": ["ruby"],
+    "Scala": ["scala"],
+    "R": ["r programming", "rstudio"],
+    "MATLAB": ["matlab"],
+    "Bash": ["bash", "shell scripting"],
+    "SQL": ["sql"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "React": ["react", "react.js", "reactjs"],
+    "Next.js": ["next.js", "nextjs"],
+    "Angular": ["angular", "angularjs"],
+    "Vue.js": ["vue", "vue.js", "vuejs"],
+    "Redux": ["redux"],
+    "Tailwind CSS": ["tailwind", "tailwind css", "tailwindcss"],
+    "Bootstrap": ["bootstrap"],
+    "Node.js": ["node.js", "nodejs", "node js"],
+    "Express": ["express.js", "expressjs"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring Boot": ["spring boot", "springboot"],
+    "Spring": ["spring framework"],
+    "Ruby on Rails": ["ruby on rails", "rails"],
+    ".NET": [".net", "asp.net", "dotnet"],
+    "GraphQL": ["graphql"],
+    "REST APIs": ["rest api", "rest apis", "restful", "restful apis"],
+    "gRPC": ["grpc"],
+    "Microservices": ["microservices", "microservice"],
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo db"],
+    "Redis": ["redis"],
+    "SQLite": ["sqlite"],
+    "Oracle": ["oracle db", "oracle database"],
+    "Cassandra": ["cassandra"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "DynamoDB": ["dynamodb"],
+    "Firebase": ["firebase"],
+    "Kafka": ["kafka", "apache kafka"],
+    "RabbitMQ": ["rabbitmq"],
+    "Spark": ["spark", "apache spark", "pyspark"],
+    "Hadoop": ["hadoop"],
+    "Airflow": ["airflow", "apache airflow"],
+    "dbt": ["dbt"],
+    "Snowflake": ["snowflake"],
+    "BigQuery": ["bigquery"],
+    "AWS": ["aws", "amazon web services"],
+    "Azure": ["azure", "microsoft azure"],
+    "GCP": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "Jenkins": ["jenkins"],
+    "GitHub Actions": ["github actions"],
+    "CI/CD": ["ci/cd", "continuous integration"],
+    "Git": ["git"],
+    "Linux": ["linux", "unix"],
+    "Nginx": ["nginx"],
+    "Prometheus": ["prometheus"],
+    "Grafana": ["grafana"],
+    "Machine Learning": ["machine learning", "ml models"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "Computer Vision": ["computer vision", "opencv"],
+    "LLMs": ["llm", "llms", "large language models"],
+    "RAG": ["rag", "retrieval-augmented generation", "retrieval augmented generation"],
+    "LangChain": ["langchain"],
+    "PyTorch": ["pytorch"],
+    "TensorFlow": ["tensorflow"],
+    "Keras": ["keras"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "Hugging Face": ["hugging face", "huggingface", "transformers"],
+    "ONNX": ["onnx"],
+    "FAISS": ["faiss"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Matplotlib": ["matplotlib"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["excel", "ms excel"],
+    "Data Analysis": ["data analysis", "data analytics"],
+    "Statistics": ["statistics", "statistical analysis"],
+    "Android": ["android"],
+    "iOS": ["ios"],
+    "Flutter": ["flutter"],
+    "React Native": ["react native"],
+    "Unity": ["unity3d", "unity engine"],
+    "WebRTC": ["webrtc"],
+    "Figma": ["figma"],
+    "Jira": ["jira"],
+    "Agile": ["agile", "scrum"],
+    "System Design": ["system design", "distributed systems"],
+    "Data Structures & Algorithms": ["data structures", "algorithms", "dsa"],
+    "OOP": ["oop", "object oriented programming", "object-oriented programming"],
+    "Unit Testing": ["unit testing", "pytest", "junit", "jest"],
+    "Selenium": ["selenium"],
+    "Cybersecurity": ["cybersecurity", "cyber security", "penetration testing"],
+    "Blockchain": ["blockchain", "solidity", "web3"],
+}
+
+# --- Section headers ---
+SECTION_HEADERS = {
+    "summary": ["summary", "professional summary", "profile", "about me", "objective", "career objective"],
+    "experience": [
+        "experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "internships", "internship", "experience & internships",
+    ],
+    "education": ["education", "academic background", "academics", "education & qualifications"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "technologies", "tech stack", "tools"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses & certifications", "courses"],
+    "achievements": ["achievements", "awards", "honors", "accomplishments"],
+    "publications": ["publications", "research"],
+}
+_HEADER_LOOKUP = {alias: section for section, aliases in SECTION_HEADERS.items() for alias in aliases}
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text finds every lexicon alias."""
+    def __init__(self, patterns: Iterable[str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        node = 0
+        for ch in pattern:
+            if ch not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][ch] = len(self._goto) - 1
+            node = self._goto[node][ch]
+        self._out[node].append(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text: str):
+        """Yields (start, end, pattern) for every occurrence, overlapping included."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern in self._out[node]:
+                yield i - len(pattern) + 1, i + 1, pattern
+
+_ALIAS_TO_SKILL = {alias: skill for skill, aliases in SKILLS_LEXICON.items() for alias in aliases}
+_SKILL_MATCHER = AhoCorasick(_ALIAS_TO_SKILL)
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not (text[index].isalnum() or text[index] in "+#")
+
+# --- Sections ---
+def detect_header(line: str) -> Optional[str]:
+    """Section name if the line is a resume section header ("EXPERIENCE", "Technical Skills:")."""
+    cleaned = re.sub(r"[^a-z& ]", "", line.strip().lower()).strip()
+    if not cleaned or len(cleaned) > 40:
+        return None
+    return _HEADER_LOOKUP.get(cleaned)
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Splits resume text into (section, body) pairs in order; text before the first header is "header"."""
+    sections = []
+    current, lines = "header", []
+    for line in text.splitlines():
+        section = detect_header(line)
+        if section:
+            if any(l.strip() for l in lines):
+                sections.append((current, "\n".join(lines).strip()))
+            current, lines = section, []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((current, "\n".join(lines).strip()))
+    return sections
+
+# --- Skills ---
+def extract_skills(text: str, sections: List[Tuple[str, str]] = None, limit: int = 10) -> List[str]:
+    """
+    Lexicon skills ranked by mentions; a mention in a Skills section counts double.
+    Ties keep the order of first appearance.
+    """
+    sections = sections if sections is not None else split_sections(text)
+    counts = Counter()
+    first_seen = {}
+    position = 0
+    for section, body in sections:
+        lowered = body.lower()
+        weight = 2 if section == "skills" else 1
+        matches = sorted(
+            (start, -end, alias) for start, end, alias in _SKILL_MATCHER.iter_matches(lowered)
+            if _is_boundary(lowered, start - 1) and _is_boundary(lowered, end)
+        )
+        # Longest match wins where aliases overlap ("react.js" over "react")
+        covered = 0
+        for start, neg_end, alias in matches:
+            if start < covered:
+                continue
+            covered = -neg_end
+            skill = _ALIAS_TO_SKILL[alias]
+            counts[skill] += weight
+            first_seen.setdefault(skill, position + start)
+        position += len(body)
+    ranked = sorted(counts, key=lambda skill: (-counts[skill], first_seen[skill]))
+    return ranked[:limit]
+
+# --- Experience ---
+MONTHS = {m: i + 1 for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+)}
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s*,?\s*'?\d{{2,4}}|\d{{1,2}}\s*[/.-]\s*\d{{4}}|\d{{4}})"
+_OPEN_END = r"(?:present|current|currently|now|today|date|ongoing)"
+DATE_RANGE = re.compile(rf"({_DATE})\s*(?:-|–|—|to|until|till)\s*({_DATE}|{_OPEN_END})", re.IGNORECASE)
+
+def _parse_date(value: str, today: date) -> Optional[Tuple[int, int]]:
+    value = value.strip().lower()
+    if re.fullmatch(_OPEN_END, value):
+        return today.year, today.month
+    match = re.fullmatch(rf"({_MONTH})\s*,?\s*'?(\d{{2,4}})", value)
+    if match:
+        year = int(match.group(2))
+        year = year + 2000 if year < 100 else year
+        return year, MONTHS[match.group(1)[:3]]
+    match = re.fullmatch(r"(\d{1,2})\s*[/.-]\s*(\d{4})", value)
+    if match and 1 <= int(match.group(1)) <= 12:
+        return int(match.group(2)), int(match.group(1))
+    if re.fullmatch(r"\d{4}", value):
+        return int(value), 1
+    return None
+
+def date_ranges(text: str, today: date = None) -> List[Tuple[int, int]]:
+    """(start, end) pairs as month indexes (year * 12 + month) for every date range in the text."""
+    today = today or date.today()
+    now = today.year * 12 + today.month
+    ranges = []
+    for match in DATE_RANGE.finditer(text):
+        start, end = _parse_date(match.group(1), today), _parse_date(match.group(2), today)
+        if not start or not end or not (1960 <= start[0] <= today.year):
+            continue
+        start_index, end_index = start[0] * 12 + start[1], min(end[0] * 12 + end[1], now)
+        if end_index > start_index:
+            ranges.append((start_index, end_index))
+    return ranges
+
+def experience_years(text: str, sections: List[Tuple[str, str]] = None, today: date = None) -> float:
+    """
+    Years covered by the date ranges of work entries, with overlapping roles merged.
+    Uses the Experience sections when there are any; otherwise every range outside
+    Education/Projects.
+    """
+    sections = sections if sections is not None else split_sections(text)
+    experience = [body for section, body in sections if section == "experience"]
+    if not experience or not any(date_ranges(body, today) for body in experience):
+        experience = [body for section, body in sections if section not in ("education", "projects")]
+    ranges = sorted(r for body in experience for r in date_ranges(body, today))
+
+    months, current_start, current_end = 0, None, None
+    for start, end in ranges:
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        months += current_end - current_start
+    return round(min(months / 12, 50.0), 1)
+
+# --- Name ---
+_NAME_STOPWORDS = {
+    "resume", "curriculum", "vitae", "cv", "engineer", "developer", "software", "student", "intern",
+    "manager", "analyst", "designer", "scientist", "consultant", "profile", "contact",
+}
+_NAME_TOKEN = re.compile(r"^[A-Za-z][A-Za-z.'\-]*$")
+
+def extract_name(text: str) -> Optional[str]:
+    """First header line that looks like a 2-4 word personal name."""
+    for line in text.splitlines()[:8]:
+        line = line.strip()
+        if not line or "@" in line or "http" in line.lower() or detect_header(line):
+            continue
+        candidate = re.split(r"\s*[|,•–—]\s*|\s+-\s+", line)[0].strip()
+        tokens = candidate.split()
+        if not 2 <= len(tokens) <= 4 or any(not _NAME_TOKEN.match(t) for t in tokens):
+            continue
+        if any(t.lower().strip(".") in _NAME_STOPWORDS for t in tokens):
+            continue
+        if not all(t[0].isupper() for t in tokens):
+            continue
+        return " ".join(t.capitalize() if t.isupper() and len(t) > 2 else t for t in tokens)
+    return None
+
+# --- Summary ---
+def extract_summary(sections: List[Tuple[str, str]], name: str, skills: List[str], years: float) -> str:
+    """The first two sentences of a Summary/Profile section, or a composed one-liner."""
+    for section, body in sections:
+        if section == "summary":
+            sentences = re.split(r"(?<=[.!?])\s+", " ".join(body.split()))
+            summary = " ".join(sentences[:2]).strip()
+            if summary:
+                return summary[:400]
+    parts = [f"{name} is a professional"]
+    if years:
+        parts.append(f"with about {years:g} years of experience")
+    summary = " ".join(parts) + "."
+    if skills:
+        summary += f" Key skills include {', '.join(skills[:3])}."
+    return summary
+
+def extract_resume_metadata(text: str, fallback_name: str) -> dict:
+    """All ResumeMetadata fields from the resume text, without an LLM call."""
+    sections = split_sections(text)
+    name = extract_name(text) or fallback_name
+    skills = extract_skills(text, sections)
+    years = experience_years(text, sections)
+    return {
+        "candidate_name": name,
+        "summary": extract_summary(sections, name, skills, years),
+        "skills": skills,
+        "experience_years": years,
+    }
@@ -0,0 +1,134 @@
+# app/core/speech.py
+#
+# Text-to-speech helpers shared by the voice agent and scripts/benchmark_voice_latency.py.
+# No RTC SDK imports here; edge-tts is imported on first synthesis.
+
+import asyncio
+import re
+import time
+
+from app.core.config import settings
+from app.core.executors import run_io
+from app.core.metrics import TTS_SECONDS, record_error
+from app.core.tts_cache import tts_cache, tts_cache_key, normalize_tts_text
+
+# --- TTS Configuration ---
+TTS_VOICE = "en-US-JennyNeural"
+# edge-tts streams 24kHz mono MP3 at 48 kbit/s; used to pace simulated playback
+TTS_BYTES_PER_SECOND = 48_000 / 8
+
+# --- Sentence Streaming ---
+# Fragments shorter than this are held back and merged with the next sentence, so
+# abbreviations and list markers don't turn into separate TTS requests
+MIN_SENTENCE_CHARS = 20
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+class SentenceSplitter:
+    """
+    Turns a stream of LLM tokens into speakable sentences as soon as each one is complete.
+    <think>...</think> blocks are dropped while streaming, even when the tags span tokens.
+    """
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._raw = ""       # may end in a partial <think> tag
+        self._pending = ""   # spoken text without a sentence terminator yet
+        self._in_think = False
+
+    def _strip_think(self, text: str) -> str:
+        out = ""
+        while text:
+            tag = "</think>" if self._in_think else "<think>"
+            at = text.find(tag)
+            if at == -1:
+                return out if self._in_think else out + text
+            if not self._in_think:
+                out += text[:at]
+            text = text[at + len(tag):]
+            self._in_think = not self._in_think
+        return out
+
+    def feed(self, token: str) -> list:
+        self._raw += token
+        # Hold back a possibly partial tag until the next token arrives
+        cut = self._raw.rfind("<")
+        if cut != -1 and any(tag.startswith(self._raw[cut:]) for tag in ("<think>", "</think>")):
+            ready, self._raw = self._raw[:cut], self._raw[cut:]
+        else:
+            ready, self._raw = self._raw, ""
+        self._pending += self._strip_think(ready)
+
+        parts = SENTENCE_END.split(self._pending)
+        # The last part has no terminator yet
+        self._pending = parts.pop()
+        sentences = []
+        carry = ""
+        for part in parts:
+            carry = f"{carry} {part.strip()}".strip()
+            if len(carry) >= self.min_chars:
+                sentences.append(carry)
+                carry = ""
+        if carry:
+            self._pending = f"{carry} {self._pending}"
+        return sentences
+
+    def flush(self) -> list:
+        tail = (self._pending + self._strip_think(self._raw)).strip()
+        self._raw = self._pending = ""
+        return [tail] if tail else []
+
+# Sentences being synthesized right now, so concurrent calls saying the same thing share one request.
+# Each is its own task: a caller cancelled by barge-in stops waiting, but the synthesis (and every
+# other call waiting for it) carries on.
+_inflight = {}
+
+async def _synthesize_and_cache(key: str, text: str, voice: str) -> bytes:
+    try:
+        audio = await _synthesize(normalize_tts_text(text), voice)
+        try:
+            await run_io(tts_cache.put, key, audio)
+        except Exception as e:
+            # Best effort: the audio is already synthesized, a cache write failure must not lose it
+            print(f"Error caching TTS audio: {e}")
+            record_error("tts_cache")
+        return audio
+    finally:
+        # Popped only once the audio is cached, so no other call re-synthesizes it in between
+        _inflight.pop(key, None)
+
+def _retrieve_exception(task: asyncio.Task):
+    # Avoids "exception was never retrieved" when every caller was cancelled before it failed
+    if not task.cancelled():
+        task.exception()
+
+async def synthesize(text: str, voice: str = TTS_VOICE) -> bytes:
+    """
+    Audio for one sentence, served from the TTS cache when this voice has said it before.
+    Sentence-level keys mean answers that only partly repeat an earlier one still reuse
+    the sentences they share with it.
+    """
+    if not settings.TTS_CACHE_ENABLED:
+        return await _synthesize(normalize_tts_text(text), voice)
+
+    key = tts_cache_key(voice, text)
+    audio = await run_io(tts_cache.get, key)
+    if audio is not None:
+        return audio
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_synthesize_and_cache(key, text, voice))
+        task.add_done_callback(_retrieve_exception)
+        _inflight[key] = task
+    return await asyncio.shield(task)
+
+async def _synthesize(text: str, voice: str) -> bytes:
+    """Streams edge-tts audio for one sentence into memory; no temp files."""
+    import edge_tts
+
+    started = time.perf_counter()
+    audio = bytearray()
+    communicate = edge_tts.Communicate(text, voice)
+    async for message in communicate.stream():
+        if message["type"] == "audio":
+            audio.extend(message["data"])
+    TTS_SECONDS.observe(time.perf_counter() - started)
+    return bytes(audio)
@@ -0,0 +1,268 @@
+# app/core/talent_analytics.py
+#
+# Talent-pool aggregates for the recruiter dashboard: skill frequency, an experience histogram
+# and skill co-occurrence. They live as counter documents in the talent_analytics collection
+# and are updated with $inc from the before/after state of each bot change (upload, metadata
+# refinement, edit, delete), so no request ever aggregates the bots collection. Each worker
+# serves them from an in-memory copy, reloaded when another worker has changed the counters.
+
+import asyncio
+import heapq
+import math
+import time
+from itertools import combinations
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import record_error
+
+# Lower bounds of the experience histogram buckets, in years
+EXPERIENCE_BUCKETS = (0, 1, 3, 5, 8, 10, 15, 20)
+VERSION_ID = "meta:version"
+
+def normalize_skill(skill) -> Optional[str]:
+    if not isinstance(skill, str):
+        return None
+    return " ".join(skill.split()).lower() or None
+
+def experience_bucket(years: float) -> str:
+    lower = max(b for b in EXPERIENCE_BUCKETS if b <= max(years, 0))
+    position = EXPERIENCE_BUCKETS.index(lower)
+    if position + 1 == len(EXPERIENCE_BUCKETS):
+        return f"{lower}+"
+    return f"{lower}-{EXPERIENCE_BUCKETS[position + 1]}"
+
+def _by_count(item):
+    # Ties broken by counter id, so every worker returns the same order
+    return item[1], item[0]
+
+def has_profile(bot: Optional[dict]) -> bool:
+    """Bots count once a resume has been processed (or skills / experience were set by hand)."""
+    return bool(bot) and not bot.get("deleted") and ("skills" in bot or "experience_years" in bot)
+
+def contribution(bot: Optional[dict]) -> dict:
+    """
+    Counter increments one bot adds to the aggregates: counter id -> (amount, fields).
+    fields are stored on the counter document the first time it is created.
+    """
+    if not has_profile(bot):
+        return {}
+    counters = {"total:candidates": (1, {"kind": "total", "key": "candidates"})}
+    try:
+        years = float(bot.get("experience_years") or 0.0)
+    except (TypeError, ValueError):
+        years = 0.0
+    if not math.isfinite(years):
+        years = 0.0   # NaN / inf pass float() but fit no bucket and would poison the totals
+    bucket = experience_bucket(years)
+    counters["total:experience_years"] = (years, {"kind": "total", "key": "experience_years"})
+    counters[f"experience:{bucket}"] = (1, {"kind": "experience", "key": bucket})
+
+    skills = {}
+    for skill in bot.get("skills") or []:
+        key = normalize_skill(skill)
+        if key and key not in skills:
+            skills[key] = " ".join(skill.split())
+    for key, label in skills.items():
+        counters[f"skill:{key}"] = (1, {"kind": "skill", "key": key, "label": label})
+    # Pairs grow quadratically; long skill lists only pair their first skills (usually the strongest)
+    paired = sorted(list(skills)[:settings.ANALYTICS_MAX_COOCCURRENCE_SKILLS])
+    for a, b in combinations(paired, 2):
+        counters[f"pair:{a}|{b}"] = (1, {"kind": "pair", "key": [a, b]})
+    return counters
+
+def diff(before: Optional[dict], after: Optional[dict]) -> dict:
+    """Net counter changes (id -> (amount, fields)) when a bot goes from before to after."""
+    old, new = contribution(before), contribution(after)
+    delta = {}
+    for counter_id in old.keys() | new.keys():
+        amount = new.get(counter_id, (0, None))[0] - old.get(counter_id, (0, None))[0]
+        if amount:
+            delta[counter_id] = (amount, (new.get(counter_id) or old[counter_id])[1])
+    return delta
+
+class TalentAnalytics:
+    """
+    In-memory copy of the talent_analytics counters.
+
+    - record_change(before, after) applies one bot change to MongoDB ($inc, one bulk_write)
+      and to this worker's copy
+    - snapshot() re-reads the counters at most every ANALYTICS_REFRESH_SECONDS, and only when
+      the version counter shows another worker has written since
+    - rebuild() recomputes everything from the bots collection (recovery, first start)
+    """
+    def __init__(self):
+        self.counters = {}   # counter id -> count
+        self.fields = {}     # counter id -> stored fields (kind, key, label)
+        self.version = None
+        self.checked_at = 0.0
+        self.load_ms = None
+        self._lock = asyncio.Lock()
+
+    # --- Updates ---
+    async def record_change(self, before: Optional[dict], after: Optional[dict]):
+        """Never raises: a failed update only leaves the aggregates stale until the next rebuild."""
+        from pymongo import UpdateOne, ReturnDocument
+        from app.db.session import analytics_collection
+
+        try:
+            delta = diff(before, after)
+            if not delta:
+                return
+            operations = [
+                UpdateOne({"_id": counter_id}, {"$inc": {"count": amount}, "$setOnInsert": fields}, upsert=True)
+                for counter_id, (amount, fields) in delta.items()
+            ]
+            await analytics_collection.bulk_write(operations, ordered=False)
+            # Bumped after the counters, so a worker that sees the new version reads them too.
+            # Only rebuild() creates it: without it the counters are incomplete and get rebuilt on load
+            version_doc = await analytics_collection.find_one_and_update(
+                {"_id": VERSION_ID}, {"$inc": {"count": 1}}, return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            print(f"Error updating talent analytics: {e}")
+            record_error("talent_analytics")
+            return
+        if self.version is None or version_doc is None:
+            return
+        for counter_id, (amount, fields) in delta.items():
+            self.counters[counter_id] = self.counters.get(counter_id, 0) + amount
+            self.fields.setdefault(counter_id, fields)
+        # Only when no other worker wrote in between; otherwise the next snapshot() reloads
+        if version_doc["count"] == self.version + 1:
+            self.version = version_doc["count"]
+
+    # --- Loading ---
+    async def _load(self):
+        from app.db.session import analytics_collection
+
+        started = time.perf_counter()
+        counters, fields, version = {}, {}, None
+        async for doc in analytics_collection.find({}):
+            if doc["_id"] == VERSION_ID:
+                version = doc["count"]
+                continue
+            counters[doc["_id"]] = doc["count"]
+            fields[doc["_id"]] = {k: v for k, v in doc.items() if k not in ("_id", "count")}
+        if version is None:
+            # Nothing materialized yet (first start, or the collection was dropped)
+            await self.rebuild()
+            return
+        self.counters, self.fields, self.version = counters, fields, version
+        self.checked_at = time.monotonic()
+        self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    async def _refresh(self):
+        from app.db.session import analytics_collection
+
+        async with self._lock:
+            if self.version is None:
+                await self._load()
+                return
+            if time.monotonic() - self.checked_at < settings.ANALYTICS_REFRESH_SECONDS:
+                return
+            version_doc = await analytics_collection.find_one({"_id": VERSION_ID})
+            if version_doc is None or version_doc["count"] != self.version:
+                await self._load()
+            else:
+                self.checked_at = time.monotonic()
+
+    async def rebuild(self, batch_size: int = 500) -> dict:
+        """
+        Recomputes the counters from every active bot (streamed with a cursor) into a staging
+        collection and renames it over talent_analytics, so readers never see a partial state.
+        Changes made to bots while it runs may be lost; run it again if the pool was busy.
+        """
+        from app.db.session import database, bots_collection, analytics_collection, ACTIVE_BOT_FILTER
+
+        started = time.perf_counter()
+        totals, stored, bots = {}, {}, 0
+        cursor = bots_collection.find(ACTIVE_BOT_FILTER, {"skills": 1, "experience_years": 1}).batch_size(batch_size)
+        async for bot in cursor:
+            bots += 1
+            for counter_id, (amount, fields) in contribution(bot).items():
+                totals[counter_id] = totals.get(counter_id, 0) + amount
+                stored.setdefault(counter_id, fields)
+
+        previous = await analytics_collection.find_one({"_id": VERSION_ID})
+        version = (previous["count"] if previous else 0) + 1
+        docs = [{"_id": counter_id, "count": count, **stored[counter_id]} for counter_id, count in totals.items()]
+        docs.append({"_id": VERSION_ID, "kind": "meta", "count": version})
+
+        staging = database[f"{analytics_collection.name}_rebuild"]
+        await staging.drop()
+        for start in range(0, len(docs), batch_size):
+            await staging.insert_many(docs[start:start + batch_size], ordered=False)
+        await staging.rename(analytics_collection.name, dropTarget=True)
+
+        self.counters = totals
+        self.fields = stored
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+        return {"bots": bots, "candidates": totals.get("total:candidates", 0), "counters": len(docs),
+                "version": version, "seconds": round(time.perf_counter() - started, 2)}
+
+    # --- Views ---
+    def _of_kind(self, kind: str):
+        return (
+            (counter_id, count) for counter_id, count in self.counters.items()
+            if count > 0 and self.fields.get(counter_id, {}).get("kind") == kind
+        )
+
+    async def snapshot(self, top_skills: int = 20, top_pairs: int = 20, skill: Optional[str] = None) -> dict:
+        """Dashboard view: top skills, the experience histogram and the most frequent skill pairs."""
+        await self._refresh()
+        candidates = int(self.counters.get("total:candidates", 0))
+
+        def label(key: str) -> str:
+            return self.fields.get(f"skill:{key}", {}).get("label", key)
+
+        def share(count) -> float:
+            return round(count / candidates, 4) if candidates else 0.0
+
+        skills = [
+            {"skill": self.fields[counter_id].get("label", self.fields[counter_id]["key"]),
+             "count": count, "share": share(count)}
+            for counter_id, count in heapq.nlargest(top_skills, self._of_kind("skill"), key=_by_count)
+        ]
+
+        buckets = dict(self._of_kind("experience"))
+        experience = []
+        for lower in EXPERIENCE_BUCKETS:
+            name = experience_bucket(lower)
+            experience.append({"bucket": name, "count": buckets.get(f"experience:{name}", 0)})
+
+        pairs = self._of_kind("pair")
+        key = normalize_skill(skill) if skill else None
+        if key:
+            pairs = ((counter_id, count) for counter_id, count in pairs if key in self.fields[counter_id]["key"])
+        skill_count = self.counters.get(f"skill:{key}", 0) if key else 0
+        cooccurrence = []
+        for counter_id, count in heapq.nlargest(top_pairs, pairs, key=_by_count):
+            a, b = self.fields[counter_id]["key"]
+            row = {"skills": [label(a), label(b)], "count": count}
+            if key:
+                # Share of the candidates with the requested skill who also have the other one
+                row["share"] = round(count / skill_count, 4) if skill_count else 0.0
+            cooccurrence.append(row)
+
+        total_years = self.counters.get("total:experience_years", 0.0)
+        return {
+            "candidates": candidates,
+            "experience_years_mean": round(total_years / candidates, 2) if candidates else None,
+            "skills": skills,
+            "experience": experience,
+            "cooccurrence": cooccurrence,
+            "version": self.version,
+        }
+
+    def info(self) -> dict:
+        return {
+            "loaded": self.version is not None,
+            "version": self.version,
+            "counters": len(self.counters),
+            "load_ms": self.load_ms,
+        }
+
+talent_analytics = TalentAnalytics()
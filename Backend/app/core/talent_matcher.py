@@ -0,0 +1,158 @@
+# app/core/talent_matcher.py
+#
+# Job-description matching against the whole talent pool. Candidate profile vectors are
+# held as one contiguous, L2-normalized float32 matrix (rebuilt only when a new global
+# index generation is published), so scoring every candidate against every requirement
+# is a single matrix product.
+
+import re
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# --- Requirement extraction ---
+MAX_REQUIREMENTS = 20
+MIN_REQUIREMENT_WORDS = 4
+# Sections whose bullets count half: useful signal, but not what the role is ranked on
+OPTIONAL_SECTION = re.compile(r"^\s*(nice[- ]to[- ]have|bonus|preferred|good to have|plus)\b", re.IGNORECASE)
+SKIPPED_SECTION = re.compile(
+    r"^\s*(about (us|the company)|benefits|perks|what we offer|equal opportunity|how to apply)\b", re.IGNORECASE
+)
+# Heading lines without a trailing colon are only recognized by name; any other short line
+# (e.g. "Strong SQL and data modeling skills") is a requirement
+KNOWN_SECTION = re.compile(
+    r"^\s*(?:(?:key|core|main|your|our|the|minimum|basic|required|preferred|additional|desired)\s+)?"
+    r"(?:requirements|qualifications|responsibilities|duties|skills|experience|must[- ]haves?|"
+    r"nice[- ]to[- ]haves?|bonus(?: points)?|good to have|plus(?:es)?|"
+    r"what you(?:'|’)ll do|what you will do|what we(?:'|’)re looking for|what you bring|who you are|"
+    r"about you|about the role|the role|role overview|overview|"
+    r"about us|about the company|benefits|perks|what we offer|equal opportunity(?: employer)?|how to apply)"
+    r"\s*[:.]?\s*$",
+    re.IGNORECASE
+)
+BULLET = re.compile(r"^\s*(?:[-*•▪◦]|\d+[.)])\s+")
+
+def split_requirements(job_description: str) -> List[Tuple[str, float]]:
+    """
+    Splits a JD into (requirement, weight) chunks: one per bullet, or per sentence for prose.
+    Company boilerplate sections are dropped and "nice to have" items get weight 0.5.
+    Falls back to the whole JD when nothing requirement-like is found.
+    """
+    requirements = []
+    weight = 1.0
+    skipping = False
+    for line in job_description.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        is_bullet = bool(BULLET.match(stripped))
+        if not is_bullet and (stripped.endswith(":") or KNOWN_SECTION.match(stripped)):
+            # A heading like "Requirements:" or "Nice to have"
+            skipping = bool(SKIPPED_SECTION.match(stripped))
+            weight = 0.5 if OPTIONAL_SECTION.match(stripped) else 1.0
+            continue
+        if skipping:
+            continue
+        text = BULLET.sub("", stripped)
+        pieces = [text] if is_bullet else re.split(r"(?<=[.!?])\s+", text)
+        for piece in pieces:
+            if len(piece.split()) >= MIN_REQUIREMENT_WORDS:
+                requirements.append((piece.strip(), weight))
+
+    if not requirements:
+        return [(" ".join(job_description.split()), 1.0)]
+    if len(requirements) > MAX_REQUIREMENTS:
+        # Merge neighbours so long JDs still cost one bounded embedding batch
+        group = -(-len(requirements) // MAX_REQUIREMENTS)
+        requirements = [
+            (" ".join(text for text, _ in requirements[i:i + group]),
+             max(weight for _, weight in requirements[i:i + group]))
+            for i in range(0, len(requirements), group)
+        ]
+    return requirements
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+class CandidateMatrix:
+    """Live candidate vectors (one row per bot, tombstones excluded) and their bot ids."""
+    def __init__(self, vectors: np.ndarray, bot_ids: List[str]):
+        self.vectors = _normalize_rows(vectors)
+        self.bot_ids = bot_ids
+
+    @classmethod
+    def from_snapshot(cls, vector_store, tombstones: set):
+        index = vector_store.index
+        total = index.ntotal
+        dim = index.d
+        if total == 0:
+            return cls(np.zeros((0, dim), dtype=np.float32), [])
+        all_vectors = index.reconstruct_n(0, total)
+
+        # A bot's newest row wins should an older one not be tombstoned
+        row_for_bot = {}
+        for row in range(total):
+            doc_id = vector_store.index_to_docstore_id.get(row)
+            if doc_id is None or doc_id in tombstones:
+                continue
+            bot_id = vector_store.docstore.search(doc_id).metadata.get("bot_id")
+            if bot_id:
+                row_for_bot[bot_id] = row
+        bot_ids = list(row_for_bot)
+        rows = np.fromiter(row_for_bot.values(), dtype=np.int64, count=len(bot_ids))
+        return cls(all_vectors[rows], bot_ids)
+
+    def __len__(self):
+        return len(self.bot_ids)
+
+    def rank(self, requirement_vectors: np.ndarray, weights: np.ndarray, top_k: int,
+             min_score: Optional[float] = None) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Scores every candidate against every requirement (cosine similarity) and returns
+        (bot_ids, combined scores, per-requirement scores) for the top_k candidates.
+        The combined score is the weight-averaged requirement similarity.
+        """
+        if len(self) == 0:
+            return [], np.zeros(0, dtype=np.float32), np.zeros((0, len(weights)), dtype=np.float32)
+        queries = _normalize_rows(np.asarray(requirement_vectors, dtype=np.float32))
+        weights = np.asarray(weights, dtype=np.float32) / float(np.sum(weights))
+
+        per_requirement = self.vectors @ queries.T          # (candidates, requirements)
+        combined = per_requirement @ weights                 # (candidates,)
+
+        k = min(top_k, len(combined))
+        top = np.argpartition(-combined, k - 1)[:k]
+        top = top[np.argsort(-combined[top])]
+        if min_score is not None:
+            top = top[combined[top] >= min_score]
+        return [self.bot_ids[i] for i in top], combined[top], per_requirement[top]
+
+# --- Per-generation cache ---
+_matrix_cache = {}   # index folder -> (generation, CandidateMatrix, build_ms)
+_matrix_cache_lock = threading.Lock()
+
+def candidate_matrix_for(folder_key: str, generation: int, snapshot) -> CandidateMatrix:
+    """Returns the matrix for this generation, building it once per generation per process."""
+    with _matrix_cache_lock:
+        cached = _matrix_cache.get(folder_key)
+    if cached and cached[0] == generation:
+        return cached[1]
+    started = time.perf_counter()
+    matrix = CandidateMatrix.from_snapshot(*snapshot)
+    build_ms = round((time.perf_counter() - started) * 1000, 1)
+    with _matrix_cache_lock:
+        cached = _matrix_cache.get(folder_key)
+        if not cached or cached[0] <= generation:
+            _matrix_cache[folder_key] = (generation, matrix, build_ms)
+    return matrix
+
+def candidate_matrix_info() -> dict:
+    with _matrix_cache_lock:
+        return {
+            folder: {"generation": generation, "candidates": len(matrix), "build_ms": build_ms}
+            for folder, (generation, matrix, build_ms) in _matrix_cache.items()
+        }
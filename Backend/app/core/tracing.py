@@ -0,0 +1,254 @@
+# app/core/tracing.py
+
+import json
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+TRACE_HEADER = "X-Trace-Id"
+PROFILE_HEADER = "X-Profile"
+
+class Trace:
+    """All spans recorded for one request (or one background unit of work)."""
+    def __init__(self, name: str, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.name = name
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = None
+        self.attrs = {}
+        self.spans = []
+        self.profile = None
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 2)
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+            "spans": sorted(self.spans, key=lambda s: s["start"]),
+            "profile": self.profile,
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Records a timed span under the current trace; a no-op when the request isn't sampled.
+    Nested spans pick up their parent through a contextvar.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    start = time.time()
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs["error"] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.spans.append({
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start": start,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "attrs": attrs,
+        })
+
+def record_span(name: str, start: float, duration_s: float, **attrs):
+    """
+    Adds an already-measured span. Used where a context manager can't wrap the work,
+    e.g. across the yields of a streaming generator.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.spans.append({
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": _current_span.get(),
+        "name": name,
+        "start": start,
+        "duration_ms": round(duration_s * 1000, 2),
+        "attrs": attrs,
+    })
+
+# --- Export: in-process ring buffer + optional JSONL file ---
+_recent_traces = deque(maxlen=settings.TRACE_BUFFER_SIZE)
+_export_queue = queue.SimpleQueue()
+_export_thread = None
+
+def _export_worker():
+    # Appends on a daemon thread so trace export never blocks the event loop
+    while True:
+        line = _export_queue.get()
+        try:
+            with open(settings.TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except Exception as e:
+            print(f"Error exporting trace: {e}")
+
+def export_trace(trace: Trace):
+    global _export_thread
+    data = trace.as_dict()
+    _recent_traces.append(data)
+    if settings.TRACE_EXPORT_PATH:
+        if _export_thread is None:
+            _export_thread = threading.Thread(target=_export_worker, daemon=True)
+            _export_thread.start()
+        _export_queue.put(json.dumps(data, default=str))
+
+def _visible(trace: dict, user_id: Optional[str]) -> bool:
+    # user_id None means unfiltered; otherwise only traces of requests that user authenticated
+    return user_id is None or trace["attrs"].get("user_id") == user_id
+
+def recent_traces(limit: int = 50, min_duration_ms: float = 0.0, user_id: Optional[str] = None) -> list:
+    traces = [
+        t for t in list(_recent_traces)
+        if (t["duration_ms"] or 0) >= min_duration_ms and _visible(t, user_id)
+    ]
+    return traces[-limit:][::-1]
+
+def get_trace(trace_id: str, user_id: Optional[str] = None) -> Optional[dict]:
+    for trace in list(_recent_traces):
+        if trace["trace_id"] == trace_id:
+            return trace if _visible(trace, user_id) else None
+    return None
+
+@contextmanager
+def start_trace(name: str, trace_id: Optional[str] = None, force: bool = False):
+    """
+    Opens a trace for work that doesn't come through the HTTP middleware (e.g. a voice call turn).
+    Sampled at TRACE_SAMPLE_RATE unless `force` is set; yields None when not sampled.
+    """
+    if not force and random.random() >= settings.TRACE_SAMPLE_RATE:
+        yield None
+        return
+    trace = Trace(name, trace_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        export_trace(trace)
+
+# --- Sampling profiler ---
+_profiler_lock = threading.Lock()
+
+class StackSampler:
+    """
+    Samples every thread's stack at a fixed interval and counts collapsed stacks
+    ("module:function;module:function ..."), ready for a flamegraph.
+    The worker's event loop is shared, so samples can include concurrent requests.
+    """
+    def __init__(self, interval_s: float = 0.005, max_depth: int = 40):
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, top: int = 50) -> dict:
+        self._stop.set()
+        self._thread.join()
+        return {
+            "interval_ms": self.interval_s * 1000,
+            "samples": self.sample_count,
+            "stacks": [{"stack": stack, "count": count} for stack, count in self.samples.most_common(top)],
+        }
+
+# --- HTTP middleware ---
+class TracingMiddleware:
+    """
+    Opens a trace per sampled request, returns its id in X-Trace-Id and exports it when the
+    response (including a streamed body) has finished. With TRACING_DEBUG_ENABLED, sending
+    `X-Profile: 1` forces tracing and attaches a sampling profile to that request's trace.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        profile = settings.TRACING_DEBUG_ENABLED and headers.get(PROFILE_HEADER.lower()) == "1"
+        if not profile and random.random() >= settings.TRACE_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}", headers.get(TRACE_HEADER.lower()))
+        token = _current_trace.set(trace)
+
+        sampler = None
+        if profile and _profiler_lock.acquire(blocking=False):
+            sampler = StackSampler()
+            sampler.start()
+        elif profile:
+            trace.attrs["profile_skipped"] = "another request is being profiled"
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                trace.attrs["status"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (TRACE_HEADER.encode("latin-1"), trace.trace_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _current_trace.reset(token)
+            if sampler is not None:
+                trace.profile = sampler.stop()
+                _profiler_lock.release()
+            if scope.get("endpoint") is not None:
+                trace.name = f"{scope['method']} {route_template(scope)}"
+            trace.finish()
+            export_trace(trace)
@@ -0,0 +1,182 @@
+# app/core/transcripts.py
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import TRANSCRIPT_RECORDS, TRANSCRIPT_FLUSH_SECONDS, record_error
+
+class TranscriptWriter:
+    """
+    Persists chat turns off the request path.
+
+    - record() only appends to a bounded in-memory queue and never waits: when the queue is
+      full (Mongo slow or down) the turn is dropped and counted instead of slowing chat down
+    - A background task writes batches with one insert_many, as soon as TRANSCRIPT_BATCH_SIZE
+      turns are queued or TRANSCRIPT_FLUSH_INTERVAL_MS after the first turn of a batch
+    - stop() flushes what is left, giving up after TRANSCRIPT_SHUTDOWN_TIMEOUT_SECONDS
+    """
+    def __init__(self, batch_size: int, flush_interval_ms: int, max_queued: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_queued = max_queued
+        self._queue = None
+        self._task = None
+        self._pending = []
+        self._inflight = []
+        self._closing = False
+        self._lost_on_stop = 0
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_flush_ms = None
+        self.last_error = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Starts the flusher; call from inside the event loop (lifespan)."""
+        if not settings.TRANSCRIPTS_ENABLED:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    def record(self, bot_id: str, question: str, answer: str, channel: str, user_id: Optional[str] = None,
+               api_key_id: Optional[str] = None, stats: Optional[dict] = None, **extra):
+        """Queues one turn. stats is the dict filled by RAGPipeline.get_response_stream."""
+        if not self.running:
+            return
+        stats = stats or {}
+        turn = {
+            "bot_id": bot_id,
+            "user_id": user_id,
+            "api_key_id": api_key_id,
+            "channel": channel,
+            "question": question,
+            "answer": answer,
+            "retrieval_ids": stats.get("retrieval_ids", []),
+            "retrieval_sections": stats.get("retrieval_sections", []),
+            "latency_ms": {
+                "retrieval": stats.get("retrieval_ms"),
+                "ttft": stats.get("ttft_ms"),
+                "llm": stats.get("llm_ms"),
+                "total": stats.get("total_ms"),
+            },
+            "created_at": datetime.now(timezone.utc),
+            **extra,
+        }
+        try:
+            self._queue.put_nowait(turn)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            TRANSCRIPT_RECORDS.labels("dropped").inc()
+            return
+        self.recorded += 1
+
+    async def _collect(self):
+        # Turns taken off the queue wait in self._pending, so a shutdown mid-batch still writes them
+        self._pending.append(await self._queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        while len(self._pending) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self._pending.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _flush(self, batch: list):
+        from app.db.session import transcripts_collection
+
+        started = time.perf_counter()
+        try:
+            await transcripts_collection.insert_many(batch, ordered=False)
+        except Exception as e:
+            # Not retried: a failing database would otherwise grow the backlog without bound
+            self.failed += len(batch)
+            self.last_error = str(e)
+            TRANSCRIPT_RECORDS.labels("failed").inc(len(batch))
+            record_error("transcripts")
+            print(f"Error writing {len(batch)} chat transcripts: {e}")
+            return
+        elapsed = time.perf_counter() - started
+        self.written += len(batch)
+        self.last_flush_ms = round(elapsed * 1000, 1)
+        TRANSCRIPT_RECORDS.labels("written").inc(len(batch))
+        TRANSCRIPT_FLUSH_SECONDS.observe(elapsed)
+
+    async def _run(self):
+        while not self._closing:
+            await self._collect()
+            self._inflight, self._pending = self._pending, []
+            try:
+                await self._flush(self._inflight)
+            finally:
+                self._inflight = []
+
+    async def stop(self, timeout: Optional[float] = None):
+        """Stops the flusher and writes the queued turns, bounded by timeout seconds."""
+        if self._task is None:
+            return
+        timeout = settings.TRANSCRIPT_SHUTDOWN_TIMEOUT_SECONDS if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        self._closing = True
+        self._lost_on_stop = 0
+        # A batch already being inserted is allowed to finish rather than cancelled half-written
+        if self._inflight:
+            await asyncio.wait({self._task}, timeout=timeout)
+        if not self._task.done():
+            self._count_dropped(len(self._inflight))
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+        remaining = self._pending
+        self._pending = []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+
+        written = 0
+        try:
+            for start in range(0, len(remaining), self.batch_size):
+                await asyncio.wait_for(
+                    self._flush(remaining[start:start + self.batch_size]), max(0.0, deadline - time.monotonic())
+                )
+                written = start + self.batch_size
+        except asyncio.TimeoutError:
+            self._count_dropped(len(remaining) - written)
+        if self._lost_on_stop:
+            print(f"Transcript flush timed out after {timeout}s; {self._lost_on_stop} turns were not written")
+
+    def _count_dropped(self, count: int):
+        self._lost_on_stop += count
+        self.dropped += count
+        TRANSCRIPT_RECORDS.labels("dropped").inc(count)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.TRANSCRIPTS_ENABLED,
+            "running": self.running,
+            "queued": (self._queue.qsize() if self._queue is not None else 0) + len(self._pending) + len(self._inflight),
+            "max_queued": self.max_queued,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_flush_ms": self.last_flush_ms,
+            "last_error": self.last_error,
+        }
+
+transcript_writer = TranscriptWriter(
+    settings.TRANSCRIPT_BATCH_SIZE, settings.TRANSCRIPT_FLUSH_INTERVAL_MS, settings.TRANSCRIPT_MAX_QUEUED
+)
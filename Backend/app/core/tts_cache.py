@@ -0,0 +1,163 @@
+# app/core/tts_cache.py
+
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+MARKDOWN_NOISE = re.compile(r"[*_`#>]+")
+BULLET = re.compile(r"^\s*(?:[-•]|\d+[.)])\s+", re.MULTILINE)
+WHITESPACE = re.compile(r"\s+")
+
+def normalize_tts_text(text: str) -> str:
+    """
+    The text that is actually spoken: markdown emphasis, bullets and whitespace differences
+    don't change the audio, so they don't change the cache key. Case is kept, since it
+    changes how acronyms are read.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = BULLET.sub("", text)
+    text = MARKDOWN_NOISE.sub("", text)
+    return WHITESPACE.sub(" ", text).strip()
+
+def tts_cache_key(voice: str, text: str) -> str:
+    return hashlib.sha256(f"{voice}\0{normalize_tts_text(text)}".encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized sentences, keyed by (voice, normalized text).
+
+    Blobs are the MP3 bytes edge-tts returns (already a compressed codec, ~6 KB/s of speech),
+    stored under TTS_CACHE_DIR/<2-char shard>/<sha256>.mp3 with an atomic rename. An in-memory
+    LRU (TTS_CACHE_MEMORY_MB) sits in front. The disk is bounded by TTS_CACHE_DISK_MB: past the
+    limit, the least recently used blobs (by mtime, refreshed on every hit) are removed until
+    usage is back under 90%.
+
+    Methods are blocking (file I/O); async callers run them on the io pool.
+    """
+    def __init__(self, directory: str, memory_bytes: int, disk_bytes: int):
+        self.directory = Path(directory)
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._disk_used = None   # scanned lazily on the first write
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evicted_blobs": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.mp3"
+
+    def _remember(self, key: str, audio: bytes):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = audio
+            self._memory_used += len(audio)
+            while self._memory_used > self.memory_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+
+    def get(self, key: str):
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+        if audio is not None:
+            record_cache("tts_memory", hit=True)
+            return audio
+        record_cache("tts_memory", hit=False)
+
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+            os.utime(path)   # mark as recently used for disk eviction
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["misses"] += 1
+            record_cache("tts_disk", hit=False)
+            return None
+        with self._lock:
+            self.stats["disk_hits"] += 1
+        record_cache("tts_disk", hit=True)
+        self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        self._remember(key, audio)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(audio)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = self._scan_disk_usage()
+            else:
+                self._disk_used += len(audio)
+            over_limit = self._disk_used > self.disk_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _scan_disk_usage(self) -> int:
+        used = 0
+        for path in self.directory.glob("*/*.mp3"):
+            try:
+                used += path.stat().st_size
+            except FileNotFoundError:
+                continue   # evicted by another worker while scanning
+        return used
+
+    def _evict_disk(self):
+        blobs = []
+        for path in self.directory.glob("*/*.mp3"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        blobs.sort()
+        used = sum(size for _, size, _ in blobs)
+        target = int(self.disk_bytes * 0.9)
+        evicted = 0
+        for _, size, path in blobs:
+            if used <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            used -= size
+            evicted += 1
+        with self._lock:
+            self._disk_used = used
+            self.stats["evicted_blobs"] += evicted
+
+    def info(self) -> dict:
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_used / 1e6, 2),
+                "disk_mb": round(self._disk_used / 1e6, 2) if self._disk_used is not None else None,
+            }
+
+tts_cache = TTSCache(
+    settings.TTS_CACHE_DIR,
+    memory_bytes=settings.TTS_CACHE_MEMORY_MB * 1024 * 1024,
+    disk_bytes=settings.TTS_CACHE_DISK_MB * 1024 * 1024,
+)
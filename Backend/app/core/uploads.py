@@ -0,0 +1,149 @@
+# app/core/uploads.py
+
+import io
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.executors import run_io
+
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES."""
+
+def upload_too_large_detail() -> str:
+    return f"File is too large (max {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} MB)"
+
+class SpooledUpload:
+    """
+    An upload read off the request: held in memory when it is at most UPLOAD_MEMORY_MAX_BYTES,
+    otherwise written to a uniquely named spool file. open() gives a binary file object either way.
+    """
+    def __init__(self, filename: str, suffix: str, size: int, data: Optional[bytes] = None,
+                 path: Optional[Path] = None):
+        self.filename = filename
+        self.suffix = suffix
+        self.size = size
+        self.data = data
+        self.path = path
+
+    @property
+    def in_memory(self) -> bool:
+        return self.data is not None
+
+    def open(self):
+        return io.BytesIO(self.data) if self.in_memory else open(self.path, "rb")
+
+    async def cleanup(self):
+        if self.path is not None:
+            await run_io(_unlink, self.path)
+            self.path = None
+
+def _unlink(path: Path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _create_spool_file(suffix: str):
+    spool_dir = settings.UPLOAD_SPOOL_DIR or tempfile.gettempdir()
+    os.makedirs(spool_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=spool_dir)
+    return os.fdopen(fd, "wb"), Path(path)
+
+async def spool_upload(file, suffix: str) -> SpooledUpload:
+    """
+    Reads an UploadFile in UPLOAD_CHUNK_BYTES chunks without blocking the event loop. Small
+    uploads stay in memory; once past UPLOAD_MEMORY_MAX_BYTES the bytes so far and the rest
+    go to a spool file. Raises UploadTooLarge as soon as UPLOAD_MAX_BYTES is exceeded.
+    """
+    buffer = bytearray()
+    handle, path, size = None, None, 0
+    try:
+        while True:
+            chunk = await file.read(settings.UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > settings.UPLOAD_MAX_BYTES:
+                raise UploadTooLarge(upload_too_large_detail())
+            if handle is None and size <= settings.UPLOAD_MEMORY_MAX_BYTES:
+                buffer += chunk
+                continue
+            if handle is None:
+                handle, path = await run_io(_create_spool_file, suffix)
+                await run_io(handle.write, bytes(buffer))
+                buffer = None
+            await run_io(handle.write, chunk)
+    except BaseException:
+        if handle is not None:
+            await run_io(handle.close)
+            await run_io(_unlink, path)
+        raise
+    if handle is not None:
+        await run_io(handle.close)
+        return SpooledUpload(file.filename, suffix, size, path=path)
+    return SpooledUpload(file.filename, suffix, size, data=bytes(buffer))
+
+# --- Early rejection ---
+class _BodyTooLarge(Exception):
+    pass
+
+class UploadSizeLimitMiddleware:
+    """
+    Pure ASGI middleware for upload routes (POST paths ending in /upload). Requests whose
+    Content-Length already exceeds UPLOAD_MAX_BYTES get a 413 before the body is read;
+    bodies without one (chunked) are cut off with a 413 as soon as they pass the limit,
+    instead of being parsed to the end first.
+    """
+    def __init__(self, app, path_suffix: str = "/upload"):
+        self.app = app
+        self.path_suffix = path_suffix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].endswith(self.path_suffix):
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send)
+            return
+
+        state = {"received": 0, "exceeded": False, "rejected": False}
+
+        async def limited_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > limit:
+                    state["exceeded"] = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def limited_send(message):
+            # The framework may turn the aborted body read into its own error response; send the 413 instead
+            if state["exceeded"]:
+                if message["type"] == "http.response.start" and not state["rejected"]:
+                    state["rejected"] = True
+                    await self._reject(scope, receive, send)
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except _BodyTooLarge:
+            pass
+        if state["exceeded"] and not state["rejected"]:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse({"detail": upload_too_large_detail()}, status_code=413, headers={"Connection": "close"})
+        await response(scope, receive, send)
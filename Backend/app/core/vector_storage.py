@@ -0,0 +1,93 @@
+# app/core/vector_storage.py
+#
+# Compressed vector storage for the FAISS indexes under data/. LangChain's FAISS store keeps
+# an IndexFlatL2 (float32, 4 bytes per dimension); VECTOR_STORAGE swaps it for a
+# faiss.IndexScalarQuantizer holding the same vectors as float16 (2 bytes) or 8-bit codes
+# (1 byte). Searches decode on the fly, still exhaustive and still L2, so nothing else changes:
+# the docstore, index_to_docstore_id, add_embeddings, delete and reconstruct_n all keep working.
+
+from typing import Optional
+
+import numpy as np
+
+STORAGE_TYPES = ("float32", "float16", "sq8")
+# 8-bit ranges come from the stored vectors, widened so later additions are rarely clipped
+SQ8_RANGE_MARGIN = 0.1
+# Below this many vectors the 8-bit range is a symmetric bound instead of per-dimension min/max
+SQ8_MIN_TRAINING_VECTORS = 64
+
+def index_storage(index) -> str:
+    """Storage type of a FAISS index: "float32", "float16", "sq8" or the index class name."""
+    import faiss
+
+    if isinstance(index, faiss.IndexFlat):
+        return "float32"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16:
+            return "float16"
+        if index.sq.qtype == faiss.ScalarQuantizer.QT_8bit:
+            return "sq8"
+    return type(index).__name__
+
+def build_index(vectors: np.ndarray, storage: str, metric: Optional[int] = None):
+    """A new index of the given storage type holding vectors (trained first where needed)."""
+    import faiss
+
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown vector storage '{storage}', expected one of {STORAGE_TYPES}")
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    dim = vectors.shape[1]
+    metric = faiss.METRIC_L2 if metric is None else metric
+
+    if storage == "float32":
+        index = faiss.IndexFlat(dim, metric)
+    elif storage == "float16":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, metric)
+    else:
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, metric)
+        index.sq.rangestat = faiss.ScalarQuantizer.RS_minmax
+        index.sq.rangestat_arg = SQ8_RANGE_MARGIN
+        training = vectors
+        if len(vectors) < SQ8_MIN_TRAINING_VECTORS:
+            bound = float(np.abs(vectors).max()) * 1.5 if len(vectors) else 1.0
+            training = np.array([[-bound] * dim, [bound] * dim], dtype=np.float32)
+        index.train(training)
+    if not index.is_trained:
+        index.train(vectors)
+    if len(vectors):
+        index.add(vectors)
+    return index
+
+def convert_index(index, storage: str, retrain: bool = False):
+    """
+    The same vectors (same ids, same order) in the requested storage. Returns the index
+    unchanged when it already uses that storage, unless retrain is set (8-bit ranges are
+    refitted to the current vectors, e.g. after compaction).
+    """
+    if index_storage(index) == storage and not (retrain and storage == "sq8"):
+        return index
+    vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, index.d), dtype=np.float32)
+    return build_index(vectors, storage, metric=index.metric_type)
+
+def apply_vector_storage(vector_store, storage: str, retrain: bool = False):
+    """Converts a LangChain FAISS store's index in place; the docstore mapping is unaffected."""
+    vector_store.index = convert_index(vector_store.index, storage, retrain=retrain)
+    return vector_store
+
+def index_bytes(index) -> int:
+    """Bytes taken by the stored vectors (what the .faiss file and RAM hold, headers aside)."""
+    import faiss
+
+    if isinstance(index, faiss.IndexFlatCodes):
+        return index.ntotal * index.code_size
+    return index.ntotal * index.d * 4
+
+def recall_at_k(reference, candidate, queries: np.ndarray, k: int = 10) -> float:
+    """Share of the reference index's top-k ids that the candidate index also returns."""
+    k = min(k, reference.ntotal)
+    if k == 0 or len(queries) == 0:
+        return 1.0
+    _, expected = reference.search(queries, k)
+    _, found = candidate.search(queries, k)
+    overlap = sum(len(set(e[e != -1]) & set(f[f != -1])) for e, f in zip(expected, found))
+    return overlap / float((expected != -1).sum())
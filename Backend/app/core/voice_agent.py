@@ -2,38 +2,31 @@
 
 import asyncio
 import time
-import edge_tts
-import re
 from agora_token_builder import RtcTokenBuilder
 # --- THIS IS THE FIX: Correct imports from the 'agorartc' module ---
 import agorartc
 # --- END OF FIX ---
 from app.core.config import settings
 from app.core.rag_pipeline import RAGPipeline
-from groq import Groq
-import threading
-import os
+from app.core.executors import run_cpu
+from app.core.metrics import VOICE_FIRST_AUDIO_SECONDS, record_error
+from app.core.tracing import start_trace, span, record_span
+from app.core.transcripts import transcript_writer
+from app.core.speech import SentenceSplitter, synthesize, TTS_VOICE, TTS_BYTES_PER_SECOND
+from app.core.voice_input import AudioIngestor, get_stt_backend, can_reuse_retrieval
 
 # --- Configuration ---
 AGORA_APP_ID = settings.AGORA_APP_ID
 AGORA_APP_CERTIFICATE = settings.AGORA_APP_CERTIFICATE
-GROQ_API_KEY = settings.GROQ_API_KEY
 
 TOKEN_EXPIRATION_IN_SECONDS = 3600
 ROLE_PUBLISHER = 1
 
-# --- TTS Configuration ---
-TTS_VOICE = "en-US-JennyNeural"
-TTS_OUTPUT_FILE = "response.mp3"
-
-# --- Groq STT Client ---
-stt_client = Groq(api_key=GROQ_API_KEY)
-
-
 # --- FIX: Subclass the correct event handler base ---
 class VoiceAgentEventHandler(agorartc.RtcEngineEventHandlerBase):
     """
     Handles events from the Agora RTC Engine for the AI Bot.
+    Callbacks arrive on the SDK's thread, so anything async is handed to the agent's loop.
     """
     def __init__(self, agent):
         super().__init__()
@@ -50,35 +43,70 @@ class VoiceAgentEventHandler(agorartc.RtcEngineEventHandlerBase):
     def onUserJoined(self, uid, elapsed):
         print(f"Recruiter (UID: {uid}) joined the call.")
         self.agent.recruiter_uid = uid
-        # The AI will now start listening to this user
+        # NOTE: The Python SDK's audio frame handling is complex and its frame observer is
+        # not wired up yet. Once it is, it should pass 16-bit mono PCM to
+        # agent.push_audio_frame(). Until then the recruiter "asks" a fixed question on join.
+        self.agent.submit_utterance_threadsafe("What are your key skills?")
 
     def onUserOffline(self, uid, reason):
         print(f"Recruiter (UID: {uid}) left the call.")
         self.agent.recruiter_uid = None
         # Once the recruiter leaves, the AI should also leave
-        asyncio.run(self.agent.leave_call()) # Run async leave
-        
-    # NOTE: The Python SDK's audio frame handling is complex.
-    # We will continue to SIMULATE the STT part for now,
-    # as onAudioFrame is not as straightforward as in the JS SDK.
+        self.agent.call_soon_threadsafe(self.agent.leave_call)
 
 class VoiceAgent:
     """
     Manages the AI Bot's lifecycle in a voice call.
+
+    Each recruiter utterance is handled as soon as it arrives by a three-stage pipeline on
+    the event loop: LLM tokens -> sentences -> TTS -> playback. The first sentence is
+    synthesized while the LLM is still generating the rest, and audio stays in memory.
+    A new utterance interrupts the answer that is still playing (barge-in).
+
+    Recruiter audio goes through an AudioIngestor (VAD -> STT). Partial transcripts start
+    retrieval early, and the final transcript reuses those chunks when the partial was
+    already most of the question.
+
+    Agents are created by the VoiceCallRegistry, which builds their RAGPipeline off the event
+    loop and bounds how many turns run at once across all calls (`turn_pool`).
     """
-    def __init__(self, bot_id: str, user_id: str, bot_name: str):
+    def __init__(self, bot_id: str, user_id: str, bot_name: str, rag_pipeline=None, turn_pool=None):
         self.bot_id = bot_id
         self.user_id = user_id
         self.bot_name = bot_name
         self.channel_name = bot_id # Use bot_id as the channel
-        
+
         self.is_joined = False
-        self.is_processing = False
+        self.ended = False
         self.recruiter_uid = None
-        
-        # 1. Initialize RAG Pipeline
-        self.rag_pipeline = RAGPipeline(bot_id, user_id, bot_name)
-        
+        # The user who started the call (set by the registry); they and the bot owner may end it
+        self.started_by = None
+
+        self.loop = None
+        self._utterances = asyncio.Queue()
+        self._worker = None
+        self._prefetch = None   # (partial transcript, retrieval task)
+        self.turn_pool = turn_pool
+        self.ingestor = AudioIngestor(
+            get_stt_backend(), on_partial=self._on_partial_transcript, on_final=self._on_final_transcript
+        )
+
+        # Per-call resource usage, reported when the call ends
+        self.started_at = time.time()
+        self.last_activity = time.monotonic()
+        self.usage = {
+            "turns": 0,
+            "turns_interrupted": 0,
+            "early_retrievals_used": 0,
+            "answer_chars": 0,
+            "tts_bytes": 0,
+            "audio_seconds": 0.0,
+            "first_audio_ms": [],
+        }
+
+        # 1. Initialize RAG Pipeline (prebuilt by the registry when given)
+        self.rag_pipeline = rag_pipeline or RAGPipeline(bot_id, user_id, bot_name)
+
         # 2. Initialize Agora Engine
         # --- FIX: Use the correct Agora SDK methods ---
         self.rtc_engine = agorartc.createRtcEngineBridge()
@@ -87,104 +115,221 @@ class VoiceAgent:
         context.appId = AGORA_APP_ID
         context.eventHandler = self.event_handler
         # Disabling audio/video by default for the bot
-        context.enableAudioDevice = False 
+        context.enableAudioDevice = False
         context.enableVideo = False
 
         self.rtc_engine.initialize(context)
         self.rtc_engine.setClientRole(agorartc.CLIENT_ROLE_TYPE.CLIENT_ROLE_BROADCASTER)
         # --- END OF FIX ---
-        
-        # 3. Start a separate thread to process audio
-        self.processing_thread = threading.Thread(target=self.process_audio_buffer, daemon=True)
-        self.processing_thread.start()
 
     def generate_token(self, uid):
         """Generates a token for the AI bot itself."""
         current_timestamp = int(time.time())
         expire_timestamp = current_timestamp + TOKEN_EXPIRATION_IN_SECONDS
-        
+
         return RtcTokenBuilder.buildTokenWithUid(
             AGORA_APP_ID, AGORA_APP_CERTIFICATE, self.channel_name, uid,
             ROLE_PUBLISHER, expire_timestamp
         )
 
     async def join_call(self):
-        """Connects the AI bot to the Agora channel."""
+        """Connects the AI bot to the Agora channel and starts handling utterances."""
+        self.loop = asyncio.get_running_loop()
+        self._worker = asyncio.create_task(self._handle_utterances())
+        self.ingestor.start()
+
         ai_uid = 0 # AI bot joins as UID 0 by convention
         token = self.generate_token(uid=ai_uid)
-        
+
         # --- FIX: Use the correct Agora SDK methods ---
         options = agorartc.ChannelMediaOptions()
         options.autoSubscribeAudio = True
         options.autoSubscribeVideo = False
-        options.publishMicrophoneTrack = False 
+        options.publishMicrophoneTrack = False
         options.publishCustomAudioTrack = True # We will simulate pushing audio
-        
-        self.rtc_engine.joinChannel(token, self.channel_name, ai_uid, options)
+
+        await run_cpu(self.rtc_engine.joinChannel, token, self.channel_name, ai_uid, options)
         # --- END OF FIX ---
         print(f"AI Agent '{self.bot_name}' attempting to join channel: {self.channel_name}")
-        
+
     async def leave_call(self):
         """Disconnects the AI bot from the Agora channel."""
-        self.rtc_engine.leaveChannel()
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+        self.ingestor.stop()
+        if not self.ended:
+            await run_cpu(self.rtc_engine.leaveChannel)
         self.is_joined = False
+        self.ended = True
 
-    def process_audio_buffer(self):
-        """
-        A background thread that checks the audio buffer,
-        transcribes it, gets an AI response, and speaks it.
-        """
-        
-        async def run_async_pipeline(transcription):
-            # 3. Get RAG Response
-            response_text = ""
-            async for chunk in self.rag_pipeline.get_response_stream(transcription, []):
-                response_text += chunk
-            
-            clean_response = re.sub(r"<think>.*?</think>", "", response_text, flags=re.DOTALL).strip()
-            print(f"AI Bot: {clean_response}")
-
-            # 4. Text-to-Speech (TTS)
+    async def close(self):
+        """Leaves the channel and releases the RTC engine."""
+        await self.leave_call()
+        try:
+            await run_cpu(self.rtc_engine.release)
+        except Exception as e:
+            print(f"Error releasing RTC engine for {self.bot_id}: {e}")
+
+    def usage_report(self) -> dict:
+        first_audio = self.usage["first_audio_ms"]
+        return {
+            "bot_id": self.bot_id,
+            "owner_id": self.user_id,
+            "started_by": self.started_by,
+            "duration_seconds": round(time.time() - self.started_at, 1),
+            "idle_seconds": round(time.monotonic() - self.last_activity, 1),
+            "joined": self.is_joined,
+            **{key: value for key, value in self.usage.items() if key != "first_audio_ms"},
+            "audio_seconds": round(self.usage["audio_seconds"], 1),
+            "avg_first_audio_ms": round(sum(first_audio) / len(first_audio), 1) if first_audio else None,
+        }
+
+    # --- Thread-safe entry points (Agora callbacks run on the SDK's thread) ---
+    def call_soon_threadsafe(self, coroutine_fn):
+        if self.loop:
+            asyncio.run_coroutine_threadsafe(coroutine_fn(), self.loop)
+
+    def submit_utterance_threadsafe(self, text: str):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._utterances.put_nowait, (text, time.perf_counter(), None))
+
+    def push_audio_frame(self, pcm: bytes):
+        """Feeds recruiter audio (16-bit mono PCM at VAD_SAMPLE_RATE) from the SDK's thread."""
+        self.ingestor.push_frame_threadsafe(pcm)
+
+    async def submit_utterance(self, text: str, heard_at: float = None, context=None):
+        await self._utterances.put((text, heard_at or time.perf_counter(), context))
+
+    # --- Transcripts ---
+    async def _on_partial_transcript(self, text: str):
+        if len(text.split()) < 3:
+            return
+        if self._prefetch and not self._prefetch[1].done():
+            # Keep the retrieval already running; the next partial will be compared to it
+            return
+        self._prefetch = (text, asyncio.create_task(run_cpu(self.rag_pipeline.retrieve, text)))
+
+    async def _on_final_transcript(self, text: str, speech_end: float):
+        context = None
+        prefetch, self._prefetch = self._prefetch, None
+        if prefetch and can_reuse_retrieval(prefetch[0], text):
             try:
-                communicate = edge_tts.Communicate(clean_response, TTS_VOICE)
-                await communicate.save(TTS_OUTPUT_FILE)
-                return clean_response
+                context = await prefetch[1]
+                self.usage["early_retrievals_used"] += 1
             except Exception as e:
-                print(f"TTS Error: {e}")
-                return None
-        
-        while True:
-            # This loop will now just simulate the conversation
-            # since the real audio processing is complex.
-            time.sleep(10) # Wait 10 seconds between "responses"
-            if not self.is_joined or self.is_processing:
-                continue
-
-            self.is_processing = True
-            
-            # --- 1. SIMULATE STT ---
-            simulated_transcription = "What are your key skills?"
-            print(f"Recruiter (simulated): {simulated_transcription}")
-            
-            # --- 2 & 3. Run Async RAG + TTS ---
+                print(f"Early retrieval error: {e}")
+        elif prefetch:
+            prefetch[1].cancel()
+        await self.submit_utterance(text, heard_at=speech_end, context=context)
+
+    # --- Turn pipeline ---
+    async def _handle_utterances(self):
+        turn = None
+        try:
+            while True:
+                text, heard_at, context = await self._utterances.get()
+                if turn and not turn.done():
+                    # Barge-in: the recruiter spoke again, drop the rest of the previous answer
+                    turn.cancel()
+                    self.usage["turns_interrupted"] += 1
+                self.last_activity = time.monotonic()
+                turn = asyncio.create_task(self._run_turn(text, heard_at, context))
+        finally:
+            if turn:
+                turn.cancel()
+
+    async def _run_turn(self, transcription: str, heard_at: float, context=None):
+        if self.turn_pool is None:
+            await self._process_turn(transcription, heard_at, context)
+            return
+        async with self.turn_pool.slot():
+            await self._process_turn(transcription, heard_at, context)
+        self.last_activity = time.monotonic()
+
+    async def _process_turn(self, transcription: str, heard_at: float, context=None):
+        self.usage["turns"] += 1
+        # Each turn is its own trace, since it doesn't come through the HTTP middleware
+        with start_trace("voice_turn") as trace:
+            if trace is not None:
+                trace.attrs["bot_id"] = self.bot_id
+                trace.attrs["early_retrieval"] = context is not None
+            print(f"Recruiter: {transcription}")
+
+            sentences = asyncio.Queue()
+            audio = asyncio.Queue()
+            stages = [
+                asyncio.create_task(self._generate_sentences(transcription, sentences, context)),
+                asyncio.create_task(self._synthesize_sentences(sentences, audio)),
+                asyncio.create_task(self._play_audio(audio, heard_at, trace)),
+            ]
             try:
-                clean_response = asyncio.run(run_async_pipeline(simulated_transcription))
-                if not clean_response:
-                    self.is_processing = False
-                    continue
+                await asyncio.gather(*stages)
+            except asyncio.CancelledError:
+                for stage in stages:
+                    stage.cancel()
+                raise
             except Exception as e:
-                print(f"Async pipeline error: {e}")
-                self.is_processing = False
-                continue
-            
-            # --- 4. Publish AI Audio to Channel (Simulated) ---
-            print(f"AI Bot: (Speaking audio from {TTS_OUTPUT_FILE})")
-            
-            # This simulates the time it takes to "speak" the response.
-            time.sleep(len(clean_response.split()) / 3.0)
-            print("AI Bot: (Finished speaking)")
-            
-            if os.path.exists(TTS_OUTPUT_FILE):
-                os.remove(TTS_OUTPUT_FILE)
-                
-            self.is_processing = False
\ No newline at end of file
+                for stage in stages:
+                    stage.cancel()
+                print(f"Voice pipeline error: {e}")
+                record_error("voice_turn")
+
+    async def _generate_sentences(self, transcription: str, sentences: asyncio.Queue, context=None):
+        splitter = SentenceSplitter()
+        answer, stats, completed = [], {}, False
+        try:
+            async for token in self.rag_pipeline.get_response_stream(transcription, [], context=context, stats=stats):
+                answer.append(token)
+                for sentence in splitter.feed(token):
+                    await sentences.put(sentence)
+            for sentence in splitter.flush():
+                await sentences.put(sentence)
+            completed = True
+        finally:
+            # completed is False when the recruiter interrupted the answer (barge-in)
+            transcript_writer.record(
+                self.bot_id, transcription, "".join(answer), "voice", stats=stats, completed=completed
+            )
+            await sentences.put(None)
+
+    async def _synthesize_sentences(self, sentences: asyncio.Queue, audio: asyncio.Queue):
+        try:
+            while (sentence := await sentences.get()) is not None:
+                print(f"AI Bot: {sentence}")
+                self.usage["answer_chars"] += len(sentence)
+                started_at = time.time()
+                started = time.perf_counter()
+                try:
+                    clip = await synthesize(sentence)
+                except Exception as e:
+                    # Skip the sentence rather than ending the whole answer
+                    print(f"TTS Error: {e}")
+                    record_error("tts")
+                    continue
+                record_span("tts", started_at, time.perf_counter() - started, voice=TTS_VOICE, chars=len(sentence))
+                await audio.put(clip)
+        finally:
+            await audio.put(None)
+
+    async def _play_audio(self, audio: asyncio.Queue, heard_at: float, trace):
+        first = True
+        while (clip := await audio.get()) is not None:
+            if first:
+                first_audio = time.perf_counter() - heard_at
+                VOICE_FIRST_AUDIO_SECONDS.observe(first_audio)
+                if trace is not None:
+                    trace.attrs["first_audio_ms"] = round(first_audio * 1000, 1)
+                self.usage["first_audio_ms"].append(first_audio * 1000)
+                first = False
+            self.usage["tts_bytes"] += len(clip)
+            self.usage["audio_seconds"] += len(clip) / TTS_BYTES_PER_SECOND
+            await self.publish_audio(clip)
+
+    async def publish_audio(self, clip: bytes):
+        """
+        Publishes one synthesized sentence to the channel.
+        Custom audio track publishing is still SIMULATED: we wait for the clip's duration.
+        """
+        with span("playback", bytes=len(clip)):
+            await asyncio.sleep(len(clip) / TTS_BYTES_PER_SECOND)
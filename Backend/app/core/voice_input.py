@@ -0,0 +1,276 @@
+# app/core/voice_input.py
+#
+# Audio ingestion for voice calls: PCM frames -> voice activity detection -> utterance
+# segments -> speech-to-text. Partial transcripts are emitted while the recruiter is still
+# talking so retrieval can start before they finish.
+
+import asyncio
+import io
+import time
+import wave
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.executors import run_io
+from app.core.metrics import STT_SECONDS, record_error
+
+# --- VAD Tuning ---
+# Frames must carry 16-bit mono PCM at VAD_SAMPLE_RATE
+MIN_SPEECH_RMS = 0.01         # absolute floor (~ -40 dBFS), so digital silence never counts
+NOISE_RATIO = 3.0             # speech must be this many times louder than the noise floor
+NOISE_ALPHA = 0.05            # noise floor EMA weight, updated on non-speech frames only
+START_FRAMES = 3              # consecutive voiced frames that open an utterance
+PRE_ROLL_MS = 200             # audio kept from before the utterance opened (soft onsets)
+WORDS_PER_SECOND = 2.5        # used by the file stand-in to size partial transcripts
+
+class EnergyVAD:
+    """Frame-level energy VAD with an adaptive noise floor. Cheap enough for every call."""
+    def __init__(self):
+        self.noise_floor = MIN_SPEECH_RMS / NOISE_RATIO
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(np.square(frame, dtype=np.float64)))) / 32768.0
+        voiced = rms > max(MIN_SPEECH_RMS, self.noise_floor * NOISE_RATIO)
+        if not voiced:
+            self.noise_floor = (1 - NOISE_ALPHA) * self.noise_floor + NOISE_ALPHA * rms
+        return voiced
+
+class UtteranceSegmenter:
+    """
+    Cuts a continuous PCM stream into utterances.
+
+    feed() returns events as tuples:
+      ("partial", pcm, None)         every VAD_PARTIAL_INTERVAL_MS of ongoing speech
+      ("final", pcm, speech_end)     after VAD_SILENCE_MS of silence; speech_end is the
+                                     perf_counter time of the last voiced frame
+    Utterances shorter than VAD_MIN_SPEECH_MS (coughs, clicks) are dropped.
+    """
+    def __init__(self, sample_rate: int = None, frame_ms: int = None):
+        self.sample_rate = sample_rate or settings.VAD_SAMPLE_RATE
+        frame_ms = frame_ms or settings.VAD_FRAME_MS
+        self.frame_samples = self.sample_rate * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.vad = EnergyVAD()
+        self._buffer = b""
+        self._pre_roll = deque(maxlen=max(1, PRE_ROLL_MS // frame_ms))
+        self._speech = []
+        self._in_speech = False
+        self._voiced_run = 0
+        self._silence_ms = 0
+        self._voiced_ms = 0
+        self._since_partial_ms = 0
+        self._last_voiced_at = None
+
+    def feed(self, pcm: bytes, now: Optional[float] = None) -> list:
+        now = now if now is not None else time.perf_counter()
+        self._buffer += pcm
+        frame_bytes = self.frame_samples * 2
+        events = []
+        while len(self._buffer) >= frame_bytes:
+            raw, self._buffer = self._buffer[:frame_bytes], self._buffer[frame_bytes:]
+            voiced = self.vad.is_speech(np.frombuffer(raw, dtype=np.int16))
+            event = self._step(raw, voiced, now)
+            if event:
+                events.append(event)
+        return events
+
+    def _step(self, raw: bytes, voiced: bool, now: float):
+        if not self._in_speech:
+            self._pre_roll.append(raw)
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= START_FRAMES:
+                self._in_speech = True
+                self._speech = list(self._pre_roll)
+                self._voiced_ms = self._voiced_run * self.frame_ms
+                self._silence_ms = self._since_partial_ms = 0
+                self._last_voiced_at = now
+            return None
+
+        self._speech.append(raw)
+        if voiced:
+            self._voiced_ms += self.frame_ms
+            self._silence_ms = 0
+            self._last_voiced_at = now
+        else:
+            self._silence_ms += self.frame_ms
+
+        if self._silence_ms >= settings.VAD_SILENCE_MS:
+            return self._close()
+
+        self._since_partial_ms += self.frame_ms
+        if self._since_partial_ms >= settings.VAD_PARTIAL_INTERVAL_MS:
+            self._since_partial_ms = 0
+            return ("partial", b"".join(self._speech), None)
+        return None
+
+    def _close(self):
+        pcm = b"".join(self._speech)
+        voiced_ms, speech_end = self._voiced_ms, self._last_voiced_at
+        self._in_speech = False
+        self._speech = []
+        self._voiced_run = 0
+        self._pre_roll.clear()
+        if voiced_ms < settings.VAD_MIN_SPEECH_MS:
+            return None
+        return ("final", pcm, speech_end)
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wraps raw 16-bit mono PCM in a WAV container (in memory) for STT APIs."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+# --- STT Backends ---
+class STTBackend(ABC):
+    """Speech-to-text interface. `final` is False for partial (in-progress) segments."""
+    name = "base"
+
+    @abstractmethod
+    async def transcribe(self, pcm: bytes, sample_rate: int, final: bool) -> str:
+        """Text spoken in the 16-bit mono PCM segment."""
+
+class GroqSTT(STTBackend):
+    """Groq-hosted Whisper; the blocking client call runs on the io pool."""
+    name = "groq"
+
+    def __init__(self):
+        from groq import Groq
+        self.client = Groq(api_key=settings.GROQ_API_KEY)
+
+    def _transcribe(self, wav: bytes) -> str:
+        result = self.client.audio.transcriptions.create(
+            file=("utterance.wav", wav),
+            model=settings.STT_MODEL,
+            language="en",
+        )
+        return result.text.strip()
+
+    async def transcribe(self, pcm: bytes, sample_rate: int, final: bool) -> str:
+        return await run_io(self._transcribe, pcm_to_wav(pcm, sample_rate))
+
+class FileTranscriptSTT(STTBackend):
+    """
+    Local stand-in for tests and benchmarks: returns the next line of a transcript file for
+    each final segment. Partials return the words a speaker would have said so far
+    (WORDS_PER_SECOND of audio), so early retrieval can be exercised without a real model.
+    """
+    name = "file"
+
+    def __init__(self, transcripts: list, latency_ms: float = 0.0):
+        self.transcripts = transcripts
+        self.latency = latency_ms / 1000.0
+        self._index = 0
+
+    @classmethod
+    def from_file(cls, path: str, latency_ms: float = 0.0):
+        with open(path, encoding="utf-8") as f:
+            return cls([line.strip() for line in f if line.strip()], latency_ms)
+
+    async def transcribe(self, pcm: bytes, sample_rate: int, final: bool) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._index >= len(self.transcripts):
+            return ""
+        text = self.transcripts[self._index]
+        if final:
+            self._index += 1
+            return text
+        words = text.split()
+        spoken = int(len(pcm) / 2 / sample_rate * WORDS_PER_SECOND)
+        return " ".join(words[:min(spoken, len(words) - 1)])
+
+def get_stt_backend() -> STTBackend:
+    if settings.STT_BACKEND == "file":
+        if not settings.STT_TRANSCRIPT_FILE:
+            raise ValueError("STT_BACKEND=file requires STT_TRANSCRIPT_FILE")
+        return FileTranscriptSTT.from_file(settings.STT_TRANSCRIPT_FILE)
+    return GroqSTT()
+
+def can_reuse_retrieval(partial: str, final: str, min_coverage: float = None) -> bool:
+    """
+    True when retrieval done for a partial transcript is good enough for the final one:
+    the partial is a prefix of the final text and covers most of its words.
+    """
+    min_coverage = settings.VAD_PARTIAL_REUSE_COVERAGE if min_coverage is None else min_coverage
+    partial_words = partial.lower().split()
+    final_words = final.lower().split()
+    if not partial_words or not final_words:
+        return False
+    if final_words[:len(partial_words)] != partial_words:
+        return False
+    return len(partial_words) / len(final_words) >= min_coverage
+
+class AudioIngestor:
+    """
+    Runs on the event loop: takes PCM frames (thread-safe, from the RTC SDK's audio callback),
+    segments them and calls on_partial(text) / on_final(text, speech_end) coroutines.
+    At most one partial transcription is in flight; newer partials are skipped meanwhile.
+    """
+    def __init__(self, stt: STTBackend, on_partial, on_final, sample_rate: int = None):
+        self.stt = stt
+        self.on_partial = on_partial
+        self.on_final = on_final
+        self.segmenter = UtteranceSegmenter(sample_rate)
+        self.sample_rate = self.segmenter.sample_rate
+        self.loop = None
+        self._frames = asyncio.Queue()
+        self._partial_task = None
+        self._task = None
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        for task in (self._task, self._partial_task):
+            if task:
+                task.cancel()
+
+    def push_frame_threadsafe(self, pcm: bytes):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._frames.put_nowait, (pcm, time.perf_counter()))
+
+    def push_frame(self, pcm: bytes):
+        self._frames.put_nowait((pcm, time.perf_counter()))
+
+    async def _run(self):
+        while True:
+            pcm, received_at = await self._frames.get()
+            for kind, segment, speech_end in self.segmenter.feed(pcm, received_at):
+                if kind == "partial":
+                    if self._partial_task is None or self._partial_task.done():
+                        self._partial_task = asyncio.create_task(self._transcribe_partial(segment))
+                else:
+                    # A final supersedes any partial still being transcribed
+                    if self._partial_task and not self._partial_task.done():
+                        self._partial_task.cancel()
+                    await self._transcribe_final(segment, speech_end)
+
+    async def _transcribe_partial(self, segment: bytes):
+        try:
+            text = await self.stt.transcribe(segment, self.sample_rate, final=False)
+        except Exception as e:
+            print(f"Partial STT error: {e}")
+            return
+        if text:
+            await self.on_partial(text)
+
+    async def _transcribe_final(self, segment: bytes, speech_end: float):
+        started = time.perf_counter()
+        try:
+            text = await self.stt.transcribe(segment, self.sample_rate, final=True)
+        except Exception as e:
+            print(f"STT error: {e}")
+            record_error("stt")
+            return
+        STT_SECONDS.labels(self.stt.name).observe(time.perf_counter() - started)
+        if text:
+            await self.on_final(text, speech_end)
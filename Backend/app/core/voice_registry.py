@@ -0,0 +1,186 @@
+# app/core/voice_registry.py
+
+import asyncio
+import importlib.util
+import time
+from functools import lru_cache
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+from app.core.executors import run_cpu
+from app.core.metrics import VOICE_ACTIVE_CALLS, VOICE_CALLS_REJECTED, VOICE_CALLS_ENDED, VOICE_TURN_QUEUE_SECONDS
+
+# NOTE: app.core.voice_agent (edge-tts, the Agora SDK, Groq) is imported when the first call
+# starts, so the API still boots on machines without the voice dependencies.
+
+# Imported lazily by the voice agent; agorartc comes from the Agora SDK, not from PyPI
+VOICE_MODULES = ("agorartc", "agora_token_builder", "edge_tts")
+
+class VoiceCapacityError(Exception):
+    """Raised when a new call would exceed VOICE_MAX_CALLS."""
+
+class VoiceUnavailableError(Exception):
+    """Raised when the packages voice calls need are not installed."""
+
+@lru_cache(maxsize=1)
+def missing_voice_modules() -> tuple:
+    """Checked once per process; /ready reports it too."""
+    return tuple(name for name in VOICE_MODULES if importlib.util.find_spec(name) is None)
+
+class VoiceTurnPool:
+    """
+    Bounds how many voice turns (LLM + TTS) run at once across every call in this worker.
+    Calls beyond that wait for a free slot instead of each getting their own thread.
+    """
+    def __init__(self, max_turns: int):
+        self.max_turns = max_turns
+        self._semaphore = asyncio.Semaphore(max_turns)
+        self.active = 0
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        self.waiting += 1
+        queued = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        VOICE_TURN_QUEUE_SECONDS.observe(time.perf_counter() - queued)
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {"max_turns": self.max_turns, "active": self.active, "waiting": self.waiting}
+
+class VoiceCallRegistry:
+    """
+    Tracks live voice calls. The channel is the bot id, so a bot has at most one call (and
+    one agent with its own RAGPipeline) at a time.
+
+    - Admission control: start_call raises VoiceCapacityError past VOICE_MAX_CALLS
+    - A sweeper ends calls the recruiter left and calls idle for VOICE_IDLE_TIMEOUT_SECONDS
+    - Finished calls keep their usage report in a short history for /agora/calls
+    """
+    def __init__(self):
+        self.agents = {}
+        self._lock = asyncio.Lock()
+        self._sweeper = None
+        self.turn_pool = None
+        self.ended_calls = []
+
+    def _pool(self) -> VoiceTurnPool:
+        # Created lazily so the semaphore binds to the running loop
+        if self.turn_pool is None:
+            self.turn_pool = VoiceTurnPool(settings.VOICE_MAX_CONCURRENT_TURNS)
+        return self.turn_pool
+
+    def start(self):
+        """Starts the idle sweeper; call from inside the event loop (lifespan)."""
+        self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def start_call(self, bot_id: str, user_id: str, bot_name: str, started_by: str = None):
+        """Returns (agent, created). An existing live call on the channel is reused."""
+        missing = missing_voice_modules()
+        if missing:
+            raise VoiceUnavailableError(f"Voice calls are not available on this server (missing: {', '.join(missing)})")
+        async with self._lock:
+            agent = self.agents.get(bot_id)
+            if agent is not None and not agent.ended:
+                return agent, False
+            # Free the slots of calls the recruiter already left before checking capacity
+            for ended_id in [key for key, other in self.agents.items() if other.ended]:
+                await self._end(ended_id, "ended")
+            if len(self.agents) >= settings.VOICE_MAX_CALLS:
+                VOICE_CALLS_REJECTED.inc()
+                raise VoiceCapacityError(f"Voice capacity reached ({settings.VOICE_MAX_CALLS} calls)")
+
+            from app.core.voice_agent import VoiceAgent
+            from app.core.rag_pipeline import RAGPipeline
+
+            # Built on the CPU pool: loading the FAISS index would otherwise block the loop
+            pipeline = await run_cpu(RAGPipeline, bot_id, user_id, bot_name)
+            agent = await run_cpu(
+                VoiceAgent, bot_id, user_id, bot_name, rag_pipeline=pipeline, turn_pool=self._pool()
+            )
+            agent.started_by = started_by
+            self.agents[bot_id] = agent
+            VOICE_ACTIVE_CALLS.set(len(self.agents))
+
+        try:
+            await agent.join_call()
+        except Exception:
+            await self.end_call(bot_id, "failed")
+            raise
+        return agent, True
+
+    async def end_call(self, bot_id: str, reason: str = "ended") -> dict:
+        async with self._lock:
+            return await self._end(bot_id, reason)
+
+    async def _end(self, bot_id: str, reason: str):
+        agent = self.agents.pop(bot_id, None)
+        if agent is None:
+            return None
+        VOICE_ACTIVE_CALLS.set(len(self.agents))
+        VOICE_CALLS_ENDED.labels(reason).inc()
+        try:
+            await agent.close()
+        except Exception as e:
+            print(f"Error closing voice call {bot_id}: {e}")
+
+        report = {**agent.usage_report(), "end_reason": reason}
+        print(f"Voice call ended: {report}")
+        self.ended_calls = (self.ended_calls + [report])[-settings.VOICE_CALL_HISTORY:]
+        return report
+
+    async def sweep(self):
+        """Ends calls the recruiter has left and calls idle past VOICE_IDLE_TIMEOUT_SECONDS."""
+        now = time.monotonic()
+        async with self._lock:
+            for bot_id, agent in list(self.agents.items()):
+                if agent.ended:
+                    await self._end(bot_id, "ended")
+                elif now - agent.last_activity > settings.VOICE_IDLE_TIMEOUT_SECONDS:
+                    await self._end(bot_id, "idle")
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(settings.VOICE_SWEEP_INTERVAL_SECONDS)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Voice sweeper error: {e}")
+
+    async def shutdown(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+        async with self._lock:
+            for bot_id in list(self.agents):
+                await self._end(bot_id, "shutdown")
+
+    def stats(self) -> dict:
+        return {
+            "active_calls": len(self.agents),
+            "max_calls": settings.VOICE_MAX_CALLS,
+            "missing_modules": list(missing_voice_modules()),
+            "turns": self.turn_pool.stats() if self.turn_pool else None,
+        }
+
+    def get(self, bot_id: str):
+        return self.agents.get(bot_id)
+
+    def usage(self, user_id: str = None) -> dict:
+        """Usage of active and recent calls; only calls on user_id's bots when given."""
+        def visible(report: dict) -> bool:
+            return user_id is None or report.get("owner_id") == user_id
+        return {
+            "active": [r for r in (agent.usage_report() for agent in self.agents.values()) if visible(r)],
+            "recently_ended": [r for r in self.ended_calls[::-1] if visible(r)],
+        }
+
+voice_registry = VoiceCallRegistry()
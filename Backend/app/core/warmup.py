@@ -0,0 +1,101 @@
+# app/core/warmup.py
+
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.executors import run_cpu
+
+class WarmupState:
+    """
+    Progress of the startup warmup, reported by the /ready endpoint.
+    """
+    def __init__(self):
+        self.ready = not settings.WARMUP_ENABLED
+        self.started_at = None
+        self.finished_at = None
+        self.timings_ms = {}
+        self.errors = {}
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup_seconds": round(self.finished_at - self.started_at, 2) if self.finished_at and self.started_at else None,
+            "timings_ms": self.timings_ms,
+            "errors": self.errors,
+        }
+
+warmup_state = WarmupState()
+
+async def _timed_step(name: str, fn, *args):
+    """Runs a blocking warmup step in a thread and records its duration (or error)."""
+    started = time.perf_counter()
+    try:
+        return await run_cpu(fn, *args)
+    except Exception as e:
+        print(f"Warmup step '{name}' failed: {e}")
+        warmup_state.errors[name] = str(e)
+        return None
+    finally:
+        warmup_state.timings_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+
+def _import_ml_stack():
+    # Pays the langchain / FAISS import cost up front instead of on the first chat
+    from langchain_community.vectorstores import FAISS  # noqa: F401
+    from langchain_classic.chains import create_retrieval_chain  # noqa: F401
+    from langchain_classic.chains.combine_documents import create_stuff_documents_chain  # noqa: F401
+    from langchain_groq import ChatGroq  # noqa: F401
+
+def _warm_embeddings():
+    from app.core.embeddings import get_embeddings
+    get_embeddings().embed_query("warmup")
+
+def _warm_global_index():
+    from app.core.rag_pipeline import GlobalRecruiterIndex
+    GlobalRecruiterIndex().warm()
+
+def _warm_bot_indexes(bots: list) -> int:
+    from app.core.embeddings import get_embeddings
+    from app.core.rag_pipeline import load_bot_vector_store
+
+    loaded = 0
+    for bot in bots:
+        index_path = Path("data") / str(bot["user_id"]) / str(bot["_id"]) / "faiss_index"
+        try:
+            if load_bot_vector_store(index_path, get_embeddings()) is not None:
+                loaded += 1
+        except Exception as e:
+            print(f"Warmup could not load index for bot {bot['_id']}: {e}")
+    return loaded
+
+async def run_warmup():
+    """
+    Preloads the embedding model (and runs a dummy embedding), the global index and the
+    indexes of the most recently used bots, then flips warmup_state.ready.
+    """
+    if not settings.WARMUP_ENABLED:
+        return
+    from app.db.session import bots_collection, ACTIVE_BOT_FILTER
+
+    warmup_state.started_at = time.time()
+    await _timed_step("import_ml_stack", _import_ml_stack)
+    await _timed_step("embedding_model", _warm_embeddings)
+
+    if settings.WARMUP_GLOBAL_INDEX:
+        await _timed_step("global_index", _warm_global_index)
+
+    if settings.WARMUP_RECENT_BOTS > 0:
+        try:
+            recent_bots = await bots_collection.find(
+                {"last_chat_at": {"$exists": True}, **ACTIVE_BOT_FILTER},
+                {"user_id": 1}
+            ).sort("last_chat_at", -1).to_list(settings.WARMUP_RECENT_BOTS)
+        except Exception as e:
+            print(f"Warmup could not list recent bots: {e}")
+            warmup_state.errors["recent_bots"] = str(e)
+            recent_bots = []
+        await _timed_step("recent_bot_indexes", _warm_bot_indexes, recent_bots)
+
+    warmup_state.finished_at = time.time()
+    warmup_state.ready = True
+    print(f"Warmup finished: {warmup_state.timings_ms}")
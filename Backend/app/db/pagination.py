@@ -0,0 +1,45 @@
+# app/db/pagination.py
+
+from typing import Optional, Tuple, List
+from bson import ObjectId
+from fastapi import HTTPException, Query
+
+# Header used to hand the next keyset cursor back to the client.
+# List endpoints keep returning a plain JSON array so existing clients keep working.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+class PageParams:
+    """
+    Query parameters shared by every keyset-paginated listing endpoint.
+    `after` is the `_id` of the last item of the previous page.
+    """
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = Query(None, description="Cursor returned in the X-Next-Cursor header"),
+    ):
+        if after is not None and not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        self.limit = limit
+        self.after = ObjectId(after) if after else None
+
+async def fetch_page(collection, query: dict, page: PageParams, projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    Runs a keyset-paginated find ordered by `_id`.
+    Fetches one extra document to know whether another page exists, so no count query is needed.
+    Returns (documents, next_cursor).
+    """
+    if page.after is not None:
+        query = {**query, "_id": {"$gt": page.after}}
+
+    cursor = collection.find(query, projection).sort("_id", 1).limit(page.limit + 1)
+    docs = await cursor.to_list(page.limit + 1)
+
+    next_cursor = None
+    if len(docs) > page.limit:
+        docs = docs[:page.limit]
+        next_cursor = str(docs[-1]["_id"])
+    return docs, next_cursor
@@ -2,13 +2,16 @@
 
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.core.metrics import MongoCommandTimer
 import certifi # <-- Import certifi
 
 # --- THIS IS THE FIX ---
 # Add tlsCAFile=certifi.where() to the client connection
 client = AsyncIOMotorClient(
     settings.MONGO_CONNECTION_STRING,
-    tlsCAFile=certifi.where()
+    tlsCAFile=certifi.where(),
+    # Records per-command latency for the /metrics endpoint
+    event_listeners=[MongoCommandTimer()]
 )
 # --- END OF FIX ---
 
@@ -17,4 +20,11 @@ database = client[settings.MONGO_DB_NAME]
 # Define collections
 users_collection = database["users"]
 bots_collection = database["bots"]
-api_keys_collection = database["api_keys"]
\ No newline at end of file
+api_keys_collection = database["api_keys"]
+# Chat turns, written in batches by app.core.transcripts
+transcripts_collection = database["chat_transcripts"]
+# Talent-pool counters (skills, experience, skill pairs), maintained by app.core.talent_analytics
+analytics_collection = database["talent_analytics"]
+
+# Bots flagged "deleted" are hidden immediately and purged by a background task
+ACTIVE_BOT_FILTER = {"deleted": {"$ne": True}}
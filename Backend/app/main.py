@@ -1,16 +1,46 @@
 # app/main.py
 
-from fastapi import FastAPI, APIRouter
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter, Depends
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from app.api.v1.endpoints import auth, bots, api_keys, users, oauth, recruiter
+from app.api.v1.endpoints import auth, bots, api_keys, users, oauth, recruiter, debug
 from app.core.config import settings
+from app.db.pagination import NEXT_CURSOR_HEADER
 from app.api.v1.endpoints import agora  # <-- 1. IMPORT THE NEW ROUTER
+from app.core.warmup import run_warmup, warmup_state
+from app.core.metrics import MetricsMiddleware, track_endpoint, render_metrics
+from app.core.tracing import TracingMiddleware, TRACE_HEADER
+from app.core.executors import executor_stats, shutdown_executors
+from app.core.loop_monitor import loop_monitor
+from app.core.voice_registry import voice_registry
+from app.core.rate_limit import rate_limiter, RATE_LIMIT_HEADERS
+from app.core.uploads import UploadSizeLimitMiddleware
+from app.core.transcripts import transcript_writer
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    # Warm up in the background so auth/user routes are served while the ML stack loads
+    warmup_task = asyncio.create_task(run_warmup())
+    voice_registry.start()
+    transcript_writer.start()
+    yield
+    warmup_task.cancel()
+    await voice_registry.shutdown()
+    # After the voice calls, so their last turns are still written
+    await transcript_writer.stop()
+    loop_monitor.stop()
+    shutdown_executors()
 
 app = FastAPI(
     title="TwinlyAI API",
     description="API for the TwinlyAI SaaS application.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -18,6 +48,9 @@ app.add_middleware(
     secret_key=settings.SESSION_SECRET_KEY
 )
 
+# Inside CORS, so browsers can read the 413
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # --- FIX: Updated CORS Middleware ---
 origins = [
     "http://localhost:3000",
@@ -36,10 +69,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TRACE_HEADER, *RATE_LIMIT_HEADERS],
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
 # API Router Setup
-api_router = APIRouter()
+# track_endpoint labels cache/error metrics with the route that triggered them
+api_router = APIRouter(dependencies=[Depends(track_endpoint)])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(bots.router, prefix="/bots", tags=["bots"])
 api_router.include_router(api_keys.router, prefix="/api-keys", tags=["api-keys"])
@@ -47,9 +85,45 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(oauth.router, prefix="/oauth", tags=["oauth"])
 api_router.include_router(recruiter.router, prefix="/recruiter", tags=["recruiter"])
 api_router.include_router(agora.router, prefix="/agora", tags=["agora"]) # <-- 2. ADD THE NEW ROUTER
+api_router.include_router(debug.router, prefix="/debug", tags=["debug"])
 
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to TwinlyAI API"}
\ No newline at end of file
+    return {"message": "Welcome to TwinlyAI API"}
+
+@app.get("/ready")
+def readiness():
+    """
+    Readiness probe for the load balancer: 503 until warmup has finished.
+    Also reports warmup timings and what is currently cached in memory.
+    """
+    from app.core.rag_pipeline import bot_vector_store_cache_info
+    from app.core.index_store import snapshot_cache_info
+    from app.core.tts_cache import tts_cache
+    from app.core.talent_matcher import candidate_matrix_info
+    from app.core.talent_analytics import talent_analytics
+
+    body = {
+        **warmup_state.as_dict(),
+        "caches": {
+            "bot_indexes": bot_vector_store_cache_info(),
+            "global_index_generations": snapshot_cache_info(),
+            "candidate_matrix": candidate_matrix_info(),
+            "tts": tts_cache.info(),
+            "talent_analytics": talent_analytics.info(),
+        },
+        "executors": executor_stats(),
+        "event_loop": loop_monitor.stats(),
+        "voice": voice_registry.stats(),
+        "rate_limits": rate_limiter.info(),
+        "transcripts": transcript_writer.stats(),
+    }
+    return JSONResponse(body, status_code=200 if warmup_state.ready else 503)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -32,4 +32,7 @@ class Bot(BotBase):
     class Config:
         json_encoders = {ObjectId: str}
         populate_by_name = True
-        arbitrary_types_allowed = True
\ No newline at end of file
+        arbitrary_types_allowed = True
+
+# Only the fields the Bot response model needs; used as a Mongo projection on listings.
+BOT_PROJECTION = {"name": 1, "user_id": 1, "summary": 1, "skills": 1, "experience_years": 1}
@@ -0,0 +1,125 @@
+# scripts/benchmark_chunking.py
+#
+# Compares the section-aware resume chunker with the previous generic splitter
+# (RecursiveCharacterTextSplitter, 1000 chars with 200 overlap): index size, retrieval hit
+# rate and the context tokens the retrieved chunks add to every chat prompt.
+#
+#   python -m scripts.benchmark_chunking resumes/
+#   python -m scripts.benchmark_chunking resumes/ --queries queries.jsonl --k 4
+#
+# queries.jsonl holds one {"resume": "<file name>", "query": "...", "expect": "..."} per line;
+# a query is a hit when any of the top-k chunks contains the expected text (case-insensitive).
+# Tokens are estimated as characters / 4.
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core.rag_pipeline import extract_text_from_file
+from app.core.resume_chunker import chunk_resume
+
+SUPPORTED = {".pdf", ".docx", ".txt", ".json"}
+CHARS_PER_TOKEN = 4
+
+def load_texts(directory: Path) -> dict:
+    texts = {}
+    for path in sorted(directory.iterdir()):
+        if path.suffix in SUPPORTED:
+            try:
+                texts[path.name] = extract_text_from_file(path)
+            except Exception as e:
+                print(f"Skipping {path.name}: {e}")
+    return texts
+
+def recursive_chunks(text: str) -> list:
+    from langchain_text_splitters.character import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200).split_text(text)
+
+def section_chunks(text: str) -> list:
+    return [chunk.text for chunk in chunk_resume(text)]
+
+SPLITTERS = {"recursive": recursive_chunks, "sections": section_chunks}
+
+def evaluate(name: str, splitter, texts: dict, queries: list, embeddings, k: int) -> dict:
+    import faiss
+
+    started = time.perf_counter()
+    chunks = {resume: splitter(text) for resume, text in texts.items()}
+    chunking_ms = (time.perf_counter() - started) * 1000
+
+    indexes = {}
+    embed_started = time.perf_counter()
+    for resume, resume_chunks in chunks.items():
+        vectors = np.asarray(embeddings.embed_documents(resume_chunks), dtype=np.float32)
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+        indexes[resume] = index
+    embed_seconds = time.perf_counter() - embed_started
+
+    total_chunks = sum(len(c) for c in chunks.values())
+    embedded_chars = sum(len(chunk) for c in chunks.values() for chunk in c)
+    source_chars = sum(len(text) for text in texts.values())
+    report = {
+        "splitter": name,
+        "chunks": total_chunks,
+        "chunks_per_resume": round(total_chunks / len(texts), 1),
+        "embedded_chars_vs_source": round(embedded_chars / source_chars, 2),
+        "index_kb": round(sum(index.ntotal * index.d * 4 for index in indexes.values()) / 1024, 1),
+        "chunking_ms": round(chunking_ms, 2),
+        "embedding_seconds": round(embed_seconds, 2),
+    }
+
+    hits, context_tokens = [], []
+    for q in queries:
+        if q["resume"] not in indexes:
+            continue
+        query_vector = np.asarray([embeddings.embed_query(q["query"])], dtype=np.float32)
+        _, ids = indexes[q["resume"]].search(query_vector, k)
+        retrieved = [chunks[q["resume"]][i] for i in ids[0] if i != -1]
+        hits.append(any(q["expect"].lower() in chunk.lower() for chunk in retrieved))
+        context_tokens.append(sum(len(chunk) for chunk in retrieved) / CHARS_PER_TOKEN)
+    if hits:
+        report.update({
+            "queries": len(hits),
+            "hit_rate": round(sum(hits) / len(hits), 3),
+            "context_tokens_mean": round(float(np.mean(context_tokens))),
+            "context_tokens_p95": round(float(np.percentile(context_tokens, 95))),
+        })
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Section-aware vs recursive resume chunking")
+    parser.add_argument("directory")
+    parser.add_argument("--queries", help="JSONL file of {resume, query, expect}")
+    parser.add_argument("--k", type=int, default=4, help="chunks retrieved per query (the chat default is 4)")
+    parser.add_argument("--show", help="print the chunks of this resume for both splitters")
+    args = parser.parse_args()
+
+    texts = load_texts(Path(args.directory))
+    if not texts:
+        raise SystemExit("No resumes found")
+    queries = [json.loads(line) for line in Path(args.queries).read_text().splitlines() if line.strip()] if args.queries else []
+
+    if args.show:
+        for name, splitter in SPLITTERS.items():
+            for i, chunk in enumerate(splitter(texts[args.show])):
+                print(f"--- {name} #{i} ({len(chunk)} chars)\n{chunk}")
+
+    from app.core.embeddings import get_embeddings
+    embeddings = get_embeddings()
+    reports = [evaluate(name, splitter, texts, queries, embeddings, args.k) for name, splitter in SPLITTERS.items()]
+    for report in reports:
+        print(json.dumps(report))
+
+    before, after = reports
+    summary = {"resumes": len(texts), "index_size_change": round(after["index_kb"] / before["index_kb"] - 1, 3)}
+    if "hit_rate" in before:
+        summary["hit_rate_change"] = round(after["hit_rate"] - before["hit_rate"], 3)
+        summary["context_tokens_change"] = round(after["context_tokens_mean"] / before["context_tokens_mean"] - 1, 3)
+    print(json.dumps({"summary": summary}, indent=2))
+
+if __name__ == "__main__":
+    main()
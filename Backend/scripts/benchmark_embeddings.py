@@ -0,0 +1,118 @@
+# scripts/benchmark_embeddings.py
+#
+# Parity check and benchmark of the embedding runtimes ("torch" vs "onnx").
+# Each runtime runs in its own subprocess so the memory numbers are not polluted by the other one.
+#
+#   python -m scripts.benchmark_embeddings --corpus resumes.txt --min-cosine 0.99
+#
+# The corpus is a text file with one document per blank-line separated paragraph;
+# without --corpus a small built-in set of resume snippets is used.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SAMPLE_DOCS = [
+    "Senior backend engineer with 6 years of experience building Python microservices on AWS.",
+    "Skills: Python, FastAPI, Django, PostgreSQL, MongoDB, Redis, Docker, Kubernetes, Terraform.",
+    "Led a team of four to migrate a monolith to event-driven services using Kafka.",
+    "Data scientist focused on NLP: transformers, retrieval-augmented generation and evaluation.",
+    "B.Tech in Computer Science, Galgotias University, 2019 - 2023. CGPA 8.7.",
+    "Frontend developer: React, Next.js, TypeScript, Tailwind CSS and accessibility audits.",
+    "Built a real-time voice assistant with WebRTC, streaming STT and neural text-to-speech.",
+    "Software Engineer Intern, Acme Corp (Jun 2022 - Aug 2022): wrote ETL jobs in Spark.",
+    "Machine learning engineer experienced with PyTorch, ONNX, quantization and model serving.",
+    "Mobile developer shipping Kotlin and Swift apps with offline sync and push notifications.",
+]
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def _load_corpus(path):
+    if not path:
+        return SAMPLE_DOCS * 20
+    with open(path, encoding="utf-8") as f:
+        return [p.strip() for p in f.read().split("\n\n") if p.strip()]
+
+def run_worker(runtime: str, corpus_path, output_path: str):
+    """Embeds the corpus with one runtime and writes vectors + stats."""
+    os.environ["EMBEDDING_RUNTIME"] = runtime
+    os.environ["EMBEDDING_BACKEND"] = "local"
+    from app.core.embeddings import get_local_embeddings
+
+    docs = _load_corpus(corpus_path)
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    embeddings = get_local_embeddings()
+    embeddings.embed_query("warmup")
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(docs), dtype=np.float32)
+    embed_seconds = time.perf_counter() - started
+
+    np.save(output_path, vectors)
+    print(json.dumps({
+        "runtime": runtime,
+        "docs": len(docs),
+        "load_seconds": round(load_seconds, 2),
+        "docs_per_second": round(len(docs) / embed_seconds, 1),
+        "rss_mb": round(_rss_mb(), 1),
+        "rss_delta_mb": round(_rss_mb() - rss_before, 1),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare torch and onnx embedding runtimes")
+    parser.add_argument("--corpus")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--worker", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.corpus, args.output)
+        return
+
+    results, vectors = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for runtime in ("torch", "onnx"):
+            output = os.path.join(tmp, f"{runtime}.npy")
+            cmd = [sys.executable, "-m", "scripts.benchmark_embeddings", "--worker", runtime, "--output", output]
+            if args.corpus:
+                cmd += ["--corpus", args.corpus]
+            proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            results[runtime] = json.loads(proc.stdout.strip().splitlines()[-1])
+            vectors[runtime] = np.load(output)
+
+    for stats in results.values():
+        print(
+            f"{stats['runtime']:>6}: {stats['docs_per_second']:>8} docs/s  "
+            f"load {stats['load_seconds']}s  RSS {stats['rss_mb']} MB (+{stats['rss_delta_mb']} MB for the model)"
+        )
+
+    # Both runtimes return L2-normalized vectors, so the row-wise dot product is the cosine
+    cosines = np.sum(vectors["torch"] * vectors["onnx"], axis=1)
+    print(f"cosine(torch, onnx): mean {cosines.mean():.4f}  min {cosines.min():.4f}  over {len(cosines)} docs")
+
+    # Ranking parity: does the onnx nearest neighbour of every doc match torch's?
+    torch_nn = np.argsort(-(vectors["torch"] @ vectors["torch"].T), axis=1)[:, 1]
+    onnx_nn = np.argsort(-(vectors["onnx"] @ vectors["onnx"].T), axis=1)[:, 1]
+    print(f"nearest-neighbour agreement: {np.mean(torch_nn == onnx_nn):.1%}")
+
+    if cosines.min() < args.min_cosine:
+        print(f"FAIL: min cosine {cosines.min():.4f} < {args.min_cosine}")
+        sys.exit(1)
+    print("PASS")
+
+if __name__ == "__main__":
+    main()
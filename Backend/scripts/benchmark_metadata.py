@@ -0,0 +1,113 @@
+# scripts/benchmark_metadata.py
+#
+# Throughput of the heuristic metadata extractor and its agreement with the LLM extraction.
+#
+#   python -m scripts.benchmark_metadata resumes/                      # heuristic throughput only
+#   python -m scripts.benchmark_metadata resumes/ --llm --llm-cache llm.json
+#
+# The directory holds resumes in any format the upload endpoint accepts (.pdf/.docx/.txt/.json).
+# --llm-cache stores the LLM answers so later runs compare against the same reference
+# without spending tokens again.
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core.rag_pipeline import extract_text_from_file
+from app.core.resume_heuristics import extract_resume_metadata
+
+SUPPORTED = {".pdf", ".docx", ".txt", ".json"}
+
+def load_texts(directory: Path) -> dict:
+    texts = {}
+    for path in sorted(directory.iterdir()):
+        if path.suffix in SUPPORTED:
+            try:
+                texts[path.name] = extract_text_from_file(path)
+            except Exception as e:
+                print(f"Skipping {path.name}: {e}")
+    return texts
+
+async def llm_reference(texts: dict, cache_path: Path) -> dict:
+    cached = json.loads(cache_path.read_text()) if cache_path and cache_path.exists() else {}
+    missing = [name for name in texts if name not in cached]
+    if missing:
+        from app.core.rag_pipeline import RAGPipeline
+
+        for name in missing:
+            started = time.perf_counter()
+            metadata = await RAGPipeline.extract_metadata_llm(texts[name])
+            if metadata is not None:
+                cached[name] = {**metadata, "_seconds": round(time.perf_counter() - started, 3)}
+        if cache_path:
+            cache_path.write_text(json.dumps(cached, indent=2))
+    return cached
+
+def _skills(values) -> set:
+    return {str(v).strip().lower() for v in values or []}
+
+def compare(heuristic: dict, llm: dict) -> dict:
+    h_skills, l_skills = _skills(heuristic["skills"]), _skills(llm.get("skills"))
+    try:
+        llm_years = float(llm.get("experience_years") or 0.0)
+    except (TypeError, ValueError):
+        llm_years = 0.0
+    return {
+        "name_match": heuristic["candidate_name"].strip().lower() == str(llm.get("candidate_name", "")).strip().lower(),
+        "skills_recall": len(h_skills & l_skills) / len(l_skills) if l_skills else None,
+        "skills_jaccard": len(h_skills & l_skills) / len(h_skills | l_skills) if h_skills | l_skills else None,
+        "years_abs_error": abs(heuristic["experience_years"] - llm_years),
+    }
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return round(float(np.mean(values)), 3) if values else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Heuristic vs LLM resume metadata extraction")
+    parser.add_argument("directory")
+    parser.add_argument("--llm", action="store_true", help="compare against the LLM extraction")
+    parser.add_argument("--llm-cache", help="JSON file to read/write LLM answers")
+    parser.add_argument("--repeat", type=int, default=20, help="heuristic passes for the throughput figure")
+    args = parser.parse_args()
+
+    texts = load_texts(Path(args.directory))
+    if not texts:
+        raise SystemExit("No resumes found")
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        heuristic = {name: extract_resume_metadata(text, fallback_name="Unknown") for name, text in texts.items()}
+    heuristic_seconds = (time.perf_counter() - started) / (args.repeat * len(texts))
+
+    report = {
+        "resumes": len(texts),
+        "heuristic_ms_per_resume": round(heuristic_seconds * 1000, 2),
+        "heuristic_resumes_per_second": round(1 / heuristic_seconds, 1),
+    }
+
+    if args.llm:
+        reference = asyncio.run(llm_reference(texts, Path(args.llm_cache) if args.llm_cache else None))
+        rows = {name: compare(heuristic[name], reference[name]) for name in texts if name in reference}
+        for name, row in rows.items():
+            print(json.dumps({"resume": name, **row}))
+        llm_seconds = [reference[name].get("_seconds") for name in rows]
+        report.update({
+            "compared": len(rows),
+            "llm_seconds_per_resume": mean(llm_seconds),
+            "speedup": round(mean(llm_seconds) / heuristic_seconds) if mean(llm_seconds) else None,
+            "name_agreement": mean([float(r["name_match"]) for r in rows.values()]),
+            "skills_recall": mean([r["skills_recall"] for r in rows.values()]),
+            "skills_jaccard": mean([r["skills_jaccard"] for r in rows.values()]),
+            "years_mean_abs_error": mean([r["years_abs_error"] for r in rows.values()]),
+            "years_within_1": mean([float(r["years_abs_error"] <= 1.0) for r in rows.values()]),
+        })
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
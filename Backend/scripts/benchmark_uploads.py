@@ -0,0 +1,116 @@
+# scripts/benchmark_uploads.py
+#
+# Upload handling under concurrency: the previous approach (blocking copy to /tmp/<filename>
+# on the event loop) against spool_upload (async chunks, unique spool files, small files in
+# memory). Runs in-process through the ASGI stack, so no server, database or auth is needed.
+#
+#   python -m scripts.benchmark_uploads
+#   python -m scripts.benchmark_uploads --size-kb 200,4096 --concurrency 1,8,32 --requests 64
+#
+# Reports uploads/s, MB/s, p95 latency and the worst event-loop stall seen during the run.
+# Multipart parsing and the client share this one event loop, so absolute numbers are lower
+# than behind uvicorn; compare the two routes with each other. (File name collisions of the
+# old approach need several worker processes and don't show up here.)
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from fastapi import FastAPI, File, UploadFile
+
+from app.core.uploads import spool_upload
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/legacy")
+    async def legacy(file: UploadFile = File(...)):
+        file_location = f"/tmp/{file.filename}"
+        with open(file_location, "wb+") as file_object:
+            shutil.copyfileobj(file.file, file_object)
+        with open(file_location, "rb") as f:
+            data = f.read()
+        os.path.exists(file_location) and os.remove(file_location)
+        return {"tag": data[:16].decode(errors="replace")}
+
+    @app.post("/spool")
+    async def spool(file: UploadFile = File(...)):
+        upload = await spool_upload(file, ".pdf")
+        try:
+            with upload.open() as f:
+                data = f.read()
+        finally:
+            await upload.cleanup()
+        return {"tag": data[:16].decode(errors="replace"), "in_memory": upload.in_memory}
+
+    return app
+
+async def measure_lag(stop: asyncio.Event, samples: list):
+    interval = 0.005
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+async def run(client, route: str, size: int, concurrency: int, requests: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, mismatches, in_memory = [], 0, 0
+    filler = os.urandom(size)
+    payloads = [f"upload-{i:09d}".encode()[:16] + filler[16:] for i in range(requests)]
+
+    async def one(i: int):
+        nonlocal mismatches, in_memory
+        payload = payloads[i]
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(f"/{route}", files={"file": ("resume.pdf", payload, "application/pdf")})
+            latencies.append(time.perf_counter() - started)
+        body = response.json()
+        mismatches += body["tag"] != payload[:16].decode()
+        in_memory += bool(body.get("in_memory"))
+
+    stop, lag = asyncio.Event(), []
+    monitor = asyncio.create_task(measure_lag(stop, lag))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    if mismatches:
+        print(f"WARNING: {mismatches} uploads on /{route} read back different bytes")
+
+    return {
+        "route": route,
+        "size_kb": size // 1024,
+        "concurrency": concurrency,
+        "uploads_per_second": round(requests / elapsed, 1),
+        "mb_per_second": round(requests * size / elapsed / 1e6, 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+        "max_loop_stall_ms": round(max(lag, default=0.0) * 1000, 1),
+        "in_memory": in_memory,
+    }
+
+async def main_async(args):
+    import httpx
+
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for size_kb in map(int, args.size_kb.split(",")):
+            for concurrency in map(int, args.concurrency.split(",")):
+                for route in ("legacy", "spool"):
+                    print(json.dumps(await run(client, route, size_kb * 1024, concurrency, args.requests)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload throughput and event-loop impact under concurrency")
+    parser.add_argument("--size-kb", default="200,4096", help="comma-separated upload sizes")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="uploads per measurement")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
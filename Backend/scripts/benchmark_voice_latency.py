@@ -0,0 +1,145 @@
+# scripts/benchmark_voice_latency.py
+#
+# Replays recorded WAVs through the voice input pipeline (VAD -> STT -> retrieval -> LLM -> TTS)
+# in real time and measures latency from the end of each utterance's speech.
+#
+#   python -m scripts.benchmark_voice_latency questions.wav --stt file --stt-latency-ms 300
+#   python -m scripts.benchmark_voice_latency questions.wav --bot-id <id> --user-id <id> --tts
+#
+# With --stt file, each WAV needs a sidecar transcript (questions.txt, one line per utterance).
+# Without --bot-id only VAD and STT are measured. The WAV must be 16-bit mono; other sample
+# rates are resampled to VAD_SAMPLE_RATE.
+
+import argparse
+import asyncio
+import json
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.voice_input import AudioIngestor, FileTranscriptSTT, GroqSTT, can_reuse_retrieval
+
+TRAILING_SILENCE_MS = 1500
+
+def load_pcm(path: Path) -> bytes:
+    with wave.open(str(path), "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise SystemExit(f"{path}: expected 16-bit mono PCM")
+        rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if rate != settings.VAD_SAMPLE_RATE:
+        positions = np.arange(0, len(samples), rate / settings.VAD_SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+    silence = np.zeros(settings.VAD_SAMPLE_RATE * TRAILING_SILENCE_MS // 1000, dtype=np.int16)
+    return np.concatenate([samples, silence]).tobytes()
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 1) if values else None
+
+class Replay:
+    """Drives one WAV through an AudioIngestor and records per-utterance timings (ms)."""
+    def __init__(self, stt, pipeline, tts: bool):
+        self.pipeline = pipeline
+        self.tts = tts
+        self.results = []
+        self._prefetch = None
+        self._pending = []
+        self.ingestor = AudioIngestor(stt, on_partial=self.on_partial, on_final=self.on_final)
+
+    async def on_partial(self, text: str):
+        if self.pipeline and len(text.split()) >= 3 and (self._prefetch is None or self._prefetch[1].done()):
+            self._prefetch = (text, asyncio.create_task(asyncio.to_thread(self.pipeline.retrieve, text)))
+
+    async def on_final(self, text: str, speech_end: float):
+        result = {"transcript": text, "transcript_ms": (time.perf_counter() - speech_end) * 1000}
+        prefetch, self._prefetch = self._prefetch, None
+        # Answer in the background so the next utterance is still segmented on time
+        self._pending.append(asyncio.create_task(self.answer(text, speech_end, prefetch, result)))
+
+    async def answer(self, text: str, speech_end: float, prefetch, result: dict):
+        if self.pipeline:
+            from app.core.speech import SentenceSplitter, synthesize
+
+            context = None
+            result["early_retrieval"] = bool(prefetch and can_reuse_retrieval(prefetch[0], text))
+            if result["early_retrieval"]:
+                context = await prefetch[1]
+            splitter = SentenceSplitter()
+            first_sentence = None
+            async for token in self.pipeline.get_response_stream(text, [], context=context):
+                if "first_token_ms" not in result:
+                    result["first_token_ms"] = (time.perf_counter() - speech_end) * 1000
+                sentences = splitter.feed(token)
+                if sentences and first_sentence is None:
+                    first_sentence = sentences[0]
+                    result["first_sentence_ms"] = (time.perf_counter() - speech_end) * 1000
+                    if not self.tts:
+                        break
+                    await synthesize(first_sentence)
+                    result["first_audio_ms"] = (time.perf_counter() - speech_end) * 1000
+                    break
+        self.results.append({k: round(v, 1) if isinstance(v, float) else v for k, v in result.items()})
+
+    async def run(self, pcm: bytes, speed: float):
+        self.ingestor.start()
+        frame_bytes = settings.VAD_SAMPLE_RATE * settings.VAD_FRAME_MS // 1000 * 2
+        frame_seconds = settings.VAD_FRAME_MS / 1000 / speed
+        started = time.perf_counter()
+        for i, offset in enumerate(range(0, len(pcm), frame_bytes)):
+            self.ingestor.push_frame(pcm[offset:offset + frame_bytes])
+            # Pace against the wall clock so sleep overshoot doesn't accumulate
+            await asyncio.sleep(max(0.0, started + (i + 1) * frame_seconds - time.perf_counter()))
+        await asyncio.sleep(0.2)
+        await asyncio.gather(*self._pending)
+        self.ingestor.stop()
+
+async def main_async(args):
+    pipeline = None
+    if args.bot_id:
+        from app.core.rag_pipeline import RAGPipeline
+        pipeline = RAGPipeline(args.bot_id, args.user_id, args.bot_name)
+        pipeline.retrieve("warmup")
+
+    results = []
+    for wav_path in map(Path, args.wavs):
+        if args.stt == "file":
+            stt = FileTranscriptSTT.from_file(str(wav_path.with_suffix(".txt")), latency_ms=args.stt_latency_ms)
+        else:
+            stt = GroqSTT()
+        replay = Replay(stt, pipeline, args.tts)
+        await replay.run(load_pcm(wav_path), args.speed)
+        for result in replay.results:
+            print(json.dumps({"wav": wav_path.name, **result}))
+        results.extend(replay.results)
+
+    summary = {"utterances": len(results)}
+    for key in ("transcript_ms", "first_token_ms", "first_sentence_ms", "first_audio_ms"):
+        values = [r[key] for r in results if key in r]
+        if values:
+            summary[key] = {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+    if pipeline:
+        summary["early_retrieval_rate"] = round(
+            sum(1 for r in results if r.get("early_retrieval")) / max(1, len(results)), 2
+        )
+    print(json.dumps({"summary": summary}, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="End-of-speech to first-response latency for recorded WAVs")
+    parser.add_argument("wavs", nargs="+")
+    parser.add_argument("--stt", choices=["file", "groq"], default="file")
+    parser.add_argument("--stt-latency-ms", type=float, default=0.0, help="simulated latency for --stt file")
+    parser.add_argument("--bot-id")
+    parser.add_argument("--user-id")
+    parser.add_argument("--bot-name", default="Benchmark Bot")
+    parser.add_argument("--tts", action="store_true", help="also synthesize the first sentence")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (1.0 = real time)")
+    args = parser.parse_args()
+    if args.bot_id and not args.user_id:
+        parser.error("--bot-id needs --user-id")
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# scripts/export_onnx_embeddings.py
+#
+# Exports BAAI/bge-small-en-v1.5 to ONNX and quantizes it to int8 for the "onnx" embedding runtime.
+# Needs optimum[onnxruntime] (and therefore torch) at export time only:
+#
+#   pip install "optimum[onnxruntime]"
+#   python scripts/export_onnx_embeddings.py --output models/bge-small-en-v1.5-onnx
+
+import argparse
+from pathlib import Path
+
+MODEL_NAME = "BAAI/bge-small-en-v1.5"
+
+def export(output_dir: Path, model_name: str = MODEL_NAME):
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # 1. Export the full-precision graph (model.onnx) and the fast tokenizer (tokenizer.json)
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    # 2. Dynamic int8 quantization -> model_quantized.onnx
+    # avx2 kernels run on every x86-64 server CPU we deploy to; per-channel keeps accuracy close to fp32
+    quantizer = ORTQuantizer.from_pretrained(output_dir, file_name="model.onnx")
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=True)
+    quantizer.quantize(save_dir=output_dir, quantization_config=qconfig)
+
+    print(f"Exported {model_name} to {output_dir}")
+    for path in sorted(output_dir.glob("*.onnx")):
+        print(f"  {path.name}: {path.stat().st_size / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export bge-small to int8 ONNX")
+    parser.add_argument("--output", default="models/bge-small-en-v1.5-onnx")
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+    export(Path(args.output), args.model)
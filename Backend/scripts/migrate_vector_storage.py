@@ -0,0 +1,145 @@
+# scripts/migrate_vector_storage.py
+#
+# Converts existing FAISS indexes under data/ to a VECTOR_STORAGE type and reports the size
+# reduction and the recall of the converted index against the original.
+#
+#   python -m scripts.migrate_vector_storage --storage float16 --dry-run    # report only
+#   python -m scripts.migrate_vector_storage --storage sq8
+#   python -m scripts.migrate_vector_storage --storage sq8 --queries queries.txt
+#
+# Per-bot indexes are replaced atomically in place (workers reload them on the mtime change),
+# each under the same lock uploads hold while saving, so a concurrent re-upload is never lost.
+# The global index is published as a new generation under the writer lock. Recall@k uses the
+# texts in --queries (one per line, embedded with the configured model) when given, otherwise
+# up to --sample of each index's own vectors as queries.
+# Set VECTOR_STORAGE to the same value afterwards so new and rebuilt indexes match.
+
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.index_store import GenerationStore, bot_index_lock
+from app.core.vector_storage import STORAGE_TYPES, convert_index, index_bytes, index_storage, recall_at_k
+
+DATA_DIR = Path("data")
+GLOBAL_INDEX_NAME = "recruiters_index"
+
+def query_vectors(index, queries, sample: int, rng) -> np.ndarray:
+    if queries is not None:
+        return queries
+    rows = rng.choice(index.ntotal, size=min(sample, index.ntotal), replace=False)
+    return np.stack([index.reconstruct(int(row)) for row in rows]).astype(np.float32)
+
+def evaluate(original, storage: str, queries, args, rng):
+    converted = convert_index(original, storage)
+    row = {
+        "from": index_storage(original),
+        "vectors": original.ntotal,
+        "bytes_before": index_bytes(original),
+        "bytes_after": index_bytes(converted),
+    }
+    if original.ntotal:
+        row["recall"] = round(recall_at_k(original, converted, query_vectors(original, queries, args.sample, rng), args.k), 4)
+    return converted, row
+
+def migrate_bot_indexes(args, queries, rng) -> list:
+    import faiss
+
+    rows = []
+    for index_file in sorted(DATA_DIR.glob("*/*/faiss_index/index.faiss")):
+        # Read, convert and replace under the bot's lock: an upload saving in between would
+        # otherwise be overwritten by the converted copy of the older index
+        with bot_index_lock(index_file.parent):
+            if not index_file.exists():
+                continue   # bot deleted since the glob
+            original = faiss.read_index(str(index_file))
+            converted, row = evaluate(original, args.storage, queries, args, rng)
+            row["index"] = str(index_file.parent)
+            if not args.dry_run and converted is not original:
+                tmp_file = index_file.with_suffix(".faiss.tmp")
+                faiss.write_index(converted, str(tmp_file))
+                os.replace(tmp_file, index_file)
+        rows.append(row)
+        if args.verbose:
+            print(json.dumps(row))
+    return rows
+
+def migrate_global_index(args, queries, rng):
+    import faiss
+
+    store = GenerationStore(
+        DATA_DIR / "global_index",
+        legacy_file=f"{GLOBAL_INDEX_NAME}.faiss",
+        keep_generations=settings.GLOBAL_INDEX_KEEP_GENERATIONS
+    )
+    with store.writer_lock():
+        generation = store.current_generation()
+        if generation is None:
+            return None
+        source_dir = store.generation_dir(generation)
+        original = faiss.read_index(str(source_dir / f"{GLOBAL_INDEX_NAME}.faiss"))
+        converted, row = evaluate(original, args.storage, queries, args, rng)
+        row["index"] = str(source_dir)
+        if not args.dry_run and converted is not original:
+            def write(staging_dir: Path):
+                for path in source_dir.iterdir():
+                    if path.name != f"{GLOBAL_INDEX_NAME}.faiss":
+                        shutil.copy2(path, staging_dir / path.name)
+                faiss.write_index(converted, str(staging_dir / f"{GLOBAL_INDEX_NAME}.faiss"))
+            row["published_generation"] = store.publish(write)
+    if args.verbose:
+        print(json.dumps(row))
+    return row
+
+def summarize(rows: list) -> dict:
+    if not rows:
+        return {"indexes": 0}
+    before = sum(r["bytes_before"] for r in rows)
+    after = sum(r["bytes_after"] for r in rows)
+    recalls = [r["recall"] for r in rows if "recall" in r]
+    return {
+        "indexes": len(rows),
+        "vectors": sum(r["vectors"] for r in rows),
+        "mb_before": round(before / 1e6, 2),
+        "mb_after": round(after / 1e6, 2),
+        "size_reduction": round(1 - after / before, 3) if before else None,
+        "recall_mean": round(float(np.mean(recalls)), 4) if recalls else None,
+        "recall_min": round(float(np.min(recalls)), 4) if recalls else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert FAISS indexes to float16 / 8-bit storage")
+    parser.add_argument("--storage", choices=STORAGE_TYPES, required=True)
+    parser.add_argument("--dry-run", action="store_true", help="report size and recall without writing")
+    parser.add_argument("--skip-bots", action="store_true")
+    parser.add_argument("--skip-global", action="store_true")
+    parser.add_argument("--queries", help="text file with one search query per line")
+    parser.add_argument("--sample", type=int, default=200, help="stored vectors used as queries without --queries")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--verbose", action="store_true", help="print one line per index")
+    args = parser.parse_args()
+
+    queries = None
+    if args.queries:
+        from app.core.embeddings import get_embeddings
+        texts = [line.strip() for line in Path(args.queries).read_text().splitlines() if line.strip()]
+        queries = np.asarray(get_embeddings().embed_documents(texts), dtype=np.float32)
+    rng = np.random.default_rng(0)
+
+    report = {"storage": args.storage, "dry_run": args.dry_run}
+    if not args.skip_bots:
+        report["bot_indexes"] = summarize(migrate_bot_indexes(args, queries, rng))
+    if not args.skip_global:
+        row = migrate_global_index(args, queries, rng)
+        report["global_index"] = summarize([row] if row else [])
+        if row and "published_generation" in row:
+            report["global_index"]["published_generation"] = row["published_generation"]
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# scripts/profile_startup.py
+#
+# Cold-start report for the API process: runs `import app.main` under `python -X importtime`
+# and breaks the import time down by top-level package and by module.
+#
+#   python -m scripts.profile_startup --top 20
+#
+# Exits non-zero if any of the heavy ML packages (see HEAVY_PACKAGES) got imported eagerly,
+# which would mean a regression in the lazy-import setup.
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+HEAVY_PACKAGES = [
+    "torch", "sentence_transformers", "transformers", "faiss", "onnxruntime",
+    "langchain_community", "langchain_classic", "langchain_groq", "langchain_huggingface",
+    "pdfplumber", "docx", "authlib",
+]
+
+def profile(target: str):
+    """Returns [(module, self_us, cumulative_us)] plus the wall time of the import."""
+    code = (
+        "import time; _t = time.perf_counter(); "
+        f"import {target}; "
+        "print(time.perf_counter() - _t)"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        sys.exit(proc.returncode)
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows, float(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down API cold-start import time")
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows, wall_seconds = profile(args.target)
+
+    by_package = defaultdict(int)
+    for module, self_us, _ in rows:
+        by_package[module.split(".")[0]] += self_us
+
+    print(f"import {args.target}: {wall_seconds:.2f}s wall, {len(rows)} modules\n")
+    print("By top-level package (self time):")
+    for package, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {us / 1000:9.1f} ms  {package}")
+
+    print("\nSlowest modules (cumulative time):")
+    for module, _, cumulative_us in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {module}")
+
+    loaded_heavy = [p for p in HEAVY_PACKAGES if p in by_package]
+    if loaded_heavy:
+        print(f"\nFAIL: heavy packages imported at startup: {', '.join(loaded_heavy)}")
+        sys.exit(1)
+    print("\nOK: no heavy ML packages imported at startup")
+
+if __name__ == "__main__":
+    main()
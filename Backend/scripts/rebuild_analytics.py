@@ -0,0 +1,35 @@
+# scripts/rebuild_analytics.py
+#
+# Recomputes the recruiter talent analytics (skill frequency, experience histogram, skill
+# co-occurrence) from every active bot in MongoDB. Normally the counters are updated
+# incrementally as bots change; run this to recover after a failed update, a manual edit of
+# the bots collection, or a change to ANALYTICS_MAX_COOCCURRENCE_SKILLS.
+#
+#   python -m scripts.rebuild_analytics
+#   python -m scripts.rebuild_analytics --show 10    # also print the top skills and pairs
+#
+# The new counters replace the old ones in one rename; workers pick them up within
+# ANALYTICS_REFRESH_SECONDS.
+
+import argparse
+import asyncio
+import json
+
+from app.core.talent_analytics import talent_analytics
+
+async def main_async(args):
+    report = await talent_analytics.rebuild(batch_size=args.batch_size)
+    print(json.dumps(report, indent=2))
+    if args.show:
+        view = await talent_analytics.snapshot(top_skills=args.show, top_pairs=args.show)
+        print(json.dumps(view, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the talent analytics counters from MongoDB")
+    parser.add_argument("--batch-size", type=int, default=500, help="cursor batch and insert size")
+    parser.add_argument("--show", type=int, default=0, help="print the top N skills and pairs afterwards")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# scripts/rebuild_global_index.py
+#
+# Rebuilds the global recruiter index from MongoDB instead of from re-uploaded resumes: for
+# recovery from a corrupted data/global_index, or after changing the embedding model.
+#
+#   python -m scripts.rebuild_global_index
+#   python -m scripts.rebuild_global_index --batch-size 128 --workers 4
+#   python -m scripts.rebuild_global_index --restart        # discard an interrupted run
+#
+# Active bots with extracted metadata are streamed in _id order with a cursor, their profile
+# text is rebuilt with build_profile_text and embedded in batches, several at a time. Every
+# finished batch is saved under --work-dir together with a checkpoint (the last _id done), so
+# an interrupted run picks up where it stopped. At the end a catch-up pass re-reads the bots,
+# re-embeds profiles that changed while the rebuild ran and drops deleted ones; the result is
+# published as a new generation, only if no upload published one in between (otherwise it
+# catches up again). Workers hot-reload the new generation on their next search.
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.embeddings import EMBEDDING_MODEL_NAME, get_embeddings
+from app.core.rag_pipeline import GlobalRecruiterIndex, build_profile_text
+from app.db.session import bots_collection, ACTIVE_BOT_FILTER
+
+# Bots get a global profile once a resume was processed (or metadata was set by hand)
+PROFILE_FILTER = {
+    **ACTIVE_BOT_FILTER,
+    "$or": [{"skills": {"$exists": True}}, {"experience_years": {"$exists": True}}],
+}
+PROFILE_PROJECTION = {"name": 1, "summary": 1, "skills": 1, "experience_years": 1}
+CHECKPOINT_FILE = "checkpoint.json"
+
+def model_key() -> str:
+    runtime = settings.EMBEDDING_RUNTIME if settings.EMBEDDING_BACKEND == "local" else settings.EMBEDDING_BACKEND
+    return f"{EMBEDDING_MODEL_NAME}/{runtime}"
+
+# --- Checkpoints ---
+def load_checkpoint(work_dir: Path, dim: int, restart: bool) -> dict:
+    path = work_dir / CHECKPOINT_FILE
+    if restart and work_dir.exists():
+        shutil.rmtree(work_dir)
+    if path.exists():
+        checkpoint = json.loads(path.read_text(encoding="utf-8"))
+        if checkpoint["model"] != model_key() or checkpoint["dim"] != dim:
+            raise SystemExit(
+                f"{work_dir} was started with {checkpoint['model']} ({checkpoint['dim']} dims); "
+                f"the configured model is {model_key()} ({dim} dims). Rerun with --restart."
+            )
+        print(f"Resuming after bot {checkpoint['last_id']} ({checkpoint['bots']} bots in {checkpoint['parts']} parts)")
+        return checkpoint
+    (work_dir / "parts").mkdir(parents=True, exist_ok=True)
+    return {"model": model_key(), "dim": dim, "last_id": None, "parts": 0, "bots": 0}
+
+def save_part(work_dir: Path, checkpoint: dict, last_id: str, bot_ids: list, texts: list, vectors: np.ndarray):
+    """Writes one embedded batch, then advances the checkpoint past it (atomically)."""
+    name = f"part-{checkpoint['parts']:06d}"
+    np.save(work_dir / "parts" / f"{name}.npy", vectors)
+    (work_dir / "parts" / f"{name}.json").write_text(json.dumps({"bot_ids": bot_ids, "texts": texts}), encoding="utf-8")
+    checkpoint.update(last_id=last_id, parts=checkpoint["parts"] + 1, bots=checkpoint["bots"] + len(bot_ids))
+    tmp = work_dir / f"{CHECKPOINT_FILE}.tmp"
+    tmp.write_text(json.dumps(checkpoint), encoding="utf-8")
+    os.replace(tmp, work_dir / CHECKPOINT_FILE)
+
+def load_parts(work_dir: Path, parts: int) -> dict:
+    """bot_id -> (profile text, vector) for every saved part."""
+    profiles = {}
+    for i in range(parts):
+        name = f"part-{i:06d}"
+        meta = json.loads((work_dir / "parts" / f"{name}.json").read_text(encoding="utf-8"))
+        vectors = np.load(work_dir / "parts" / f"{name}.npy")
+        for bot_id, text, vector in zip(meta["bot_ids"], meta["texts"], vectors):
+            profiles[bot_id] = (text, vector)
+    return profiles
+
+# --- Embedding pass ---
+class Progress:
+    def __init__(self, total: int, done: int):
+        self.total = total
+        self.done = done
+        self.started = time.perf_counter()
+        self.embedded = 0
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.embedded / elapsed if elapsed else 0.0
+        remaining = max(self.total - self.done, 0)
+        print(json.dumps({
+            "bots": self.done,
+            "total": self.total,
+            "bots_per_second": round(rate, 1),
+            "eta_seconds": round(remaining / rate) if rate else None,
+        }))
+
+async def embed_all(args, embeddings, executor, work_dir: Path, checkpoint: dict):
+    loop = asyncio.get_running_loop()
+    query = dict(PROFILE_FILTER)
+    if checkpoint["last_id"]:
+        from bson import ObjectId
+        query["_id"] = {"$gt": ObjectId(checkpoint["last_id"])}
+    progress = Progress(await bots_collection.count_documents(PROFILE_FILTER), checkpoint["bots"])
+
+    # Batches embed concurrently but are saved in cursor order, so the checkpoint never skips one
+    pending = deque()
+
+    async def save_oldest():
+        last_id, bot_ids, texts, future = pending.popleft()
+        vectors = np.asarray(await future, dtype=np.float32)
+        save_part(work_dir, checkpoint, last_id, bot_ids, texts, vectors)
+        progress.done += len(bot_ids)
+        progress.embedded += len(bot_ids)
+        progress.report()
+
+    def submit(batch: list):
+        texts = [build_profile_text(bot) for bot in batch]
+        future = loop.run_in_executor(executor, embeddings.embed_documents, texts)
+        pending.append((str(batch[-1]["_id"]), [str(bot["_id"]) for bot in batch], texts, future))
+
+    batch = []
+    cursor = bots_collection.find(query, PROFILE_PROJECTION).sort("_id", 1).batch_size(args.batch_size)
+    async for bot in cursor:
+        batch.append(bot)
+        if len(batch) == args.batch_size:
+            submit(batch)
+            batch = []
+            # Bounded read-ahead: a couple of batches queued per embedding worker
+            while len(pending) >= args.workers * 2:
+                await save_oldest()
+    if batch:
+        submit(batch)
+    while pending:
+        await save_oldest()
+
+# --- Catch-up and publish ---
+async def catch_up(args, embeddings, executor, profiles: dict) -> dict:
+    """Brings profiles in line with the bots as they are now. Returns the change counts."""
+    loop = asyncio.get_running_loop()
+    changed, seen = [], set()
+    async for bot in bots_collection.find(PROFILE_FILTER, PROFILE_PROJECTION).batch_size(1000):
+        bot_id = str(bot["_id"])
+        seen.add(bot_id)
+        text = build_profile_text(bot)
+        if bot_id not in profiles or profiles[bot_id][0] != text:
+            changed.append((bot_id, text))
+    removed = [bot_id for bot_id in profiles if bot_id not in seen]
+    for bot_id in removed:
+        del profiles[bot_id]
+
+    batches = [changed[i:i + args.batch_size] for i in range(0, len(changed), args.batch_size)]
+    results = await asyncio.gather(*(
+        loop.run_in_executor(executor, embeddings.embed_documents, [text for _, text in batch]) for batch in batches
+    ))
+    for batch, vectors in zip(batches, results):
+        for (bot_id, text), vector in zip(batch, vectors):
+            profiles[bot_id] = (text, np.asarray(vector, dtype=np.float32))
+    return {"reembedded": len(changed), "removed": len(removed)}
+
+async def publish(args, embeddings, executor, profiles: dict) -> dict:
+    loop = asyncio.get_running_loop()
+    global_index = GlobalRecruiterIndex()
+    report = {"reembedded": 0, "removed": 0}
+    for attempt in range(args.catch_up_attempts + 1):
+        generation = global_index.store.current_generation()
+        changes = await catch_up(args, embeddings, executor, profiles)
+        report = {key: report[key] + changes[key] for key in report}
+        if not profiles:
+            raise SystemExit("No candidate profiles to index")
+        # Past the last attempt, publish anyway; profiles uploaded meanwhile need a re-upload or another run
+        force = attempt == args.catch_up_attempts
+        bot_ids = list(profiles)
+        published = await loop.run_in_executor(
+            executor, global_index.publish_rebuilt,
+            bot_ids, [profiles[b][0] for b in bot_ids], np.stack([profiles[b][1] for b in bot_ids]),
+            generation, force
+        )
+        if published is not None:
+            return {**report, "generation": published, "profiles": len(bot_ids), "catch_up_passes": attempt + 1}
+        print(f"Generation {generation} was replaced by an upload while catching up; catching up again")
+
+async def main_async(args):
+    started = time.perf_counter()
+    work_dir = Path(args.work_dir)
+    embeddings = get_embeddings()
+    dim = len(embeddings.embed_query("dimension probe"))
+    checkpoint = load_checkpoint(work_dir, dim, args.restart)
+
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="rebuild-embed") as executor:
+        embed_started = time.perf_counter()
+        resumed_bots = checkpoint["bots"]
+        await embed_all(args, embeddings, executor, work_dir, checkpoint)
+        embed_seconds = time.perf_counter() - embed_started
+
+        profiles = load_parts(work_dir, checkpoint["parts"])
+        report = await publish(args, embeddings, executor, profiles)
+
+    embedded = checkpoint["bots"] - resumed_bots
+    report.update({
+        "model": model_key(),
+        "vector_storage": settings.VECTOR_STORAGE,
+        "embedded_this_run": embedded,
+        "embedding_seconds": round(embed_seconds, 1),
+        "bots_per_second": round(embedded / embed_seconds, 1) if embed_seconds else None,
+        "total_seconds": round(time.perf_counter() - started, 1),
+    })
+    if not args.keep_work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the global recruiter index from MongoDB")
+    parser.add_argument("--batch-size", type=int, default=64, help="profiles per embedding call (and checkpoint)")
+    parser.add_argument("--workers", type=int, default=2, help="embedding batches in flight")
+    parser.add_argument("--work-dir", default="data/global_index_rebuild", help="embedded parts and checkpoint")
+    parser.add_argument("--restart", action="store_true", help="ignore an earlier interrupted run")
+    parser.add_argument("--keep-work-dir", action="store_true", help="keep the embedded parts after publishing")
+    parser.add_argument("--catch-up-attempts", type=int, default=3,
+                        help="retries when uploads publish during the final catch-up before publishing anyway")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()